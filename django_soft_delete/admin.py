@@ -1,7 +1,63 @@
 from django.contrib import admin
-from .admin_utils import custom_get_deleted_objects
+from django.db import router, transaction
+
+from .admin_utils import (collect_deleted_objects, confirmed_deletion,
+                          remember_deletion_plan)
 
 
 class SoftDeleteAdmin(admin.ModelAdmin):
+    # Show at most this many objects per model on the delete confirmation
+    # page, along with the number of objects of each model.
+    delete_confirmation_max_objects = None
+
     def get_deleted_objects(self, objs, request):
-        return custom_get_deleted_objects(objs, request, self.admin_site)
+        confirmed = request.POST.get('post')
+        if confirmed:
+            # The delete was confirmed: unless the rows changed since the
+            # confirmation page, delete them without rendering it again.
+            deletion = confirmed_deletion(objs, request, self.admin_site)
+            if deletion is not None:
+                collector, perms_needed = deletion
+                if not perms_needed:
+                    request.soft_delete_collector = collector
+                return [], {}, perms_needed, []
+
+        collector, deleted_objects = collect_deleted_objects(
+            objs, request, self.admin_site,
+            max_objects=self.delete_confirmation_max_objects)
+        if not confirmed:
+            _, _, perms_needed, protected = deleted_objects
+            if perms_needed or protected:
+                collector = None
+            remember_deletion_plan(objs, collector, request)
+        return deleted_objects
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        if 'delete_selected' in actions:
+            func, name, description = actions['delete_selected']
+            actions['delete_selected'] = (self._atomic_action(func), name,
+                                          description)
+        return actions
+
+    def _atomic_action(self, func):
+        # Like the delete view, so that the rows compared with the
+        # confirmation page's are the ones deleted.
+        def action(modeladmin, request, queryset):
+            with transaction.atomic(using=router.db_for_write(self.model)):
+                return func(modeladmin, request, queryset)
+        return action
+
+    def delete_model(self, request, obj):
+        collector = getattr(request, 'soft_delete_collector', None)
+        if collector is None:
+            super().delete_model(request, obj)
+        else:
+            collector.delete()
+
+    def delete_queryset(self, request, queryset):
+        collector = getattr(request, 'soft_delete_collector', None)
+        if collector is None:
+            super().delete_queryset(request, queryset)
+        else:
+            collector.delete()
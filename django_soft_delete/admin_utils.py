@@ -1,12 +1,26 @@
+import time
+from collections import OrderedDict
+from operator import attrgetter
+from urllib.parse import quote as url_quote
+
+from django.apps import apps
 from django.db import router
+from django.db.models import ProtectedError
+from django.db.models.query import QuerySet
 from django.urls import NoReverseMatch, reverse
 from django.utils.html import format_html
+from django.utils.http import RFC3986_SUBDELIMS
 from django.utils.text import capfirst
+from django.utils.translation import gettext as _
 
-from .collector import NestedDeleteCollector
+from .collector import (ConfirmDeleteCollector, DeleteCollector,
+                        NestedDeleteCollector)
 
 QUOTE_MAP = {i: '_%02X' % i for i in b'":/_#?;@&=+$,"[]<>%\n\\'}
 
+# Reversed in place of the primary key, to build change URLs once per model.
+PK_PLACEHOLDER = '__pk__'
+
 
 # ================  OVERRIDES FOR DJANGO ADMIN COLLECTOR =================
 
@@ -21,54 +35,105 @@ def quote(s):
     return s.translate(QUOTE_MAP) if isinstance(s, str) else s
 
 
-def custom_get_deleted_objects(objs, request, admin_site):
+def _check_delete_permission(request, admin_site, obj, perms_needed):
+    """
+    Add the verbose name of the model of ``obj`` to ``perms_needed`` if it is
+    registered in ``admin_site`` and the user may not delete ``obj``. Return
+    the model's ModelAdmin.
+    """
+    model_admin = admin_site._registry.get(obj.__class__)
+    if (model_admin is not None and
+            not model_admin.has_delete_permission(request, obj)):
+        perms_needed.add(obj._meta.verbose_name)
+    return model_admin
+
+
+def _format_callback(request, admin_site, perms_needed):
+    """
+    Return the callback formatting an object for the confirmation page.
+
+    The admin lookup, the delete permission check and the change URL only
+    depend on the model, so they are done once per model; the URL is
+    reversed with a placeholder which is replaced with each primary key.
+    """
+    model_links = {}
+
+    def get_change_url(model, obj):
+        model_admin = _check_delete_permission(request, admin_site, obj,
+                                               perms_needed)
+        if model_admin is None:
+            # Don't display link to edit, because it either has no
+            # admin or is edited inline.
+            return None
+        opts = model._meta
+        try:
+            return reverse('%s:%s_%s_change' % (admin_site.name,
+                                                opts.app_label,
+                                                opts.model_name),
+                           None, (PK_PLACEHOLDER,))
+        except NoReverseMatch:
+            # Change url doesn't exist -- don't display link to edit
+            return None
+
+    def format_callback(obj):
+        model = obj.__class__
+        try:
+            change_url = model_links[model]
+        except KeyError:
+            change_url = model_links[model] = get_change_url(model, obj)
+
+        verbose_name = capfirst(obj._meta.verbose_name)
+        if change_url is None:
+            return '%s: %s' % (verbose_name, obj)
+
+        # Display a link to the admin page.
+        pk = url_quote(str(quote(obj.pk)), safe=RFC3986_SUBDELIMS + '/~:@')
+        return format_html('{}: <a href="{}">{}</a>', verbose_name,
+                           change_url.replace(PK_PLACEHOLDER, pk), obj)
+
+    return format_callback
+
+
+def custom_get_deleted_objects(objs, request, admin_site, max_objects=None):
     """
     Find all objects related to ``objs`` that should also be deleted. ``objs``
     must be a homogeneous iterable of objects (e.g. a QuerySet).
 
     Return a nested list of strings suitable for display in the
     template with the ``unordered_list`` filter.
+
+    With ``max_objects``, only that many objects per model are fetched and
+    displayed, under the number of objects of the model, and the objects
+    are collected by primary key only; see truncated_deleted_objects().
     """
+    return collect_deleted_objects(objs, request, admin_site,
+                                   max_objects=max_objects)[1]
+
+
+def collect_deleted_objects(objs, request, admin_site, max_objects=None):
+    """
+    Return the collector of ``objs``, or None if there is nothing to
+    delete, and what custom_get_deleted_objects() returns.
+    """
+    if max_objects is not None and max_objects < 1:
+        raise ValueError('max_objects must be at least 1.')
     try:
         obj = objs[0]
     except IndexError:
-        return [], {}, set(), []
+        return None, ([], {}, set(), [])
     else:
         using = router.db_for_write(obj._meta.model)
-    collector = NestedDeleteCollector(using=using)
-    collector.collect(objs)
     perms_needed = set()
+    format_callback = _format_callback(request, admin_site, perms_needed)
 
-    def format_callback(obj):
-        model = obj.__class__
-        has_admin = model in admin_site._registry
-        opts = obj._meta
-
-        no_edit_link = '%s: %s' % (capfirst(opts.verbose_name), obj)
-
-        if has_admin:
-            if not admin_site._registry[model].has_delete_permission(request,
-                                                                     obj):
-                perms_needed.add(opts.verbose_name)
-            try:
-                admin_url = reverse('%s:%s_%s_change'
-                                    % (admin_site.name,
-                                       opts.app_label,
-                                       opts.model_name),
-                                    None, (quote(obj.pk),))
-            except NoReverseMatch:
-                # Change url doesn't exist -- don't display link to edit
-                return no_edit_link
-
-            # Display a link to the admin page.
-            return format_html('{}: <a href="{}">{}</a>',
-                               capfirst(opts.verbose_name),
-                               admin_url,
-                               obj)
-        else:
-            # Don't display link to edit, because it either has no
-            # admin or is edited inline.
-            return no_edit_link
+    if max_objects is not None:
+        collector = ConfirmDeleteCollector(using=using)
+        to_delete, model_count, protected = truncated_deleted_objects(
+            objs, collector, format_callback, max_objects)
+        return collector, (to_delete, model_count, perms_needed, protected)
+
+    collector = NestedDeleteCollector(using=using)
+    collector.collect(objs)
 
     to_delete = collector.nested(format_callback)
 
@@ -76,4 +141,224 @@ def custom_get_deleted_objects(objs, request, admin_site):
     model_count = {model._meta.verbose_name_plural: len(objs) for model, objs
                    in collector.model_objs.items()}
 
-    return to_delete, model_count, perms_needed, protected
+    return collector, (to_delete, model_count, perms_needed, protected)
+
+
+def truncated_deleted_objects(objs, collector, format_callback, max_objects):
+    """
+    Collect ``objs`` with ``collector``, a ConfirmDeleteCollector, and
+    return a list with, for every model, its number of objects followed by
+    the first ``max_objects`` of them, along with the model counts and the
+    protected objects.
+
+    Rows handled by fast deletes are never collected, they are counted
+    with COUNT queries. The protected objects of every relation are
+    reported, the first ``max_objects`` of them being displayed.
+    """
+    using = collector.using
+    collector.collect(objs)
+    if collector.protected:
+        protected = sorted(collector.protected,
+                           key=lambda obj: (obj._meta.label, obj.pk))
+        return [], {}, [format_callback(obj)
+                        for obj in protected[:max_objects]] + \
+            _more(len(protected) - max_objects)
+
+    counts = OrderedDict()
+    shown = OrderedDict()
+    for model, instances in collector.data.items():
+        counts[model] = len(instances)
+        if model in collector.pk_models:
+            pks = sorted(instances)[:max_objects]
+            shown[model] = list(model._base_manager.using(using).filter(
+                pk__in=pks).order_by('pk'))
+        else:
+            shown[model] = sorted(instances,
+                                  key=attrgetter('pk'))[:max_objects]
+    for fast_qs in collector.fast_deletes:
+        for qs in collector._cascade_querysets(fast_qs):
+            model = qs.model
+            count = qs.count()
+            if not count:
+                continue
+            counts[model] = counts.get(model, 0) + count
+            model_objs = shown.setdefault(model, [])
+            if len(model_objs) < max_objects:
+                model_objs.extend(
+                    qs.order_by('pk')[:max_objects - len(model_objs)])
+
+    to_delete = []
+    for model, count in counts.items():
+        opts = model._meta
+        to_delete.append('%s: %d' % (capfirst(opts.verbose_name_plural),
+                                     count))
+        to_delete.append([format_callback(obj) for obj in shown[model]] +
+                         _more(count - len(shown[model])))
+    model_count = {model._meta.verbose_name_plural: count
+                   for model, count in counts.items()}
+    return to_delete, model_count, []
+
+
+def _more(count):
+    return [_('and %d more') % count] if count > 0 else []
+
+
+# ================  DELETION PLANS  =================
+
+PLAN_SESSION_KEY = 'soft_delete_plan'
+# Plans older than this many seconds are discarded, and plans holding more
+# primary key entries than this aren't stored, to keep sessions small.
+PLAN_MAX_AGE = 60 * 60
+PLAN_MAX_ENTRIES = 10000
+
+JSON_TYPES = (type(None), bool, int, float, str)
+
+
+def _compact(pks):
+    """
+    Return the primary keys ``pks`` as runs of consecutive integers, or as a
+    sorted list of strings, or None if they are neither.
+    """
+    pks = sorted(pks)
+    if all(type(pk) is str for pk in pks):
+        return {'pks': pks}
+    if not all(type(pk) is int for pk in pks):
+        return None
+    runs = []
+    for pk in pks:
+        if runs and runs[-1][1] == pk - 1:
+            runs[-1][1] = pk
+        else:
+            runs.append([pk, pk])
+    return {'ranges': runs}
+
+
+def _entries(compact):
+    return len(compact.get('pks', compact.get('ranges')))
+
+
+def _objs_model(objs):
+    if isinstance(objs, QuerySet):
+        return objs.model
+    return objs[0]._meta.model
+
+
+def _deleted_rows(collector):
+    """
+    Return the primary keys of the rows ``collector`` deletes, compacted,
+    per model label, or None if they can't be stored. The rows of its fast
+    deletes are read with a SELECT per statement.
+    """
+    rows = {}
+    for model, instances in collector.data.items():
+        rows.setdefault(model._meta.label, set()).update(
+            collector._pk_list(model, instances))
+    for fast_qs in collector.fast_deletes:
+        for qs in collector._cascade_querysets(fast_qs):
+            rows.setdefault(qs.model._meta.label, set()).update(
+                qs.values_list('pk', flat=True))
+    compacted = {}
+    for label, pks in rows.items():
+        if not pks:
+            continue
+        compacted[label] = _compact(pks)
+        if compacted[label] is None:
+            return None
+    return compacted
+
+
+def _field_updates(collector):
+    """
+    Return the field updates of ``collector`` as sorted [model label, field
+    name, value, compacted primary keys] lists, or None if they can't be
+    stored.
+    """
+    field_updates = []
+    for model, instances_for_fieldvalues in collector.field_updates.items():
+        for (field, value), instances in instances_for_fieldvalues.items():
+            compact = _compact(obj.pk for obj in instances)
+            if compact is None or not isinstance(value, JSON_TYPES):
+                return None
+            field_updates.append([model._meta.label, field.name, value,
+                                  compact])
+    return sorted(field_updates, key=lambda update: update[:2])
+
+
+def deletion_plan(objs, collector):
+    """
+    Return what ``collector``, which collected ``objs``, deletes as a JSON
+    serializable plan: the primary keys of the rows it deletes and updates,
+    compacted into runs. Return None if the plan can't be stored: the
+    primary keys or the updated values aren't JSON values, or it is too
+    large.
+    """
+    rows = _deleted_rows(collector)
+    field_updates = _field_updates(collector)
+    if rows is None or field_updates is None:
+        return None
+    entries = (sum(_entries(compact) for compact in rows.values()) +
+               sum(_entries(update[3]) for update in field_updates))
+    if entries > PLAN_MAX_ENTRIES:
+        return None
+    return {
+        'created': time.time(),
+        'model': _objs_model(objs)._meta.label,
+        'rows': rows,
+        'field_updates': field_updates,
+    }
+
+
+def remember_deletion_plan(objs, collector, request):
+    """
+    Store the plan of ``collector``, which collected ``objs`` for the
+    confirmation page, in the session, in place of any previous plan.
+    """
+    if not hasattr(request, 'session'):
+        return
+    plan = None
+    if collector is not None:
+        plan = deletion_plan(objs, collector)
+    if plan is None:
+        request.session.pop(PLAN_SESSION_KEY, None)
+    else:
+        request.session[PLAN_SESSION_KEY] = plan
+
+
+def confirmed_deletion(objs, request, admin_site):
+    """
+    Return a collector, ready to delete ``objs``, and the verbose names of
+    the models the user may not delete, if it deletes exactly the rows of
+    the plan stored by the confirmation page. Return None if there is no
+    plan for ``objs`` or the rows changed since.
+
+    ``objs`` are collected again by primary key only, a fraction of the
+    work of rendering the confirmation page, and must be in the
+    transaction the delete runs in. The delete permission of every model is
+    checked again.
+    """
+    if not hasattr(request, 'session'):
+        return None
+    plan = request.session.pop(PLAN_SESSION_KEY, None)
+    if plan is None or time.time() - plan['created'] > PLAN_MAX_AGE:
+        return None
+    if not isinstance(objs, QuerySet) and not objs:
+        return None
+    model = _objs_model(objs)
+    if plan['model'] != model._meta.label:
+        return None
+    collector = DeleteCollector(using=router.db_for_write(model))
+    try:
+        collector.collect(objs)
+    except ProtectedError:
+        return None
+    if (_deleted_rows(collector) != plan['rows'] or
+            _field_updates(collector) != plan['field_updates']):
+        return None
+
+    perms_needed = set()
+    for label in plan['rows']:
+        model_admin = admin_site._registry.get(apps.get_model(label))
+        if (model_admin is not None and
+                not model_admin.has_delete_permission(request)):
+            perms_needed.add(model_admin.model._meta.verbose_name)
+    return collector, perms_needed
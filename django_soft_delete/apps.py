@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class SoftDeleteConfig(AppConfig):
+    name = 'django_soft_delete'
+    verbose_name = 'Soft Delete'
+
+    def ready(self):
+        from . import checks  # NOQA
+        from .registry import registry
+        from .related import install_related_descriptors
+        registry.populate()
+        install_related_descriptors()
@@ -0,0 +1,24 @@
+from django.core import checks
+
+from .indexes import has_soft_delete_index
+from .utils import get_soft_delete_models
+
+
+@checks.register(checks.Tags.models)
+def check_soft_delete_indexes(app_configs=None, **kwargs):
+    if app_configs is None:
+        models = get_soft_delete_models()
+    else:
+        models = get_soft_delete_models(
+            [app_config.label for app_config in app_configs])
+    return [
+        checks.Warning(
+            "Soft deletion model '%s' has no index for the deleted_at "
+            "filter." % model._meta.label,
+            hint="Add AliveIndex/DeadIndex (or soft_delete_indexes()) from "
+                 "django_soft_delete.indexes to Meta.indexes.",
+            obj=model,
+            id='django_soft_delete.W001',
+        )
+        for model in models if not has_soft_delete_index(model)
+    ]
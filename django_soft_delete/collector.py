@@ -1,14 +1,24 @@
+import asyncio
+import sys
+import uuid
+from array import array
 from collections import Counter
 from enum import Enum
 from operator import attrgetter
 
 from django.contrib.admin.utils import NestedObjects
 from django.db import transaction
-from django.db.models import signals, sql
+from django.db.models import ProtectedError, signals, sql
 from django.db.models.deletion import Collector
+from django.db.models.query import QuerySet
+from django.db.models.sql.constants import GET_ITERATOR_CHUNK_SIZE
 from django.utils.timezone import now
 
-from . import utils
+from . import instrumentation, utils
+from .plans import can_fast_cascade, can_fast_model, plan_cache
+from .registry import registry
+from .signals import (post_soft_delete_batch, post_undelete_batch,
+                      pre_soft_delete_batch)
 
 
 class CollectorAction(Enum):
@@ -16,158 +26,669 @@ class CollectorAction(Enum):
     UNDELETE = "undelete"
 
 
+class _NoPhase:
+    """
+    Stand-in for the phases of a collector run nobody instruments.
+    """
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NO_PHASE = _NoPhase()
+
+
 class SoftDeleteCollector(Collector):
 
-    def __init__(self, action_type, using):
+    def __init__(self, action_type, using, pk_only=True):
         self.action_type = action_type
+        # In pk only mode, rows reached through querysets are fetched with
+        # the few columns the cascade needs and only their primary keys are
+        # kept, unless their model has instance signal listeners.
+        self.pk_only = pk_only
+        # Models whose entry in self.data holds primary keys, not instances.
+        self.pk_models = set()
+        # Per phase timings, None unless instrumentation is enabled.
+        self.run = instrumentation.start_run(action_type.value, using)
+        # Stamps given to the soft deleted rows, new ones when left to None.
+        self.deleted_at = None
+        self.deletion_batch = None
+        # Root querysets among the fast deletes, see add_fast_delete().
+        self.fast_roots = []
         super().__init__(using=using)
 
-    def _delete_instances(self, model, instances, deleted_at):
+    def _phase(self, name):
+        if self.run is None:
+            return NO_PHASE
+        return self.run.phase(name)
+
+    def _needs_instances(self, model):
+        return (self.action_type == CollectorAction.DELETE and (
+            signals.pre_delete.has_listeners(model) or
+            signals.post_delete.has_listeners(model)))
+
+    def _lean_queryset(self, qs):
+        """
+        Restrict `qs` to the columns which are needed to cascade and to
+        match the rows to revive.
+        """
+        model = qs.model
+        if (not self.pk_only or qs._fields is not None or
+                self._needs_instances(model)):
+            return qs
+        return qs.only(*self._plan(model).lean_fields)
+
+    def _plan(self, model):
+        return plan_cache.get(model, self.action_type, self.using)
+
+    def collect(self, objs, *args, **kwargs):
+        # Querysets which were already evaluated (e.g. by related_objects)
+        # are kept, restricting their columns would fetch them again.
+        if isinstance(objs, QuerySet) and objs._result_cache is None:
+            objs = self._lean_queryset(objs)
+        if self.run is None:
+            self._collect(objs, *args, **kwargs)
+            return
+        with self.run.phase('collect'), self.run.deeper():
+            self._collect(objs, *args, **kwargs)
+
+    def _collect(self, objs, source=None, nullable=False,
+                 collect_related=True, source_attr=None,
+                 reverse_dependency=False, keep_parents=False):
+        """
+        Collector.collect(), following the steps of the model's cascade plan
+        instead of discovering its relations again.
+        """
+        if self.can_fast_delete(objs):
+            self.add_fast_delete(objs, root=source is None)
+            return
+        new_objs = self.add(objs, source, nullable,
+                            reverse_dependency=reverse_dependency)
+        if not new_objs:
+            return
+
+        model = new_objs[0].__class__
+
+        if not keep_parents:
+            # Recursively collect concrete model's parent models, but not
+            # their related objects. These are part of the plan's steps.
+            for ptr in registry.get(model).concrete_parents:
+                parent_objs = self._parent_objs(ptr, new_objs)
+                self.collect(parent_objs, source=model,
+                             source_attr=ptr.remote_field.related_name,
+                             collect_related=False,
+                             reverse_dependency=True)
+        if collect_related:
+            plan = self._plan(model)
+            parents = model._meta.parents
+            for related, on_delete in plan.steps:
+                # Preserve parent reverse relationships if keep_parents=True.
+                if keep_parents and related.model in parents:
+                    continue
+                field = related.field
+                for batch in self.get_del_batches(new_objs, field):
+                    sub_objs = self.related_objects(related, batch)
+                    if self.can_fast_delete(sub_objs, from_field=field):
+                        self.fast_deletes.append(sub_objs)
+                    elif sub_objs:
+                        self._on_delete(on_delete, field, sub_objs)
+            for field in plan.private_relations:
+                # It's something like generic foreign key.
+                sub_objs = field.bulk_related_objects(new_objs, self.using)
+                self.collect(sub_objs, source=model, nullable=True)
+
+    def add_fast_delete(self, qs, root=False):
+        """
+        Add `qs` to the fast deletes. The filter of a root queryset may go
+        through rows its cascade deletes first (e.g. its children), so the
+        primary keys of its rows are read before the cascade runs.
+        """
+        self.fast_deletes.append(qs)
+        if root and self._fast_relations(qs.model):
+            self.fast_roots.append(qs)
+
+    def _fast_delete_querysets(self, fast_qs):
+        """
+        Yield the querysets a fast delete of `fast_qs` runs, see
+        _cascade_querysets(), by batches of primary keys for fast roots.
+        """
+        if not any(fast_qs is root for root in self.fast_roots):
+            yield from self._cascade_querysets(fast_qs)
+            return
+        model = fast_qs.model
+        pks = list(fast_qs.using(self.using).values_list('pk', flat=True))
+        if not pks:
+            return
+        rows = model._base_manager.using(self.using)
+        for batch in self.get_del_batches(pks, model._meta.pk):
+            yield from self._cascade_querysets(rows.filter(pk__in=batch))
+
+    def _on_delete(self, on_delete, field, sub_objs):
+        on_delete(self, field, sub_objs, self.using)
+
+    def _parent_objs(self, ptr, objs):
+        """
+        Return the parents of `objs` through the parent link `ptr`. Django
+        fetches the parent of a lean instance row by row, so they are built
+        from the columns the instances have instead, or fetched at once when
+        their model needs full instances.
+        """
+        deferred = objs[0].get_deferred_fields()
+        if not deferred:
+            return [getattr(obj, ptr.name) for obj in objs]
+        parent_model = ptr.remote_field.model
+        if self._needs_instances(parent_model):
+            pk_list = [getattr(obj, ptr.attname) for obj in objs]
+            parents = []
+            for offset in range(0, len(pk_list), GET_ITERATOR_CHUNK_SIZE):
+                parents.extend(parent_model._base_manager.using(
+                    self.using).filter(pk__in=pk_list[
+                        offset:offset + GET_ITERATOR_CHUNK_SIZE]))
+            return parents
+        pk_attname = parent_model._meta.pk.attname
+        # The parent's primary key comes from the link, its other loaded
+        # columns (such as deleted_at) are inherited by the instances.
+        attnames = [f.attname for f in parent_model._meta.concrete_fields
+                    if f.attname == pk_attname or f.attname not in deferred]
+        return [
+            parent_model.from_db(self.using, attnames, [
+                getattr(obj, ptr.attname if attname == pk_attname
+                        else attname)
+                for attname in attnames])
+            for obj in objs
+        ]
+
+    def add(self, objs, source=None, nullable=False, reverse_dependency=False):
+        """
+        Add 'objs' to the collection like Collector.add() does. Only the
+        primary keys are kept for models collected in pk only mode, which is
+        decided the first time the model is added: instances passed in by
+        the caller are kept, rows fetched by a queryset aren't.
+        """
+        if not objs:
+            return []
+        model = objs[0].__class__
+        if model not in self.pk_models:
+            if (model in self.data or not self.pk_only or
+                    not isinstance(objs, QuerySet) or
+                    self._needs_instances(model)):
+                return super().add(objs, source, nullable,
+                                   reverse_dependency=reverse_dependency)
+            self.pk_models.add(model)
+        pks = self.data.setdefault(model, set())
+        new_objs = [obj for obj in objs if obj.pk not in pks]
+        pks.update(obj.pk for obj in new_objs)
+        # Nullable relationships can be ignored -- they are nulled out before
+        # deleting, and therefore do not affect the order in which objects have
+        # to be deleted.
+        if source is not None and not nullable:
+            if reverse_dependency:
+                source, model = model, source
+            self.dependencies.setdefault(
+                source._meta.concrete_model, set()).add(
+                model._meta.concrete_model)
+        return new_objs
+
+    def _pk_list(self, model, instances):
+        if model in self.pk_models:
+            return list(instances)
+        return [obj.pk for obj in instances]
+
+    def _sort_data(self):
+        for model, instances in self.data.items():
+            if model in self.pk_models:
+                pks = sorted(instances)
+                try:
+                    self.data[model] = array('q', pks)
+                except (TypeError, OverflowError):
+                    self.data[model] = pks
+            else:
+                self.data[model] = sorted(instances, key=attrgetter("pk"))
+
+    @staticmethod
+    def _deletion_values(model, deleted_at, deletion_batch):
+        values = {'deleted_at': deleted_at}
+        if utils.has_deletion_batch(model):
+            values['deletion_batch'] = deletion_batch
+        return values
+
+    def _delete_instances(self, model, instances, deleted_at, deletion_batch):
         count = 0
         if not utils.is_soft_delete_model(model):
             query = sql.DeleteQuery(model)
-            pk_list = [obj.pk for obj in instances]
+            pk_list = self._pk_list(model, instances)
             count = query.delete_batch(pk_list, self.using)
         if utils.check_local_deleted_at(model):
-            self._soft_delete_instances(model, instances, deleted_at)
+            self._soft_delete_instances(
+                model, instances,
+                self._deletion_values(model, deleted_at, deletion_batch))
             count = len(instances)
 
         return count
 
-    def _soft_delete_instances(self, model, instances, deleted_at):
+    def _soft_delete_instances(self, model, instances, values):
 
         query = sql.UpdateQuery(model)
-        pk_list = []
-        for ins in instances:
-            pk_list.append(ins.pk)
-            ins.deleted_at = deleted_at
+        pk_list = self._pk_list(model, instances)
+        if model not in self.pk_models:
+            for ins in instances:
+                for name, value in values.items():
+                    setattr(ins, name, value)
 
-        query.update_batch(pk_list,
-                           {'deleted_at': deleted_at}, self.using)
+        query.update_batch(pk_list, values, self.using)
 
-    def _delete_qs(self, qs, deleted_at):
+    def _delete_qs(self, qs, deleted_at, deletion_batch):
         count = 0
         model = qs.model
         if not utils.is_soft_delete_model(model):
             count = qs._raw_delete(using=self.using)
         if utils.check_local_deleted_at(model):
-            count = qs.count()
-            qs.update(**{'deleted_at': deleted_at})
+            count = qs.using(self.using).update(
+                **self._deletion_values(model, deleted_at, deletion_batch))
         return count
 
-    def delete(self):
-        # sort instance collections
-        for model, instances in self.data.items():
-            self.data[model] = sorted(instances, key=attrgetter("pk"))
+    def _can_fast_model(self, model, from_field=None):
+        return (not self._has_signal_listeners(model) and
+                can_fast_model(model, from_field))
 
-        # if possible, bring the models in an order suitable for databases that
-        # don't support transactions or cannot defer constraint checks until
-        # the
-        # end of a transaction.
-        self.sort()
-        # number of objects deleted for each model label
-        deleted_counter = Counter()
-        deleted_at = now()
-
-        with transaction.atomic(using=self.using, savepoint=False):
-            for model, obj in self.instances_with_model():
-                if not model._meta.auto_created:
-                    signals.pre_delete.send(
-                        sender=model, instance=obj, using=self.using
-                    )
+    def _fast_relations(self, model):
+        """
+        Return the relations (with their own sub relations) through which
+        deleting rows of `model` cascades, if the whole cascade can be run
+        with UPDATE/DELETE statements driven by subqueries. Return None if
+        some of the rows have to be collected.
+        """
+        plan = self._plan(model)
+        if plan.fast_relations is None or any(
+                self._has_signal_listeners(fast_model)
+                for fast_model in plan.fast_models):
+            return None
+        return plan.fast_relations
+
+    def can_fast_delete(self, objs, from_field=None):
+        """
+        Determine if the objects in the given queryset-like can be soft
+        deleted (or revived) without being fetched: with a single UPDATE,
+        plus one statement per model they cascade to, filtered with a
+        subquery on their parent's rows. This is the case if nothing in the
+        cascade has parents, signal listeners or on_delete handlers other
+        than CASCADE and DO_NOTHING.
+        """
+        if from_field and not can_fast_cascade(from_field, self.action_type,
+                                               self.using):
+            return False
+        if hasattr(objs, '_meta'):
+            model = type(objs)
+        elif hasattr(objs, 'model') and hasattr(objs, '_raw_delete'):
+            model = objs.model
+        else:
+            return False
+        if not self._can_fast_model(model, from_field):
+            return False
+        relations = self._fast_relations(model)
+        if relations is None:
+            return False
+        if self.run is not None:
+            # Sub objects are one level below the objects being collected.
+            self.run.note_depth(self.run.level + bool(from_field) +
+                                self._relations_depth(relations))
+        return True
+
+    @classmethod
+    def _relations_depth(cls, relations):
+        return max((1 + cls._relations_depth(sub_relations)
+                    for _, sub_relations in relations), default=0)
+
+    def _cascade_querysets(self, qs, relations=None):
+        """
+        Yield the querysets of the rows a fast delete of `qs` cascades to,
+        deepest first, and finally `qs` itself. Children are filtered with a
+        subquery on their parent queryset, so they must be updated before
+        their parents.
+        """
+        if relations is None:
+            relations = self._fast_relations(qs.model) or []
+        for related, sub_relations in relations:
+            field = related.field
+            sub_qs = related.related_model._default_manager.using(
+                self.using).filter(**{
+                    "%s__in" % field.name: qs.values(field.target_field.name)
+                })
+            yield from self._cascade_querysets(sub_qs, sub_relations)
+        yield qs
+
+    def _has_signal_listeners(self, model):
+        if self.action_type == CollectorAction.DELETE:
+            batch_signals = (pre_soft_delete_batch, post_soft_delete_batch)
+        else:
+            batch_signals = (post_undelete_batch,)
+        return any(signal.has_listeners(model) for signal in (
+            signals.pre_delete, signals.post_delete, signals.m2m_changed,
+        ) + batch_signals)
+
+    def _send_delete_signals(self, model, instances, instance_signal,
+                             batch_signal, deleted_at):
+        if model._meta.auto_created:
+            return
+        if (model not in self.pk_models and
+                instance_signal.has_listeners(model)):
+            for obj in instances:
+                instance_signal.send(
+                    sender=model, instance=obj, using=self.using
+                )
+        if batch_signal.has_listeners(model):
+            batch_signal.send(
+                sender=model, pk_list=self._pk_list(model, instances),
+                deleted_at=deleted_at, using=self.using
+            )
+
+    def _delete_steps(self, deleted_counter):
+        """
+        Soft delete the collected objects, yielding after every model
+        batch. Must run inside a transaction.
+        """
+        deleted_at = self.deleted_at or now()
+        deletion_batch = self.deletion_batch or uuid.uuid4()
 
-            for qs in self.fast_deletes:
-                count = self._delete_qs(qs, deleted_at)
+        with self._phase('pre_signals'):
+            for model, instances in self.data.items():
+                self._send_delete_signals(model, instances,
+                                          signals.pre_delete,
+                                          pre_soft_delete_batch, deleted_at)
+        yield
+
+        for fast_qs in self.fast_deletes:
+            for qs in self._fast_delete_querysets(fast_qs):
+                with self._phase('fast_deletes'):
+                    count = self._delete_qs(qs, deleted_at, deletion_batch)
                 deleted_counter[qs.model._meta.label] += count
+                yield
 
-            # update fields
-            for model, instances_for_fieldvalues in self.field_updates.items():
-                for (field,
-                     value), instances in instances_for_fieldvalues.items():
+        # update fields
+        for model, instances_for_fieldvalues in self.field_updates.items():
+            for (field,
+                 value), instances in instances_for_fieldvalues.items():
+                with self._phase('field_updates'):
                     query = sql.UpdateQuery(model)
                     query.update_batch([obj.pk for obj in instances],
                                        {field.name: value}, self.using)
+                yield
 
-            # reverse instance collections
-            for instances in self.data.values():
-                instances.reverse()
-
-            for model, instances in self.data.items():
-                count = self._delete_instances(model, instances, deleted_at)
-                deleted_counter[model._meta.label] += count
-
-                if not model._meta.auto_created:
-                    for obj in instances:
-                        signals.post_delete.send(
-                            sender=model, instance=obj, using=self.using
-                        )
+        # reverse instance collections
+        for instances in self.data.values():
+            instances.reverse()
 
+        for model, instances in self.data.items():
+            with self._phase('updates'):
+                count = self._delete_instances(model, instances, deleted_at,
+                                               deletion_batch)
+            deleted_counter[model._meta.label] += count
+
+            with self._phase('post_signals'):
+                self._send_delete_signals(model, instances,
+                                          signals.post_delete,
+                                          post_soft_delete_batch, deleted_at)
+            yield
+
+    def _prepare_delete(self):
+        with self._phase('sort'):
+            # sort instance collections
+            self._sort_data()
+
+            # if possible, bring the models in an order suitable for
+            # databases that don't support transactions or cannot defer
+            # constraint checks until the end of a transaction.
+            self.sort()
+
+    def _finish_delete(self, deleted_counter):
         for instances_for_fieldvalues in self.field_updates.values():
             for (field, value), instances in instances_for_fieldvalues.items():
                 for obj in instances:
                     setattr(obj, field.attname, value)
 
+        if self.run is not None:
+            self.run.finish(deleted_counter)
         return sum(deleted_counter.values()), dict(deleted_counter)
 
-    @staticmethod
-    def _undelete(instance):
-        if instance.deleted_at:
-            instance.deleted_at = None
-            instance.save()
+    def delete(self):
+        self._prepare_delete()
+        # number of objects deleted for each model label
+        deleted_counter = Counter()
+
+        with transaction.atomic(using=self.using, savepoint=False):
+            for _ in self._delete_steps(deleted_counter):
+                pass
+
+        return self._finish_delete(deleted_counter)
+
+    async def adelete(self):
+        """
+        Asynchronous version of delete(), which gives control back to the
+        event loop between model batches.
+        """
+        self._prepare_delete()
+        deleted_counter = Counter()
+        await self._arun_steps(self._delete_steps(deleted_counter),
+                               savepoint=False)
+        return self._finish_delete(deleted_counter)
+
+    async def _arun_steps(self, steps, savepoint):
+        """
+        Run the `steps` generator inside a transaction, one step per
+        thread-sensitive call, so that every step uses the connection (and
+        the transaction) of the same thread.
+        """
+        done = object()
+        atomic = transaction.atomic(using=self.using, savepoint=savepoint)
+        await utils.sync_to_async(atomic.__enter__)()
+        try:
+            while await utils.sync_to_async(next)(steps, done) is not done:
+                await asyncio.sleep(0)
+        except BaseException:
+            await utils.sync_to_async(atomic.__exit__)(*sys.exc_info())
+            raise
+        await utils.sync_to_async(atomic.__exit__)(None, None, None)
+
+    def _undelete_instances(self, model, instances):
+        count = 0
+        if utils.check_local_deleted_at(model):
+            pk_list = self._pk_list(model, instances)
+            for offset in range(0, len(pk_list), GET_ITERATOR_CHUNK_SIZE):
+                count += self._undelete_qs(model._base_manager.filter(
+                    pk__in=pk_list[offset:offset + GET_ITERATOR_CHUNK_SIZE]))
+        if (model not in self.pk_models and
+                utils.is_soft_delete_model(model)):
+            values = self._deletion_values(model, None, None)
+            for ins in instances:
+                for name, value in values.items():
+                    setattr(ins, name, value)
+        return count
+
+    def _undelete_qs(self, qs):
+        model = qs.model
+        if not utils.check_local_deleted_at(model):
+            return 0
+        return qs.using(self.using).filter(deleted_at__isnull=False).update(
+            **self._deletion_values(model, None, None))
+
+    def _undelete_steps(self, revive_counter):
+        """
+        Revive the collected objects, yielding after every model batch. Must
+        run inside a transaction.
+        """
+        for qs in self.fast_deletes:
+            with self._phase('fast_deletes'):
+                count = self._undelete_qs(qs)
+            if count:
+                revive_counter[qs.model._meta.model_name] += count
+            yield
 
-    def undelete(self):
-        # sort instance collections
         for model, instances in self.data.items():
-            self.data[model] = sorted(instances, key=attrgetter("pk"))
+            if model in self.pk_models:
+                # Only dead rows are collected through querysets.
+                pk_list = list(instances)
+            else:
+                pk_list = [obj.pk for obj in instances
+                           if getattr(obj, 'deleted_at', None)
+                           is not None]
+            with self._phase('updates'):
+                count = self._undelete_instances(model, instances)
+            if count:
+                revive_counter[model._meta.model_name] += count
+
+            if (pk_list and not model._meta.auto_created and
+                    post_undelete_batch.has_listeners(model)):
+                with self._phase('post_signals'):
+                    post_undelete_batch.send(
+                        sender=model, pk_list=pk_list, using=self.using
+                    )
+            yield
+
+    def _prepare_undelete(self):
+        with self._phase('sort'):
+            # sort instance collections
+            self._sort_data()
 
-        self.sort()
+            self.sort()
+
+    def _finish_undelete(self, revive_counter):
+        if self.run is not None:
+            self.run.finish(revive_counter)
+        return sum(revive_counter.values()), dict(revive_counter)
+
+    def undelete(self):
+        """
+        Revive the collected objects. Callers collect them in the same
+        transaction, so that the rows collect() moved back from a graveyard
+        return to it if the undelete fails.
+        """
+        self._prepare_undelete()
 
         revive_counter = Counter()
-        with transaction.atomic(using=self.using):
-            for qs in self.fast_deletes:
-                for qs_instance in qs:
-                    if utils.is_soft_delete_model(qs.model):
-                        revive_counter.update([qs_instance._meta.model_name])
-                        self._undelete(qs_instance)
+        with transaction.atomic(using=self.using, savepoint=False):
+            for _ in self._undelete_steps(revive_counter):
+                pass
 
-            for model, instances in self.data.items():
-                for instance in instances:
-                    if utils.is_soft_delete_model(model):
-                        revive_counter.update([instance._meta.model_name])
-                        self._undelete(instance)
+        return self._finish_undelete(revive_counter)
 
-        return sum(revive_counter.values()), dict(revive_counter)
+    async def aundelete(self, collect=None):
+        """
+        Asynchronous version of undelete(), which gives control back to the
+        event loop between model batches. `collect`, a callable collecting
+        the objects, is run first inside the transaction.
+        """
+        revive_counter = Counter()
+        await self._arun_steps(
+            self._collect_undelete_steps(collect, revive_counter),
+            savepoint=True)
+
+        return self._finish_undelete(revive_counter)
+
+    def _collect_undelete_steps(self, collect, revive_counter):
+        if collect is not None:
+            collect()
+            yield
+        self._prepare_undelete()
+        yield from self._undelete_steps(revive_counter)
 
 
 class DeleteCollector(SoftDeleteCollector):
-    def __init__(self, using):
-        super().__init__(CollectorAction.DELETE, using)
+    def __init__(self, using, pk_only=True):
+        super().__init__(CollectorAction.DELETE, using, pk_only=pk_only)
 
     def related_objects(self, related, objs):
         """
         Get a QuerySet of objects related to `objs` via the relation `related`.
         """
-        return related.related_model._default_manager.using(self.using).filter(
-            **{"%s__in" % related.field.name: objs}
-        )
+        return self._lean_queryset(
+            related.related_model._default_manager.using(self.using).filter(
+                **{"%s__in" % related.field.name: objs}
+            ))
+
 
+class ConfirmDeleteCollector(DeleteCollector):
+    """
+    Primary key only DeleteCollector for confirmation pages: the protected
+    objects of every relation are recorded in self.protected, instead of
+    stopping at the first ProtectedError.
+    """
 
-class NestedDeleteCollector(DeleteCollector, NestedObjects):
-    pass
+    def __init__(self, using):
+        super().__init__(using)
+        self.protected = set()
 
+    def _on_delete(self, on_delete, field, sub_objs):
+        try:
+            super()._on_delete(on_delete, field, sub_objs)
+        except ProtectedError as e:
+            self.protected.update(e.protected_objects)
 
-class UndeleteCollector(SoftDeleteCollector):
 
+class NestedDeleteCollector(NestedObjects, DeleteCollector):
     def __init__(self, using):
-        super().__init__(CollectorAction.UNDELETE, using)
+        # Every object is loaded, so that it can be displayed.
+        super().__init__(using, pk_only=False)
+
+    def can_fast_delete(self, *args, **kwargs):
+        # Every object is loaded, so that it can be displayed.
+        return False
+
+
+class UndeleteCollector(SoftDeleteCollector):
+
+    def __init__(self, using, pk_only=True):
+        super().__init__(CollectorAction.UNDELETE, using, pk_only=pk_only)
+
+    def collect(self, objs, source=None, *args, **kwargs):
+        if source is None:
+            # The rows to revive may have been archived. Querysets are
+            # restored before being evaluated.
+            if isinstance(objs, QuerySet):
+                self._restore_from_graveyard(objs.model, objs)
+            elif objs:
+                self._restore_from_graveyard(objs[0].__class__, objs)
+        super().collect(objs, source, *args, **kwargs)
+
+    def _restore_from_graveyard(self, model, objs):
+        from .graveyard import has_graveyard, restore_from_graveyard
+
+        if has_graveyard(model):
+            restore_from_graveyard(model, objs, self.using)
 
     def related_objects(self, related, objs):
         """
         Get a QuerySet of objects related to `objs` via the relation `related`.
         """
+        related_model = related.related_model
         filter_dict = {"%s__in" % related.field.name: objs}
-        if utils.is_soft_delete_model(related.related_model):
-            filter_dict["deleted_at__in"] = [obj.deleted_at for obj in objs]
-
-        return related.related_model._base_manager.using(self.using).filter(
+        if utils.is_soft_delete_model(related_model):
+            batches = self._deletion_batches(related_model, objs)
+            if batches is None:
+                filter_dict["deleted_at__in"] = [obj.deleted_at for obj in
+                                                 objs]
+            elif len(batches) == 1:
+                filter_dict["deletion_batch"] = batches.pop()
+            else:
+                filter_dict["deletion_batch__in"] = batches
+
+        qs = related_model._base_manager.using(self.using).filter(
             **filter_dict)
+        self._restore_from_graveyard(related_model, qs)
+        return self._lean_queryset(qs)
+
+    @staticmethod
+    def _deletion_batches(related_model, objs):
+        """
+        Return the deletion batches of `objs`, or None when the rows can only
+        be matched on their deleted_at timestamp.
+        """
+        if not (utils.has_deletion_batch(related_model) and
+                utils.has_deletion_batch(objs[0].__class__)):
+            return None
+        batches = {obj.deletion_batch for obj in objs}
+        if None in batches:
+            return None
+        return batches
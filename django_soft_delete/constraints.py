@@ -0,0 +1,47 @@
+from django.db.backends.utils import truncate_name
+from django.db.models import Q, UniqueConstraint
+
+
+class AliveUniqueConstraint(UniqueConstraint):
+    """
+    Unique constraint only enforced between alive rows
+    (``deleted_at IS NULL``), so soft deleted rows never clash with new ones.
+    SoftDeletionModel.validate_unique() checks the ones with the default
+    condition, so that forms report duplicates as validation errors.
+    """
+    default_condition = Q(deleted_at__isnull=True)
+
+    def __init__(self, *, fields, name, condition=None):
+        super().__init__(
+            fields=fields, name=name,
+            condition=(self.default_condition if condition is None
+                       else condition))
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        if kwargs.get('condition') == self.default_condition:
+            del kwargs['condition']
+        return path, args, kwargs
+
+
+def make_unique_fields_alive(model):
+    """
+    Replace the unique=True fields of ``model`` by AliveUniqueConstraints.
+
+    The primary key and one-to-one fields (which are always unique for
+    Django) are left untouched. The constraints are written to the model's
+    Meta options as well, for the migration autodetector.
+    """
+    opts = model._meta
+    for field in opts.local_fields:
+        if not field._unique or field.primary_key or field.one_to_one:
+            continue
+        field._unique = False
+        name = truncate_name('%s_%s_alive_uniq' % (opts.db_table,
+                                                   field.column), 30)
+        # A new list: Meta inheritance can share it with other models.
+        opts.constraints = [
+            *opts.constraints,
+            AliveUniqueConstraint(fields=[field.name], name=name),
+        ]
+        opts.original_attrs['constraints'] = opts.constraints
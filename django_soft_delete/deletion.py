@@ -16,10 +16,23 @@ def CASCADE(collector, field, sub_objs, using):
 
 
 def CASCADE_NO_REVIVE(collector, field, sub_objs, using):
-    if collector.action_type == CollectorAction.DELETE:
+    # Django's own collector (hard_delete) has no action type and only
+    # deletes.
+    action_type = getattr(collector, 'action_type', CollectorAction.DELETE)
+    if action_type == CollectorAction.DELETE:
         CASCADE(collector, field, sub_objs, using)
 
 
+def LAZY_CASCADE(collector, field, sub_objs, using):
+    """
+    Soft deletes leave the related rows in place: they are hidden from
+    alive() while the row they point to is dead, and soft deleted later by
+    the sweep_lazy_cascades command. Undeletes and hard deletes cascade
+    right away.
+    """
+    CASCADE(collector, field, sub_objs, using)
+
+
 def PROTECT(collector, field, sub_objs, using):
     return deletion.PROTECT(collector, field, sub_objs, using)
 
@@ -0,0 +1,193 @@
+"""
+Dry runs of deletes and undeletes: the rows they would touch are counted
+with COUNT queries on querysets filtered by subqueries, following the same
+cascade plans as the collectors, without loading any instance.
+"""
+from collections import Counter, namedtuple
+from math import ceil
+
+from django.db.models import deletion as django_deletion
+from django.db.models.sql.constants import GET_ITERATOR_CHUNK_SIZE
+
+from . import deletion, utils
+from .collector import CollectorAction, DeleteCollector, UndeleteCollector
+from .plans import cascade_handlers, plan_cache
+from .registry import registry
+
+PROTECT_HANDLERS = {django_deletion.PROTECT, deletion.PROTECT}
+
+DeletionEstimate = namedtuple('DeletionEstimate', [
+    # 'delete' or 'undelete'.
+    'action',
+    # Rows soft deleted (hard deleted for other models) or revived, per
+    # model label.
+    'rows',
+    # Rows whose foreign key is set by SET_NULL, SET_DEFAULT or SET(), per
+    # model label.
+    'field_updates',
+    # Rows of PROTECT relations which would make the run fail, per model
+    # label.
+    'protected',
+    # Rows left to the lazy cascade sweep, per model label.
+    'deferred',
+    # Number of statements the run would execute, signals aside.
+    'statements',
+    # Rows written, hence locked until the transaction ends, per table.
+    'locked_rows',
+])
+
+
+def estimate(qs, action):
+    """
+    Return a DeletionEstimate of running ``action`` (a CollectorAction) on
+    the rows of ``qs``.
+    """
+    return _Estimator(qs.db, action).run(qs)
+
+
+class _Estimator:
+
+    def __init__(self, using, action):
+        self.using = using
+        self.action = action
+        collector_class = (DeleteCollector if action == CollectorAction.DELETE
+                           else UndeleteCollector)
+        # Only asked whether rows are collected or handled as a whole, the
+        # way a run would.
+        self.collector = collector_class(using=using)
+        self.rows = Counter()
+        self.field_updates = Counter()
+        self.protected = Counter()
+        self.deferred = Counter()
+        self.locked_rows = Counter()
+        self.statements = 0
+
+    def run(self, qs):
+        if (self.action == CollectorAction.UNDELETE and
+                utils.is_soft_delete_model(qs.model)):
+            qs = qs.filter(deleted_at__isnull=False)
+        self._visit(qs, self.collector.can_fast_delete(qs), path=())
+        return DeletionEstimate(
+            action=self.action.value,
+            rows=dict(self.rows),
+            field_updates=dict(self.field_updates),
+            protected=dict(self.protected),
+            deferred=dict(self.deferred),
+            statements=self.statements,
+            locked_rows=dict(self.locked_rows),
+        )
+
+    def _visit(self, qs, fast, path, batches=None):
+        """
+        Count the rows of ``qs`` and everything they cascade to. ``fast``
+        tells whether they are handled by a single statement or have to be
+        collected first; ``batches`` is the number of times the statements
+        of the fast cascade ``qs`` belongs to run, None at its top.
+        """
+        model = qs.model
+        count = qs.count()
+        if fast:
+            if batches is None:
+                batches = self._fast_batches(model, count, root=not path)
+            self.statements += batches
+        if not count:
+            if fast:
+                # The statements of a fast cascade run whatever the count.
+                self.statements += batches * (sum(
+                    1 for _ in self.collector._cascade_querysets(qs)) - 1)
+            return
+        if fast:
+            self._write(model, count, batches=False)
+        else:
+            # A SELECT collecting the rows, then writes by batch.
+            self.statements += 1
+            self._write(model, count)
+            for ptr in registry.get(model).concrete_parents:
+                self._write(ptr.remote_field.model, count)
+
+        path += (model,)
+        handlers = cascade_handlers(self.action)
+        for related, on_delete in plan_cache.get(model, self.action,
+                                                 self.using).steps:
+            related_model = related.related_model
+            if related_model in path:
+                # Self-referential cascades are counted one level deep.
+                continue
+            sub_qs = self._related_queryset(related, qs)
+            if on_delete in handlers:
+                self._visit(sub_qs, fast or self.collector.can_fast_delete(
+                    sub_qs, from_field=related.field), path,
+                    batches if fast else None)
+            elif fast:
+                # Fast cascades only go through cascading relations.
+                continue
+            elif on_delete in PROTECT_HANDLERS:
+                self.statements += 1
+                self._add(self.protected, related_model, sub_qs.count())
+            elif self.action == CollectorAction.DELETE:
+                updated = sub_qs.count()
+                self.statements += 1 + ceil(updated / GET_ITERATOR_CHUNK_SIZE)
+                self._add(self.field_updates, related_model, updated)
+                self.locked_rows[related_model._meta.db_table] += updated
+
+        if self.action == CollectorAction.DELETE:
+            for related, on_delete in registry.get(model).cascade_relations:
+                if on_delete is deletion.LAZY_CASCADE:
+                    self._add(self.deferred, related.related_model,
+                              self._related_queryset(related, qs).count())
+
+    def _fast_batches(self, model, count, root):
+        """
+        Return the number of times the statements of a fast cascade of
+        ``count`` rows of ``model`` run: a root delete reads the primary keys
+        of its rows first and runs its cascade by batches of them.
+        """
+        if (not root or self.action != CollectorAction.DELETE or
+                not self.collector._fast_relations(model)):
+            return 1
+        self.statements += 1
+        if not count:
+            return 0
+        return len(self.collector.get_del_batches(range(count),
+                                                  model._meta.pk))
+
+    def _related_queryset(self, related, qs):
+        """
+        Return the rows related to the rows of ``qs`` through ``related``,
+        matched like the collector's related_objects() does.
+        """
+        field = related.field
+        related_model = related.related_model
+        filters = {'%s__in' % field.name: qs.values(field.target_field.name)}
+        if self.action == CollectorAction.DELETE:
+            return related_model._default_manager.using(self.using).filter(
+                **filters)
+        if utils.is_soft_delete_model(related_model):
+            if (utils.has_deletion_batch(related_model) and
+                    utils.has_deletion_batch(qs.model)):
+                filters['deletion_batch__in'] = qs.values('deletion_batch')
+            else:
+                filters['deleted_at__in'] = qs.values('deleted_at')
+        return related_model._base_manager.using(self.using).filter(**filters)
+
+    def _write(self, model, count, batches=True):
+        """
+        Account for ``count`` rows of ``model`` being soft deleted, hard
+        deleted or revived, by batches of primary keys unless ``batches`` is
+        False.
+        """
+        if utils.is_soft_delete_model(model):
+            # Inherited deleted_at columns are written with the parent.
+            if not utils.check_local_deleted_at(model):
+                return
+        elif self.action == CollectorAction.UNDELETE:
+            return
+        self._add(self.rows, model, count)
+        self.locked_rows[model._meta.db_table] += count
+        if batches:
+            self.statements += ceil(count / GET_ITERATOR_CHUNK_SIZE)
+
+    @staticmethod
+    def _add(counter, model, count):
+        if count:
+            counter[model._meta.label] += count
@@ -0,0 +1,194 @@
+"""
+Graveyard tables: rows soft deleted long ago are moved out of their model's
+table into a ``<db_table>_graveyard`` table with the same columns, generated
+from the model. Rows are moved with INSERT ... SELECT and DELETE statements.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, models, transaction
+from django.db.models.sql.datastructures import BaseTable
+
+
+def make_graveyard_model(model):
+    """
+    Create the graveyard model of ``model`` and set it as its
+    ``graveyard_model`` attribute.
+
+    The graveyard has the columns of the model, without unique constraints
+    and indexes, and with foreign keys that don't enforce referential
+    integrity, since the rows they point to may be archived as well.
+    """
+    opts = model._meta
+    if opts.parents:
+        raise ImproperlyConfigured(
+            "%s: graveyard tables aren't supported with multi-table "
+            "inheritance." % opts.label)
+
+    attrs = {
+        '__module__': model.__module__,
+        'Meta': type('Meta', (), {
+            'app_label': opts.app_label,
+            'db_table': '%s_graveyard' % opts.db_table,
+            'managed': opts.managed,
+            'verbose_name': '%s graveyard' % opts.verbose_name_raw,
+        }),
+    }
+    for field in opts.concrete_fields:
+        attrs[field.name] = _graveyard_field(field)
+    attrs['is_graveyard'] = True
+    model.graveyard_model = type('%sGraveyard' % opts.object_name,
+                                 (models.Model,), attrs)
+
+
+def _graveyard_field(field):
+    if field.primary_key:
+        if isinstance(field, models.BigAutoField):
+            return models.BigIntegerField(primary_key=True,
+                                          db_column=field.column)
+        if isinstance(field, models.AutoField):
+            return models.IntegerField(primary_key=True,
+                                       db_column=field.column)
+        return field.clone()
+    if field.is_relation:
+        return models.ForeignKey(
+            field.remote_field.model, on_delete=models.DO_NOTHING,
+            to_field=field.remote_field.field_name, related_name='+',
+            db_constraint=False, db_index=False, db_column=field.column,
+            null=field.null, blank=field.blank)
+    _, _, args, kwargs = field.deconstruct()
+    kwargs.update(unique=False, db_index=False)
+    return field.__class__(*args, **kwargs)
+
+
+def has_graveyard(model):
+    return getattr(model, 'graveyard_model', None) is not None
+
+
+def graveyard_queryset(qs):
+    """
+    Return a queryset of the graveyard model of ``qs.model``, with the
+    filters of ``qs``. Both tables have the same columns, so the query of
+    ``qs`` is reused, reading from the graveyard table.
+    """
+    graveyard_model = qs.model.graveyard_model
+    graveyard_table = graveyard_model._meta.db_table
+    query = qs.query.chain()
+    alias = query.get_initial_alias()
+    table_name = query.alias_map[alias].table_name
+    query.alias_map[alias] = BaseTable(graveyard_table, alias)
+    # The lists of table_map are shared with the original query.
+    query.table_map = {
+        table: [a for a in aliases if a != alias]
+        for table, aliases in query.table_map.items()}
+    query.table_map.setdefault(graveyard_table, []).insert(0, alias)
+    if not query.table_map[table_name]:
+        del query.table_map[table_name]
+    query.model = graveyard_model
+    graveyard_qs = graveyard_model._base_manager.using(qs.db).all()
+    graveyard_qs.query = query
+    return graveyard_qs
+
+
+def move_rows(qs, to_model):
+    """
+    Move the rows of ``qs`` to the table of ``to_model``, which has the same
+    columns, with an INSERT ... SELECT followed by a DELETE. Return the
+    number of rows moved.
+    """
+    using = qs.db
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    from_fields = qs.model._meta.concrete_fields
+    to_fields = to_model._meta.concrete_fields
+    with transaction.atomic(using=using, savepoint=False):
+        # The DELETE is done by primary key: DELETE ... WHERE pk IN (SELECT
+        # ...) isn't correlated correctly for a query reading from another
+        # table than its model's.
+        pk_list = list(qs.values_list('pk', flat=True))
+        count = 0
+        for batch in _pk_batches(pk_list, using):
+            batch_qs = qs.model._base_manager.using(using).filter(
+                pk__in=batch)
+            select_sql, params = batch_qs.values_list(
+                *[field.attname for field in from_fields]
+            ).query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute('INSERT INTO %s (%s) %s' % (
+                    quote_name(to_model._meta.db_table),
+                    ', '.join(quote_name(field.column) for field in to_fields),
+                    select_sql), params)
+                count += cursor.rowcount
+            batch_qs._raw_delete(using=using)
+    return count
+
+
+def _pk_batches(pk_list, using):
+    """
+    Split ``pk_list`` in batches small enough for the query parameters limit
+    of the database (999 on older SQLite builds).
+    """
+    batch_size = max(
+        connections[using].ops.bulk_batch_size(['pk'], pk_list), 1)
+    for offset in range(0, len(pk_list), batch_size):
+        yield pk_list[offset:offset + batch_size]
+
+
+def _referenced_rows_filter(model):
+    """
+    Return a Q excluding the rows of ``model`` which are still referenced
+    by another model's table, and can't be deleted from its table.
+    """
+    condition = models.Q()
+    for related in model._meta.get_fields(include_hidden=True):
+        if not (related.auto_created and not related.concrete and
+                (related.one_to_one or related.one_to_many)):
+            continue
+        related_model = related.related_model
+        if getattr(related_model, 'is_graveyard', False):
+            continue
+        field = related.field
+        condition &= ~models.Q(**{
+            '%s__in' % field.target_field.attname:
+                related_model._base_manager.filter(**{
+                    '%s__isnull' % field.attname: False
+                }).values(field.attname)
+        })
+    return condition
+
+
+def archive_model(model, cutoff, chunk_size=1000, using=None):
+    """
+    Move the rows of ``model`` soft deleted before ``cutoff`` to its
+    graveyard, ``chunk_size`` rows per transaction. Rows still referenced
+    by other tables are kept. Return the number of rows moved.
+    """
+    qs = model._base_manager.db_manager(using).filter(
+        deleted_at__lt=cutoff).filter(_referenced_rows_filter(model))
+    total = 0
+    last_pk = None
+    while True:
+        chunk = qs.order_by('pk')
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        with transaction.atomic(using=qs.db):
+            pk_list = list(chunk.select_for_update().values_list(
+                'pk', flat=True)[:chunk_size])
+            if not pk_list:
+                return total
+            # A range, as chunk_size can exceed the query parameters limit.
+            total += move_rows(
+                qs.filter(pk__gte=pk_list[0], pk__lte=pk_list[-1]),
+                model.graveyard_model)
+        last_pk = pk_list[-1]
+
+
+def restore_from_graveyard(model, objs, using=None):
+    """
+    Move the graveyard rows of ``model`` matching ``objs`` (a queryset of
+    ``model`` or a list of instances) back to its table. Return the number
+    of rows moved.
+    """
+    if isinstance(objs, models.QuerySet):
+        return move_rows(graveyard_queryset(objs), model)
+    manager = model.graveyard_model._base_manager.db_manager(using)
+    return sum(move_rows(manager.filter(pk__in=batch), model)
+               for batch in _pk_batches([obj.pk for obj in objs], manager.db))
@@ -0,0 +1,77 @@
+from django.db import models
+from django.db.models import Q
+
+
+class AliveIndex(models.Index):
+    """
+    Partial index restricted to alive rows (``deleted_at IS NULL``), which is
+    the filter of every query made through the default manager.
+
+    On backends without partial indexes, deleted_at is appended to the
+    indexed columns instead.
+    """
+    suffix = 'alv'
+    default_condition = Q(deleted_at__isnull=True)
+
+    def __init__(self, *, fields=(), name=None, db_tablespace=None,
+                 opclasses=(), condition=None):
+        super().__init__(fields=fields, name=name,
+                         db_tablespace=db_tablespace, opclasses=opclasses)
+        # Index only accepts a condition together with an explicit name, the
+        # name of this index is generated from the model when omitted.
+        self.condition = (self.default_condition if condition is None
+                          else condition)
+
+    def fallback_fields(self):
+        return self.fields + ['deleted_at']
+
+    def create_sql(self, model, schema_editor, using=''):
+        if schema_editor.connection.features.supports_partial_indexes:
+            return super().create_sql(model, schema_editor, using=using)
+        index = models.Index(fields=self.fallback_fields(), name=self.name,
+                             db_tablespace=self.db_tablespace)
+        return index.create_sql(model, schema_editor, using=using)
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        if kwargs.get('condition') == self.default_condition:
+            del kwargs['condition']
+        return path, args, kwargs
+
+
+class DeadIndex(AliveIndex):
+    """
+    Partial index over soft deleted rows, led by deleted_at, for dead() scans
+    ordered by deletion time (e.g. purges).
+    """
+    suffix = 'ded'
+    default_condition = Q(deleted_at__isnull=False)
+
+    def __init__(self, *, fields=(), **kwargs):
+        fields = ['deleted_at'] + [f for f in fields if f != 'deleted_at']
+        super().__init__(fields=fields, **kwargs)
+
+    def fallback_fields(self):
+        return self.fields
+
+
+def soft_delete_indexes(*fields):
+    """
+    Return the indexes to add to ``Meta.indexes`` of a soft deletion model: a
+    deleted_at index for dead rows and, if ``fields`` are given, a partial
+    index over alive rows on them.
+    """
+    indexes = [DeadIndex()]
+    if fields:
+        indexes.insert(0, AliveIndex(fields=list(fields)))
+    return indexes
+
+
+def has_soft_delete_index(model):
+    if model._meta.get_field('deleted_at').db_index:
+        return True
+    for index in model._meta.indexes:
+        if isinstance(index, AliveIndex) or 'deleted_at' in [
+                name for name, _ in index.fields_orders]:
+            return True
+    return False
@@ -0,0 +1,175 @@
+import random
+import threading
+import time
+from collections import Counter, OrderedDict, namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.utils.module_loading import import_string
+
+PhaseStats = namedtuple('PhaseStats', ['seconds', 'queries'])
+
+CollectorReport = namedtuple('CollectorReport', [
+    # 'delete' or 'undelete'.
+    'action',
+    # Alias of the database the collector ran on.
+    'using',
+    # Phase name -> PhaseStats, in the order the phases were first entered.
+    'phases',
+    # Rows deleted or revived per model, as counted by the collector.
+    'rows',
+    # Number of model levels the cascade went through, 1 for the objects
+    # the collector was given.
+    'depth',
+])
+
+
+class _ThreadLocalVar(threading.local):
+    """
+    Stand-in for ContextVar on Python 3.6: the callbacks of instrument()
+    blocks apply to their thread, coroutines of a thread share them.
+    """
+
+    def __init__(self, name, default):
+        self.value = default
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        token, self.value = self.value, value
+        return token
+
+    def reset(self, token):
+        self.value = token
+
+
+try:
+    from contextvars import ContextVar
+except ImportError:
+    ContextVar = _ThreadLocalVar
+
+_callbacks = ContextVar('soft_delete_instrumentation_callbacks', default=())
+
+_settings_cache = {}
+
+
+@contextmanager
+def instrument(callback):
+    """
+    Call ``callback`` with a CollectorReport for every collector run
+    finished inside the block.
+    """
+    token = _callbacks.set(_callbacks.get() + (callback,))
+    try:
+        yield
+    finally:
+        _callbacks.reset(token)
+
+
+def _settings_callback():
+    """
+    Return the callback of the SOFT_DELETE_INSTRUMENTATION setting (a
+    callable or its dotted path) and the sample rate.
+    """
+    try:
+        return _settings_cache['callback']
+    except KeyError:
+        callback = getattr(settings, 'SOFT_DELETE_INSTRUMENTATION', None)
+        if isinstance(callback, str):
+            callback = import_string(callback)
+        rate = getattr(settings, 'SOFT_DELETE_INSTRUMENTATION_SAMPLE_RATE',
+                       1.0)
+        _settings_cache['callback'] = callback, rate
+        return callback, rate
+
+
+def _clear_settings_cache(setting, **kwargs):
+    if setting.startswith('SOFT_DELETE_INSTRUMENTATION'):
+        _settings_cache.clear()
+
+
+setting_changed.connect(_clear_settings_cache)
+
+
+def start_run(action, using):
+    """
+    Return a CollectorRun recording a collector run, or None when nobody
+    listens, which keeps disabled instrumentation to this single call.
+    """
+    callbacks = _callbacks.get()
+    callback, rate = _settings_callback()
+    if callback is not None and (rate >= 1 or random.random() < rate):
+        callbacks += (callback,)
+    if not callbacks:
+        return None
+    return CollectorRun(action, using, callbacks)
+
+
+class CollectorRun:
+    """
+    Timings, query counts and depth of one collector run, handed to the
+    callbacks as a CollectorReport once the run is finished.
+    """
+
+    def __init__(self, action, using, callbacks):
+        self.action = action
+        self.using = using
+        self.callbacks = callbacks
+        self.seconds = Counter()
+        self.queries = Counter()
+        self.depth = 0
+        # Level of the objects collect() is currently working on.
+        self.level = 0
+        self._phase = None
+
+    @contextmanager
+    def phase(self, name):
+        # Nested phases (e.g. the recursive collect() calls) are accounted
+        # to the outermost one.
+        if self._phase is not None:
+            yield
+            return
+        self._phase = name
+        self.seconds[name] += 0
+        started = time.perf_counter()
+        try:
+            with connections[self.using].execute_wrapper(self._count_query):
+                yield
+        finally:
+            self.seconds[name] += time.perf_counter() - started
+            self._phase = None
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.queries[self._phase] += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def deeper(self):
+        """
+        Go one model level deeper in the cascade for the block.
+        """
+        self.level += 1
+        self.note_depth(self.level)
+        try:
+            yield
+        finally:
+            self.level -= 1
+
+    def note_depth(self, depth):
+        self.depth = max(self.depth, depth)
+
+    def finish(self, rows):
+        report = CollectorReport(
+            action=self.action,
+            using=self.using,
+            phases=OrderedDict(
+                (name, PhaseStats(seconds, self.queries[name]))
+                for name, seconds in self.seconds.items()),
+            rows=dict(rows),
+            depth=self.depth,
+        )
+        for callback in self.callbacks:
+            callback(report)
@@ -0,0 +1,87 @@
+"""
+Alive joins: a query mode adding ``deleted_at IS NULL`` to the ON clause of
+every join to a soft deletion model's table, so that lookups spanning
+relations and select_related() skip soft deleted rows in the same query.
+"""
+from collections import OrderedDict
+
+from django.db.models.sql import Query
+from django.db.models.sql.constants import INNER, LOUTER
+from django.db.models.sql.datastructures import Join
+
+from .registry import registry
+
+
+class AliveJoin(Join):
+    """
+    Join whose ON clause only matches the alive rows of the joined table,
+    when it holds a deleted_at column. A LEFT OUTER JOIN to a soft deleted
+    row yields NULLs, as if the row was missing, and an INNER JOIN drops
+    the row it was joined from.
+    """
+
+    def as_sql(self, compiler, connection):
+        sql, params = super().as_sql(compiler, connection)
+        column = self._deleted_at_column()
+        if column is None:
+            return sql, params
+        # Join.as_sql() has no hook for an extra condition which doesn't
+        # come from the join field, and ends with the ON clause in
+        # parentheses.
+        return '%s AND %s.%s IS NULL)' % (
+            sql[:-1], compiler.quote_name_unless_alias(self.table_alias),
+            connection.ops.quote_name(column)), params
+
+    def _deleted_at_column(self):
+        # join_field is the foreign key for forward joins and its
+        # ForeignObjectRel for reverse ones, their related_model being the
+        # joined model either way.
+        model = getattr(self.join_field, 'related_model', None)
+        if (not isinstance(model, type) or
+                model._meta.db_table != self.table_name or
+                not registry.get(model).has_local_deleted_at):
+            return None
+        return model._meta.get_field('deleted_at').column
+
+
+def _alive_join(join):
+    if type(join) is not Join:
+        return join
+    return AliveJoin(join.table_name, join.parent_alias, join.table_alias,
+                     join.join_type, join.join_field, join.nullable,
+                     filtered_relation=join.filtered_relation)
+
+
+class AliveJoinsQuery(Query):
+    """
+    Query turning every join it makes into an AliveJoin, including the
+    joins select_related() adds while compiling.
+    """
+
+    def join(self, join, *args, **kwargs):
+        join = _alive_join(join)
+        unused = {alias for alias, count in self.alias_refcount.items()
+                  if not count}
+        alias = super().join(join, *args, **kwargs)
+        # Lookups on a foreign key column leave an unused INNER join behind,
+        # which a later select_related() reuses. With the alive condition
+        # it would drop the rows joined to soft deleted ones, so it gets
+        # the join type of a new join instead.
+        reused = self.alias_map[alias]
+        if (alias in unused and reused.join_type == INNER and
+                (join.nullable or self.alias_map[
+                    reused.parent_alias].join_type == LOUTER)):
+            self.alias_map[alias] = reused.promote()
+        return alias
+
+
+def alive_joins_query(query):
+    """
+    Return a copy of ``query`` in alive joins mode, converting its existing
+    joins as well.
+    """
+    query = query.chain(AliveJoinsQuery)
+    query.alias_map = OrderedDict(
+        (alias, _alive_join(join))
+        for alias, join in query.alias_map.items())
+    return query
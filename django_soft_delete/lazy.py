@@ -0,0 +1,124 @@
+"""
+Lazy cascades: soft deleting a row leaves the rows pointing to it through a
+LAZY_CASCADE foreign key in place. alive() hides them while the row they
+point to is dead, and the sweep soft deletes them later on.
+"""
+from collections import Counter, defaultdict
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+
+from . import utils
+from .collector import DeleteCollector
+from .registry import registry
+from .restore import restore_order
+
+
+def alive_condition(model, path=()):
+    """
+    Return a Q matching the alive rows of ``model``: the rows which aren't
+    soft deleted and whose lazy cascade parents are alive, checked with a
+    NOT IN subquery on the dead parents per relation.
+    """
+    condition = Q(deleted_at__isnull=True)
+    path += (model,)
+    for field in registry.get(model).lazy_parents:
+        parent = field.related_model
+        # Self-referential and cyclic lazy cascades are followed one level.
+        if parent in path:
+            parent_alive = Q(deleted_at__isnull=True)
+        else:
+            parent_alive = alive_condition(parent, path)
+        dead_parents = parent._base_manager.exclude(parent_alive)
+        condition &= ~Q(**{
+            '%s__in' % field.name:
+                dead_parents.values(field.target_field.name)
+        })
+    return condition
+
+
+def dead_condition(model):
+    """
+    Return a Q matching the rows of ``model`` alive_condition() doesn't
+    match: the soft deleted rows and the rows hidden by a dead lazy cascade
+    parent.
+    """
+    if not registry.get(model).lazy_parents:
+        return Q(deleted_at__isnull=False)
+    return ~alive_condition(model)
+
+
+def sweep_model(model, chunk_size=1000, using=DEFAULT_DB_ALIAS):
+    """
+    Soft delete the rows of ``model`` whose lazy cascade parent is soft
+    deleted, ``chunk_size`` rows per transaction. The rows get the
+    deleted_at (and deletion_batch) of their parent, so that undeleting the
+    parent revives them. Return the number of rows soft deleted.
+    """
+    total = 0
+    for field in registry.get(model).lazy_parents:
+        parent = field.related_model
+        target = field.target_field.attname
+        stamps = ['deleted_at']
+        if (utils.has_deletion_batch(model) and
+                utils.has_deletion_batch(parent)):
+            stamps.append('deletion_batch')
+        orphans = model._base_manager.using(using).filter(**{
+            'deleted_at__isnull': True,
+            '%s__deleted_at__isnull' % field.name: False,
+        }).order_by('pk')
+        while True:
+            with transaction.atomic(using=using):
+                rows = list(orphans.values_list(
+                    'pk', field.attname)[:chunk_size])
+                if not rows:
+                    break
+                # The dead parents are locked, so that a concurrent undelete
+                # of a parent either waits for the sweep or is seen by it.
+                parent_stamps = {
+                    parent_id: tuple(stamp) for parent_id, *stamp in
+                    parent._base_manager.using(using).select_for_update()
+                    .filter(**{
+                        '%s__in' % target: {row[1] for row in rows},
+                        'deleted_at__isnull': False,
+                    }).values_list(target, *stamps)
+                }
+                groups = defaultdict(list)
+                for pk, parent_id in rows:
+                    if parent_id in parent_stamps:
+                        groups[parent_stamps[parent_id]].append(pk)
+                for stamp, pk_list in groups.items():
+                    collector = DeleteCollector(using=using)
+                    collector.deleted_at = stamp[0]
+                    if len(stamp) > 1:
+                        collector.deletion_batch = stamp[1]
+                    collector.collect(model._base_manager.using(
+                        using).filter(pk__in=pk_list))
+                    _, rows_count = collector.delete()
+                    total += rows_count.get(model._meta.label, 0)
+    return total
+
+
+def sweep(labels=None, chunk_size=1000, using=DEFAULT_DB_ALIAS):
+    """
+    Sweep the models with lazy cascades, optionally limited to ``labels``
+    ("app_label" or "app_label.ModelName"). Parents are swept before their
+    children, and the models are swept again until nothing is left, since
+    sweeping a model hides the rows pointing to the ones it soft deleted.
+
+    Return the number of rows soft deleted and a dict of counts per model
+    label.
+    """
+    counter = Counter()
+    models = [model for model in utils.get_soft_delete_models(labels)
+              if registry.get(model).lazy_parents]
+    models = restore_order(models, using)
+    while True:
+        swept = 0
+        for model in models:
+            count = sweep_model(model, chunk_size, using)
+            if count:
+                counter[model._meta.label] += count
+                swept += count
+        if not swept:
+            return sum(counter.values()), dict(counter)
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.timezone import now
+
+from django_soft_delete.graveyard import archive_model, has_graveyard
+from django_soft_delete.restore import restore_order
+from django_soft_delete.utils import get_soft_delete_models
+
+
+class Command(BaseCommand):
+    help = ("Move rows soft deleted before the retention window to the "
+            "graveyard tables of their models, in primary key ordered "
+            "chunks.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'labels', nargs='*', metavar='app_label[.ModelName]',
+            help='Restrict the archival to these apps or models.')
+        parser.add_argument(
+            '--days', type=int, default=30,
+            help='Keep rows soft deleted within this many days in their '
+                 'table (default: 30).')
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of rows moved per transaction (default: 1000).')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Nominates a database to archive. Defaults to the '
+                 '"default" database.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be a positive integer.')
+        try:
+            models = [model for model in
+                      get_soft_delete_models(options['labels'])
+                      if has_graveyard(model)]
+        except LookupError as e:
+            raise CommandError(str(e))
+
+        cutoff = now() - timedelta(days=options['days'])
+        # Referencing rows first, so the rows they point to can follow.
+        for model in reversed(restore_order(models, options['database'])):
+            count = archive_model(model, cutoff, options['chunk_size'],
+                                  options['database'])
+            if options['verbosity'] >= 1:
+                self.stdout.write('%s: archived %d rows' % (
+                    model._meta.label, count))
@@ -0,0 +1,65 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from django_soft_delete.querysets import SoftDeletionQuerySet
+from django_soft_delete.utils import is_soft_delete_model
+
+
+class Command(BaseCommand):
+    help = ("Estimate the rows a soft delete (or undelete) of a model's "
+            "rows would touch, with COUNT queries only.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'label', metavar='app_label.ModelName',
+            help='Model of the rows to delete.')
+        parser.add_argument(
+            '--filter', action='append', default=[], metavar='LOOKUP=VALUE',
+            dest='filters',
+            help='Restrict the rows to delete, e.g. --filter tenant_id=42. '
+                 'Can be repeated.')
+        parser.add_argument(
+            '--undelete', action='store_true',
+            help='Estimate an undelete of the soft deleted rows instead.')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Nominates a database to query. Defaults to the "default" '
+                 'database.')
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['label'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        if not is_soft_delete_model(model):
+            raise CommandError('%s is not a soft deletion model.' %
+                               model._meta.label)
+        filters = {}
+        for item in options['filters']:
+            lookup, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError('--filter expects LOOKUP=VALUE, got %r.' %
+                                   item)
+            filters[lookup] = value
+
+        qs = SoftDeletionQuerySet(model, using=options['database']).filter(
+            **filters)
+        if options['undelete']:
+            plan = qs.dead().undelete_plan()
+        else:
+            plan = qs.alive().delete_plan()
+
+        verb = 'revived' if options['undelete'] else 'deleted'
+        for label, count in sorted(plan.rows.items()):
+            self.stdout.write('%s: %d rows %s' % (label, count, verb))
+        for label, count in sorted(plan.field_updates.items()):
+            self.stdout.write('%s: %d rows updated' % (label, count))
+        for label, count in sorted(plan.deferred.items()):
+            self.stdout.write('%s: %d rows left to the lazy cascade sweep' % (
+                label, count))
+        for label, count in sorted(plan.protected.items()):
+            self.stdout.write('%s: %d protected rows' % (label, count))
+        self.stdout.write('Statements: %d' % plan.statements)
+        self.stdout.write('Locked rows: %d in %d tables' % (
+            sum(plan.locked_rows.values()), len(plan.locked_rows)))
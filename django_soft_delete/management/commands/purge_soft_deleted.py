@@ -0,0 +1,201 @@
+import json
+import os
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+from django.db.models.deletion import ProtectedError
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+
+from django_soft_delete.collector import CollectorAction
+from django_soft_delete.plans import cascade_handlers
+from django_soft_delete.querysets import SoftDeletionQuerySet
+from django_soft_delete.registry import registry
+from django_soft_delete.utils import get_soft_delete_models
+
+
+def hard_cascade_handlers():
+    """
+    Return the on_delete handlers which hard deletes cascade through.
+    """
+    return (cascade_handlers(CollectorAction.DELETE) |
+            cascade_handlers(CollectorAction.UNDELETE))
+
+
+def alive_dependents(model, path=()):
+    """
+    Return a Q matching the rows of ``model`` whose hard delete would
+    cascade into an alive row, or None if no relation can lead to one.
+    """
+    path += (model,)
+    handlers = hard_cascade_handlers()
+    conditions = []
+    for related, on_delete in registry.get(model).cascade_relations:
+        if on_delete not in handlers:
+            continue
+        related_model = related.related_model
+        condition = None
+        if registry.get(related_model).is_soft_delete:
+            condition = Q(deleted_at__isnull=True)
+        if related_model not in path:
+            deeper = alive_dependents(related_model, path)
+            if deeper is not None:
+                condition = deeper if condition is None else (
+                    condition | deeper)
+        if condition is None:
+            continue
+        field = related.field
+        # NULLs would make the NOT IN of exclude() match nothing.
+        dependents = related_model._base_manager.filter(
+            condition, **{'%s__isnull' % field.name: False})
+        conditions.append(Q(**{
+            '%s__in' % field.target_field.attname:
+                dependents.values(field.attname)}))
+    if not conditions:
+        return None
+    q = conditions[0]
+    for condition in conditions[1:]:
+        q |= condition
+    return q
+
+
+class Command(BaseCommand):
+    help = ("Permanently delete rows which were soft deleted before the "
+            "retention window, in primary key ordered chunks.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'labels', nargs='*', metavar='app_label[.ModelName]',
+            help='Restrict the purge to these apps or models.')
+        parser.add_argument(
+            '--days', type=int, default=30,
+            help='Keep rows soft deleted within this many days '
+                 '(default: 30).')
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of root rows hard deleted per transaction '
+                 '(default: 1000).')
+        parser.add_argument(
+            '--sleep', type=float, default=0,
+            help='Seconds to sleep between chunks.')
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording the progress, used to resume an '
+                 'interrupted run. It is removed once the run completes.')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Nominates a database to purge. Defaults to the "default" '
+                 'database.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be a positive integer.')
+        try:
+            models = get_soft_delete_models(options['labels'])
+        except LookupError as e:
+            raise CommandError(str(e))
+
+        checkpoint_path = options['checkpoint']
+        checkpoint = self.load_checkpoint(checkpoint_path)
+        if checkpoint is None:
+            cutoff = now() - timedelta(days=options['days'])
+            checkpoint = {
+                'cutoff': cutoff.isoformat(),
+                'days': options['days'],
+                'models': {},
+            }
+        elif checkpoint.get('days') != options['days']:
+            raise CommandError(
+                'The checkpoint %s was written with --days %s. Resume with '
+                'the same --days or remove it.' % (
+                    checkpoint_path, checkpoint.get('days')))
+        cutoff = parse_datetime(checkpoint['cutoff'])
+
+        skipped = 0
+        for model in models:
+            skipped += self.purge_model(model, cutoff, checkpoint, options)
+
+        if skipped:
+            # The checkpoint stays before the first skipped chunk of every
+            # model, so that a run resumed from it retries them.
+            self.save_checkpoint(checkpoint_path, checkpoint)
+            raise CommandError(
+                '%d chunks were skipped because of protected rows.' % skipped)
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+    def purge_model(self, model, cutoff, checkpoint, options):
+        """
+        Hard delete the rows of ``model`` soft deleted before ``cutoff``,
+        chunk by chunk. Chunks with protected rows are reported and skipped.
+        Rows whose hard delete would cascade into alive rows are reported
+        and kept. Return the number of chunks skipped.
+        """
+        label = model._meta.label
+        using = options['database']
+        qs = SoftDeletionQuerySet(model, using=using).filter(
+            deleted_at__lt=cutoff)
+        kept_rows = alive_dependents(model)
+        if kept_rows is not None:
+            kept = qs.filter(kept_rows).count()
+            if kept:
+                self.stderr.write(
+                    '%s: kept %d rows which still have alive dependents' % (
+                        label, kept))
+            qs = qs.exclude(kept_rows)
+        last_pk = checkpoint['models'].get(label)
+        total = 0
+        skipped = 0
+
+        while True:
+            chunk = qs.order_by('pk')
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            pk_list = list(chunk.values_list('pk', flat=True)[
+                           :options['chunk_size']])
+            if not pk_list:
+                break
+
+            last_pk = pk_list[-1]
+            try:
+                with transaction.atomic(using=using):
+                    deleted, _ = qs.filter(
+                        pk__gte=pk_list[0], pk__lte=last_pk).hard_delete()
+            except ProtectedError as e:
+                skipped += 1
+                self.stderr.write(
+                    '%s: skipped pk %s to %s, rows are protected: %s' % (
+                        label, pk_list[0], last_pk, e.args[0]))
+            else:
+                total += deleted
+                if not skipped:
+                    checkpoint['models'][label] = last_pk
+                    self.save_checkpoint(options['checkpoint'], checkpoint)
+                if options['verbosity'] >= 2:
+                    self.stdout.write('%s: deleted %d rows up to pk %s' % (
+                        label, deleted, last_pk))
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        if options['verbosity'] >= 1:
+            self.stdout.write('%s: purged %d rows' % (label, total))
+        return skipped
+
+    @staticmethod
+    def load_checkpoint(path):
+        if not path or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def save_checkpoint(path, checkpoint):
+        if not path:
+            return
+        tmp_path = '%s.tmp' % path
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f, default=str)
+        os.replace(tmp_path, path)
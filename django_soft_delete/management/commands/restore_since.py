@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from django_soft_delete.restore import restore_since
+
+
+class Command(BaseCommand):
+    help = ("Revive every row soft deleted at or after a point in time, "
+            "with one UPDATE per model.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'since', help='ISO 8601 date and time, e.g. 2019-10-01T12:00.')
+        parser.add_argument(
+            'labels', nargs='*', metavar='app_label[.ModelName]',
+            help='Restrict the restore to these apps or models.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only count the rows which would be revived.')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Nominates a database to restore. Defaults to the '
+                 '"default" database.')
+
+    def handle(self, *args, **options):
+        since = parse_datetime(options['since'])
+        if since is None:
+            raise CommandError('%r is not a valid date and time.'
+                               % options['since'])
+        if settings.USE_TZ and timezone.is_naive(since):
+            since = timezone.make_aware(since)
+
+        try:
+            total, rows_count = restore_since(
+                since, options['labels'], options['database'],
+                dry_run=options['dry_run'])
+        except LookupError as e:
+            raise CommandError(str(e))
+
+        if options['verbosity'] >= 1:
+            verb = 'would revive' if options['dry_run'] else 'revived'
+            for label, count in rows_count.items():
+                self.stdout.write('%s: %s %d rows' % (label, verb, count))
+            self.stdout.write('%s %d rows in total' % (verb.capitalize(),
+                                                       total))
@@ -0,0 +1,72 @@
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from django_soft_delete.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = ("Run the deletion jobs recorded by delete_async_job() and "
+            "undelete_async_job() with a pool of worker threads.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Number of jobs run concurrently (default: 4).')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once there are no jobs left to run instead of '
+                 'polling for new ones.')
+        parser.add_argument(
+            '--poll-interval', type=float, default=5,
+            help='Seconds to wait before looking for new jobs when the '
+                 'queue is empty (default: 5).')
+        parser.add_argument(
+            '--stale-after', type=int, default=3600,
+            help='Take over running jobs whose worker gave no sign of life '
+                 'for this many seconds (default: 3600).')
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1:
+            raise CommandError('--threads must be a positive integer.')
+        self.stop = threading.Event()
+        prefix = '%s:%d' % (socket.gethostname(), os.getpid())
+
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            futures = [
+                executor.submit(self.work, '%s:%d' % (prefix, index),
+                                options)
+                for index in range(options['threads'])
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except KeyboardInterrupt:
+                # Workers put their job back in the queue after the chunk
+                # they are running.
+                self.stop.set()
+                raise
+
+    def work(self, worker, options):
+        stale_after = timedelta(seconds=options['stale_after'])
+        try:
+            while not self.stop.is_set():
+                job = DeletionJob.objects.claim(worker, stale_after)
+                if job is None:
+                    if options['once']:
+                        return
+                    self.stop.wait(options['poll_interval'])
+                    continue
+
+                job.run(should_stop=self.stop.is_set)
+                if options['verbosity'] >= 1:
+                    self.stdout.write('%s: job %d %s %s, %d rows' % (
+                        worker, job.pk, job.action, job.status, job.count))
+        finally:
+            # Every thread has its own connections.
+            connections.close_all()
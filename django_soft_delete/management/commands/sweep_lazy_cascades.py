@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from django_soft_delete.lazy import sweep
+
+
+class Command(BaseCommand):
+    help = ("Soft delete the rows left behind by LAZY_CASCADE relations, "
+            "whose parent is soft deleted, in primary key ordered chunks.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'labels', nargs='*', metavar='app_label[.ModelName]',
+            help='Restrict the sweep to these apps or models.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of rows soft deleted per transaction '
+                 '(default: 1000).')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Nominates a database to sweep. Defaults to the "default" '
+                 'database.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be a positive integer.')
+        try:
+            _, rows_count = sweep(options['labels'], options['chunk_size'],
+                                  options['database'])
+        except LookupError as e:
+            raise CommandError(str(e))
+
+        if options['verbosity'] >= 1:
+            for label, count in sorted(rows_count.items()):
+                self.stdout.write('%s: swept %d rows' % (label, count))
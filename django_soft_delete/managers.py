@@ -1,11 +1,24 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import Q
+from django.utils.timezone import now
 
 from .querysets import SoftDeletionQuerySet
 
+# Number of jobs a worker tries to claim before giving up, when other
+# workers claim them first.
+CLAIM_CANDIDATES = 10
+
 
 class SoftDeletionManager(models.Manager):
+    alive_only = True
+
     def __init__(self, *args, **kwargs):
-        self.alive_only = kwargs.pop('alive_only', True)
+        alive_only = kwargs.pop('alive_only', None)
+        if alive_only is not None:
+            self.alive_only = alive_only
         super().__init__(*args, **kwargs)
 
     def get_queryset(self):
@@ -15,3 +28,64 @@ class SoftDeletionManager(models.Manager):
 
     def hard_delete(self):
         return self.get_queryset().hard_delete()
+
+    async def ahard_delete(self):
+        return await self.get_queryset().ahard_delete()
+
+    def with_graveyard(self):
+        return self.get_queryset().with_graveyard()
+
+    def alive_joins(self):
+        return self.get_queryset().alive_joins()
+
+
+class AllObjectsManager(SoftDeletionManager):
+    """
+    Manager returning soft deleted rows as well. Django builds related
+    managers from the manager class alone, so the opt-out lives on the
+    class: ``employee.family_members(manager='all_objects')`` includes the
+    soft deleted family members.
+    """
+    alive_only = False
+
+
+class DeletionJobManager(models.Manager):
+    def enqueue(self, queryset, action, **kwargs):
+        """
+        Record a job running ``action`` on the rows of ``queryset`` and
+        return it. The rows are recorded by primary key.
+        """
+        query = queryset._collector_query(action)
+        pk_list = list(query.order_by('pk').values_list('pk', flat=True))
+        return self.create(
+            model=query.model._meta.label, action=action,
+            pk_list=json.dumps(pk_list, cls=DjangoJSONEncoder),
+            using=query.db, **kwargs)
+
+    def claim(self, worker, stale_after=None):
+        """
+        Mark the oldest pending job as running for ``worker`` and return it,
+        or None if there is nothing to run. With ``stale_after`` (a
+        timedelta), running jobs whose heartbeat is older are claimed too,
+        resuming the work of a worker which died.
+
+        A job is claimed with an UPDATE conditional on its state, so that
+        concurrent workers never get the same job.
+        """
+        model = self.model
+        runnable = Q(status=model.PENDING)
+        if stale_after is not None:
+            runnable |= Q(status=model.RUNNING,
+                          heartbeat_at__lt=now() - stale_after)
+        for job in self.filter(runnable).order_by('pk')[:CLAIM_CANDIDATES]:
+            heartbeat_at = now()
+            claimed = self.filter(
+                pk=job.pk, status=job.status, heartbeat_at=job.heartbeat_at,
+            ).update(status=model.RUNNING, worker=worker,
+                     heartbeat_at=heartbeat_at)
+            if claimed:
+                job.status = model.RUNNING
+                job.worker = worker
+                job.heartbeat_at = heartbeat_at
+                return job
+        return None
@@ -0,0 +1,40 @@
+# Generated by Django 2.2.6 on 2026-10-18 07:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=255)),
+                ('action', models.CharField(choices=[('delete', 'delete'), ('undelete', 'undelete')], max_length=10)),
+                ('pk_list', models.TextField()),
+                ('using', models.CharField(max_length=255)),
+                ('chunk_size', models.PositiveIntegerField(default=1000)),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('running', 'running'), ('done', 'done'), ('failed', 'failed'), ('cancelled', 'cancelled')], db_index=True, default='pending', max_length=10)),
+                ('cancel_requested', models.BooleanField(default=False)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=3)),
+                ('error', models.TextField(blank=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('rows_count', models.TextField(default='{}')),
+                ('last_pk', models.TextField(blank=True, null=True)),
+                ('worker', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ('pk',),
+            },
+        ),
+    ]
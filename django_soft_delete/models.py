@@ -1,53 +1,331 @@
-from django.db import models, router
+import json
+import traceback
+from collections import Counter
+from functools import partial
 
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
+from django.db.models.signals import class_prepared
+from django.utils.timezone import now
+
+from . import utils
 from .collector import DeleteCollector, UndeleteCollector
-from .managers import SoftDeletionManager
+from .constraints import AliveUniqueConstraint, make_unique_fields_alive
+from .graveyard import make_graveyard_model
+from .managers import (AllObjectsManager, DeletionJobManager,
+                       SoftDeletionManager)
+from .querysets import SoftDeletionQuerySet
 
 
 class SoftDeletionModel(models.Model):
+    # Set to True on a subclass to turn its unique=True fields into unique
+    # constraints which only apply to alive rows.
+    alive_unique = False
+    # Set to True on a subclass to generate a graveyard table, receiving the
+    # rows soft deleted long ago (see the archive_soft_deleted command).
+    graveyard = False
+
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
     deleted_at = models.DateTimeField(blank=True, null=True)
 
     objects = SoftDeletionManager()
-    all_objects = SoftDeletionManager(alive_only=False)
+    all_objects = AllObjectsManager()
 
     class Meta:
         abstract = True
         default_manager_name = 'objects'
 
-    def delete(self, using=None, keep_parents=False):
+    def _get_collector(self, collector_class, using):
         using = using or router.db_for_write(self.__class__, instance=self)
+        return collector_class(using=using)
+
+    def delete(self, using=None, keep_parents=False):
         assert self.pk is not None, (
                 "%s object can't be deleted because its %s attribute is "
                 "set to None." %
                 (self._meta.object_name, self._meta.pk.attname)
         )
 
-        collector = DeleteCollector(using=using)
+        collector = self._get_collector(DeleteCollector, using)
         collector.collect([self], keep_parents=keep_parents)
         return collector.delete()
 
     delete.alters_data = True
 
+    async def adelete(self, using=None, keep_parents=False):
+        assert self.pk is not None, (
+                "%s object can't be deleted because its %s attribute is "
+                "set to None." %
+                (self._meta.object_name, self._meta.pk.attname)
+        )
+
+        collector = self._get_collector(DeleteCollector, using)
+        await utils.sync_to_async(collector.collect)(
+            [self], keep_parents=keep_parents)
+        return await collector.adelete()
+
+    adelete.alters_data = True
+
     def hard_delete(self):
         super().delete()
 
-    def undelete(self, using=None, keep_parents=False):
-        using = using or router.db_for_write(self.__class__, instance=self)
+    async def ahard_delete(self):
+        await utils.sync_to_async(self.hard_delete)()
 
-        collector = UndeleteCollector(using=using)
-        collector.collect([self], keep_parents=keep_parents)
-        return collector.undelete()
+    ahard_delete.alters_data = True
+
+    def undelete(self, using=None, keep_parents=False):
+        collector = self._get_collector(UndeleteCollector, using)
+        with transaction.atomic(using=collector.using):
+            collector.collect([self], keep_parents=keep_parents)
+            return collector.undelete()
 
     undelete.alters_data = True
 
+    async def aundelete(self, using=None, keep_parents=False):
+        collector = self._get_collector(UndeleteCollector, using)
+        return await collector.aundelete(partial(
+            collector.collect, [self], keep_parents=keep_parents))
+
+    aundelete.alters_data = True
+
+    def _get_unique_checks(self, exclude=None):
+        """
+        Add the AliveUniqueConstraints of the model and its parents to the
+        checks of validate_unique(). They run on the default manager, which
+        only returns alive rows.
+        """
+        if exclude is None:
+            exclude = []
+        unique_checks, date_checks = super()._get_unique_checks(exclude)
+        model_classes = [self.__class__] + self._meta.get_parent_list()
+        for model_class in model_classes:
+            for constraint in model_class._meta.constraints:
+                if (isinstance(constraint, AliveUniqueConstraint) and
+                        constraint.condition ==
+                        AliveUniqueConstraint.default_condition and
+                        not any(name in exclude
+                                for name in constraint.fields)):
+                    unique_checks.append((model_class, constraint.fields))
+        return unique_checks, date_checks
+
     @classmethod
     def has_unique_fields(cls):
         """Checks if one of the fields of this model has a unique constraint
-        set (unique=True)
+        set (unique=True). Fields whose uniqueness only applies to alive rows
+        (alive_unique) can't clash with soft deleted rows and don't count.
         """
         for field in cls._meta.fields:
-            if field.unique:
+            if field.unique and not field.primary_key:
                 return True
         return False
+
+
+def _make_unique_fields_alive(sender, **kwargs):
+    if issubclass(sender, SoftDeletionModel) and sender.alive_unique:
+        make_unique_fields_alive(sender)
+
+
+class_prepared.connect(_make_unique_fields_alive)
+
+
+def _make_graveyard_model(sender, **kwargs):
+    if (issubclass(sender, SoftDeletionModel) and sender.graveyard and
+            'graveyard_model' not in sender.__dict__):
+        make_graveyard_model(sender)
+
+
+class_prepared.connect(_make_graveyard_model)
+
+
+class SoftDeletionBatchModel(SoftDeletionModel):
+    """
+    Soft deletion model which also stamps every delete with a batch id, so
+    that undelete revives exactly the rows removed by the same cascade.
+    """
+    deletion_batch = models.UUIDField(blank=True, null=True, editable=False,
+                                      db_index=True)
+
+    class Meta(SoftDeletionModel.Meta):
+        abstract = True
+
+
+class JobTakenOver(Exception):
+    """
+    The worker running a DeletionJob lost it to a worker which took it over
+    as stale.
+    """
+
+
+class DeletionJob(models.Model):
+    """
+    A delete or undelete of a queryset, run in the background by the
+    run_deletion_jobs command. The database is the queue: workers claim
+    pending jobs with a conditional UPDATE.
+    """
+    DELETE = 'delete'
+    UNDELETE = 'undelete'
+    ACTION_CHOICES = (
+        (DELETE, 'delete'),
+        (UNDELETE, 'undelete'),
+    )
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = (
+        (PENDING, 'pending'),
+        (RUNNING, 'running'),
+        (DONE, 'done'),
+        (FAILED, 'failed'),
+        (CANCELLED, 'cancelled'),
+    )
+
+    model = models.CharField(max_length=255)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # JSON encoded primary keys of the root rows, in primary key order.
+    pk_list = models.TextField()
+    using = models.CharField(max_length=255)
+    chunk_size = models.PositiveIntegerField(default=1000)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES,
+                              default=PENDING, db_index=True)
+    cancel_requested = models.BooleanField(default=False)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    error = models.TextField(blank=True)
+
+    # Progress, updated after every chunk. last_pk is JSON encoded.
+    count = models.PositiveIntegerField(default=0)
+    rows_count = models.TextField(default='{}')
+    last_pk = models.TextField(null=True, blank=True)
+
+    worker = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = DeletionJobManager()
+
+    class Meta:
+        ordering = ('pk',)
+
+    def __str__(self):
+        return '%s %s (%s)' % (self.action, self.model, self.status)
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED, self.CANCELLED)
+
+    def get_queryset(self, pk_list=None):
+        """
+        Return the rows of the job, or those of ``pk_list``. The rows a
+        delete job runs on are the alive ones, so that the rows soft deleted
+        since the job was queued keep their deletion.
+        """
+        qs = SoftDeletionQuerySet(apps.get_model(self.model),
+                                  using=self.using)
+        if self.action == self.DELETE:
+            qs = qs.alive()
+        if pk_list is None:
+            pk_list = json.loads(self.pk_list)
+        return qs.filter(pk__in=pk_list)
+
+    def _owned(self):
+        """
+        Return the job's row if the worker still owns it: a worker taking a
+        stale job over changes its worker.
+        """
+        return self._jobs().filter(pk=self.pk, worker=self.worker,
+                                   status=self.RUNNING)
+
+    def _jobs(self):
+        # The job's row may live in another database than its rows, and
+        # routers may read from a replica: stick to the row's database.
+        return DeletionJob.objects.using(self._state.db)
+
+    def cancel(self):
+        """
+        Ask the worker to stop after its current chunk. A job which isn't
+        running yet is cancelled right away.
+        """
+        self._jobs().filter(pk=self.pk, status=self.PENDING).update(
+            status=self.CANCELLED, cancel_requested=True, finished_at=now())
+        self._jobs().filter(pk=self.pk).exclude(
+            status__in=(self.DONE, self.FAILED, self.CANCELLED)).update(
+            cancel_requested=True)
+        self.refresh_from_db()
+
+    def run(self, should_stop=None):
+        """
+        Run a job claimed by a worker chunk by chunk, saving the progress
+        in the transaction of every chunk, until it is done, cancelled or
+        fails. If ``should_stop()`` returns True after a chunk, the job is
+        put back in the queue. A chunk is rolled back and the run stops if
+        another worker took the job over in the meantime.
+
+        When the job's row and its rows are in different databases, the
+        chunk commits first: if the progress fails to commit, the chunk is
+        run again and finds its rows already (un)deleted.
+        """
+        pk_list = json.loads(self.pk_list)
+        position = 0
+        if self.last_pk:
+            position = pk_list.index(json.loads(self.last_pk)) + 1
+        rows_counter = Counter(json.loads(self.rows_count))
+        try:
+            while True:
+                chunk = pk_list[position:position + self.chunk_size]
+                position += len(chunk)
+                with transaction.atomic(using=self._state.db), \
+                        transaction.atomic(
+                            using=self.using,
+                            savepoint=self.using != self._state.db):
+                    if chunk:
+                        qs = self.get_queryset(chunk)
+                        method = (qs.delete if self.action == self.DELETE
+                                  else qs.undelete)
+                        count, rows_count = method()
+                        rows_counter.update(rows_count)
+                        self.count += count
+                        self.rows_count = json.dumps(rows_counter)
+                        self.last_pk = json.dumps(chunk[-1],
+                                                  cls=DjangoJSONEncoder)
+                    self.heartbeat_at = now()
+                    if position == len(pk_list):
+                        self.status = self.DONE
+                        self.finished_at = self.heartbeat_at
+                    elif self._jobs().filter(
+                            pk=self.pk, cancel_requested=True).exists():
+                        self.status = self.CANCELLED
+                        self.finished_at = self.heartbeat_at
+                    elif should_stop is not None and should_stop():
+                        self.status = self.PENDING
+                    # The chunk only commits if the worker still owns the
+                    # job.
+                    if not self._owned().update(
+                            count=self.count, rows_count=self.rows_count,
+                            last_pk=self.last_pk,
+                            heartbeat_at=self.heartbeat_at,
+                            status=self.status,
+                            finished_at=self.finished_at):
+                        raise JobTakenOver
+                if self.status != self.RUNNING:
+                    return
+        except JobTakenOver:
+            self.refresh_from_db()
+        except Exception:
+            self.attempts += 1
+            self.error = traceback.format_exc()
+            if self.attempts < self.max_attempts:
+                self.status = self.PENDING
+            else:
+                self.status = self.FAILED
+                self.finished_at = now()
+            self._owned().update(attempts=self.attempts, error=self.error,
+                                 status=self.status,
+                                 finished_at=self.finished_at)
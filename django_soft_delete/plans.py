@@ -0,0 +1,190 @@
+from collections import namedtuple
+
+from django.db import connections
+from django.db.models import deletion as django_deletion
+from django.db.models.signals import class_prepared
+
+from .registry import registry
+
+CascadePlan = namedtuple('CascadePlan', [
+    # (related object, on_delete handler) pairs of the relations collect()
+    # follows from the model, without those the action has nothing to do
+    # with.
+    'steps',
+    # Private fields with related objects to collect (generic relations).
+    'private_relations',
+    # Names of the fields loaded by pk only querysets of the model: its
+    # primary key, its parent links, the fields the steps join on and, for
+    # undeletes, the fields matching the rows to revive.
+    'lean_fields',
+    # Relations (with their own sub relations) of a fast cascade from the
+    # model, or None if the rows have to be collected.
+    'fast_relations',
+    # Models of the fast cascade. Their signal listeners are checked when
+    # the plan is used, since they can be connected at any time.
+    'fast_models',
+])
+
+
+class CascadePlanCache:
+    """
+    Cache of the cascade plans of every model, action and database, so that
+    the collectors don't walk the relation graph for every delete.
+
+    Like the registry, the cache is emptied whenever a new model class is
+    prepared.
+    """
+
+    def __init__(self):
+        self._plans = {}
+
+    def clear(self):
+        self._plans.clear()
+
+    def get(self, model, action, using):
+        key = (model, action, using)
+        try:
+            return self._plans[key]
+        except KeyError:
+            plan = compile_plan(model, action, using)
+            if model._meta.apps.models_ready:
+                self._plans[key] = plan
+            return plan
+
+
+plan_cache = CascadePlanCache()
+
+
+def _clear_plans(sender, **kwargs):
+    plan_cache.clear()
+
+
+class_prepared.connect(_clear_plans)
+
+
+def cascade_handlers(action):
+    """
+    Return the on_delete handlers which soft delete (or revive) the related
+    objects as a whole.
+    """
+    from . import deletion
+    from .collector import CollectorAction
+    handlers = {django_deletion.CASCADE, deletion.CASCADE}
+    if action == CollectorAction.DELETE:
+        handlers.add(deletion.CASCADE_NO_REVIVE)
+    else:
+        handlers.add(deletion.LAZY_CASCADE)
+    return handlers
+
+
+def pruned_handlers(action):
+    """
+    Return the on_delete handlers whose relations collect() doesn't follow.
+    """
+    from . import deletion
+    from .collector import CollectorAction
+    pruned = {django_deletion.DO_NOTHING, deletion.DO_NOTHING}
+    if action == CollectorAction.DELETE:
+        # Lazy cascades are left to the sweep.
+        pruned.add(deletion.LAZY_CASCADE)
+    else:
+        # Undeletes ignore field updates: rows which were nulled out or
+        # kept by the delete have nothing to revive.
+        pruned.update((deletion.CASCADE_NO_REVIVE, deletion.SET_NULL,
+                       deletion.SET_DEFAULT, django_deletion.SET_NULL,
+                       django_deletion.SET_DEFAULT))
+    return pruned
+
+
+def can_fast_cascade(field, action, using):
+    """
+    Return True if the rows reached through the foreign key `field` can be
+    handled as a whole by its on_delete handler.
+    """
+    if field.remote_field.on_delete not in cascade_handlers(action):
+        return False
+    # CASCADE nulls out nullable foreign keys to hard deleted models on
+    # databases that can't defer constraint checks.
+    return not (field.null and
+                not connections[using].features.can_defer_constraint_checks
+                and not registry.get(field.remote_field.model).is_soft_delete)
+
+
+def can_fast_model(model, from_field=None):
+    """
+    Return True if nothing but signal listeners keeps the rows of `model`
+    from being handled with a single statement.
+    """
+    return (
+        all(link == from_field
+            for link in registry.get(model).concrete_parents) and
+        not any(hasattr(field, 'bulk_related_objects')
+                for field in model._meta.private_fields)
+    )
+
+
+def compile_plan(model, action, using):
+    from .collector import CollectorAction
+
+    traits = registry.get(model)
+    pruned = pruned_handlers(action)
+    steps = tuple((related, on_delete)
+                  for related, on_delete in traits.cascade_relations
+                  if on_delete not in pruned)
+
+    lean_fields = {model._meta.pk.name}
+    lean_fields.update(ptr.name for ptr in traits.concrete_parents)
+    for related, _ in steps:
+        lean_fields.update(
+            f.name for f in related.field.foreign_related_fields)
+    if action == CollectorAction.UNDELETE:
+        if traits.is_soft_delete:
+            lean_fields.add('deleted_at')
+        if traits.has_deletion_batch:
+            lean_fields.add('deletion_batch')
+
+    fast_models = {model}
+    fast_relations = _fast_relations(model, action, using, (), fast_models)
+    return CascadePlan(
+        steps=steps,
+        private_relations=tuple(
+            field for field in model._meta.private_fields
+            if hasattr(field, 'bulk_related_objects')),
+        lean_fields=frozenset(lean_fields),
+        fast_relations=fast_relations,
+        fast_models=frozenset(fast_models),
+    )
+
+
+def _fast_relations(model, action, using, path, fast_models):
+    """
+    Return the relations (with their own sub relations) through which
+    deleting rows of `model` cascades, if the whole cascade can be run with
+    UPDATE/DELETE statements driven by subqueries, adding the models it
+    goes through to `fast_models`. Return None if some of the rows have to
+    be collected.
+
+    Only deletes cascade this way; revived rows have to be matched with
+    their own parent, so undelete only takes leaf models.
+    """
+    from .collector import CollectorAction
+
+    pruned = pruned_handlers(action)
+    path += (model,)
+    relations = []
+    for related, on_delete in registry.get(model).cascade_relations:
+        if on_delete in pruned:
+            continue
+        related_model = related.related_model
+        if (action != CollectorAction.DELETE or
+                related_model in path or
+                not can_fast_cascade(related.field, action, using) or
+                not can_fast_model(related_model, related.field)):
+            return None
+        fast_models.add(related_model)
+        sub_relations = _fast_relations(related_model, action, using, path,
+                                        fast_models)
+        if sub_relations is None:
+            return None
+        relations.append((related, sub_relations))
+    return tuple(relations)
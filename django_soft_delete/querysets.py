@@ -1,41 +1,234 @@
-from collections import Counter
+import time
+from collections import Counter, namedtuple
+from functools import partial
 
+from django.db import transaction
 from django.db.models.query import QuerySet
 
+from . import utils
+from .collector import CollectorAction, DeleteCollector, UndeleteCollector
+from .estimate import estimate
+from .joins import alive_joins_query
+from .lazy import alive_condition, dead_condition
+
+# Result of a chunked delete() or undelete(). `last_pk` is the primary key
+# of the last root row handled, to pass as `after_pk` to resume the run when
+# `done` is False.
+ChunkedProgress = namedtuple('ChunkedProgress', [
+    'count', 'rows_count', 'last_pk', 'done'])
+
+DEFAULT_CHUNK_SIZE = 1000
+
 
 class SoftDeletionQuerySet(QuerySet):
-    def delete(self):
-        counter = Counter()
+    def _chain_for_collector(self):
+        """
+        Return a copy of this queryset which can be handed to a collector,
+        the same way QuerySet.delete() prepares its query.
+        """
+        query = self._chain()
+        # Make sure that the discovery of related objects is performed on the
+        # same database as the update.
+        query._for_write = True
+        query.query.select_for_update = False
+        query.query.select_related = False
+        query.query.clear_ordering(force_empty=True)
+        return query
+
+    def _collector_query(self, method_name):
         assert self.query.can_filter(), "Cannot use 'limit' or " \
-                                        "'offset' with delete."
-        for o in self:
-            _, dictionary = o.delete()
-            counter += Counter(dictionary)
+                                        "'offset' with %s." % method_name
+        if self._fields is not None:
+            raise TypeError("Cannot call %s() after .values() or "
+                            ".values_list()" % method_name)
+
+        return self._chain_for_collector()
+
+    def _get_collector(self, collector_class, method_name):
+        query = self._collector_query(method_name)
+        # A single collector for the whole queryset, so every model is
+        # handled with one UPDATE per batch inside one transaction.
+        return collector_class(using=query.db), query
+
+    def _run_chunked(self, collector_class, method_name, chunk_size,
+                     time_budget, after_pk):
+        """
+        Run the collector's `method_name` on the rows of this queryset in
+        primary key ordered chunks, each chunk in its own transaction.
+        Stop after the first chunk exceeding `time_budget` seconds since the
+        start, and return a ChunkedProgress.
+        """
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer.")
+        query = self._collector_query(method_name)
+        using = query.db
+        chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        started = time.monotonic()
+        rows_counter = Counter()
+        pk_query = query.order_by('pk').values_list('pk', flat=True)
+
+        while True:
+            if after_pk is not None:
+                pk_list = list(pk_query.filter(pk__gt=after_pk)[:chunk_size])
+            else:
+                pk_list = list(pk_query[:chunk_size])
+            if not pk_list:
+                break
+
+            with transaction.atomic(using=using):
+                collector = collector_class(using=using)
+                collector.collect(query.filter(pk__gte=pk_list[0],
+                                               pk__lte=pk_list[-1]))
+                _, rows_count = getattr(collector, method_name)()
+            rows_counter.update(rows_count)
+            after_pk = pk_list[-1]
+
+            if len(pk_list) < chunk_size:
+                break
+            if (time_budget is not None and
+                    time.monotonic() - started >= time_budget):
+                return ChunkedProgress(sum(rows_counter.values()),
+                                       dict(rows_counter), after_pk, False)
+
         self._result_cache = None
-        return sum(counter.values()), dict(counter)
+        return ChunkedProgress(sum(rows_counter.values()), dict(rows_counter),
+                               after_pk, True)
+
+    def delete(self, chunk_size=None, time_budget=None, after_pk=None):
+        """
+        Soft delete the rows of this queryset and everything they cascade
+        to, in one transaction.
+
+        With `chunk_size` or `time_budget` (in seconds), the root rows are
+        deleted in primary key ordered chunks, with a transaction per chunk,
+        and a ChunkedProgress is returned instead. A run stopped by its
+        time budget is resumed by passing its `last_pk` as `after_pk`.
+        """
+        if chunk_size is not None or time_budget is not None:
+            return self._run_chunked(DeleteCollector, 'delete', chunk_size,
+                                     time_budget, after_pk)
+
+        collector, del_query = self._get_collector(DeleteCollector, 'delete')
+        collector.collect(del_query)
+        deleted, rows_count = collector.delete()
+
+        self._result_cache = None
+        return deleted, rows_count
 
     delete.alters_data = True
 
-    def undelete(self):
-        counter = Counter()
-        assert self.query.can_filter(), "Cannot use 'limit' or " \
-                                        "'offset' with delete."
-        for o in self:
-            _, dictionary = o.undelete()
-            counter += Counter(dictionary)
+    async def adelete(self):
+        collector, del_query = self._get_collector(DeleteCollector, 'delete')
+        await utils.sync_to_async(collector.collect)(del_query)
+        deleted, rows_count = await collector.adelete()
+
+        self._result_cache = None
+        return deleted, rows_count
+
+    adelete.alters_data = True
+
+    def undelete(self, chunk_size=None, time_budget=None, after_pk=None):
+        """
+        Revive the rows of this queryset along with the rows deleted with
+        them. Takes the chunking arguments of delete().
+        """
+        if chunk_size is not None or time_budget is not None:
+            return self._run_chunked(UndeleteCollector, 'undelete',
+                                     chunk_size, time_budget, after_pk)
+
+        collector, query = self._get_collector(UndeleteCollector, 'undelete')
+        with transaction.atomic(using=collector.using):
+            collector.collect(query)
+            revived, rows_count = collector.undelete()
+
         self._result_cache = None
-        return sum(counter.values()), dict(counter)
+        return revived, rows_count
 
     undelete.alters_data = True
 
+    async def aundelete(self):
+        collector, query = self._get_collector(UndeleteCollector, 'undelete')
+        revived, rows_count = await collector.aundelete(
+            partial(collector.collect, query))
+
+        self._result_cache = None
+        return revived, rows_count
+
+    aundelete.alters_data = True
+
+    def delete_async_job(self, **kwargs):
+        """
+        Record a DeletionJob soft deleting the rows of this queryset, to be
+        run in chunks by the run_deletion_jobs command, and return it.
+        The keyword arguments (chunk_size, max_attempts) are job fields.
+        """
+        from .models import DeletionJob
+
+        return DeletionJob.objects.enqueue(self, DeletionJob.DELETE, **kwargs)
+
+    def undelete_async_job(self, **kwargs):
+        """
+        Record a DeletionJob reviving the rows of this queryset, see
+        delete_async_job().
+        """
+        from .models import DeletionJob
+
+        return DeletionJob.objects.enqueue(self, DeletionJob.UNDELETE,
+                                           **kwargs)
+
     def hard_delete(self):
         return super(SoftDeletionQuerySet, self).delete()
 
+    async def ahard_delete(self):
+        return await utils.sync_to_async(self.hard_delete)()
+
+    ahard_delete.alters_data = True
+
+    def delete_plan(self):
+        """
+        Estimate what delete() would do with COUNT queries only, without
+        loading any row, and return a DeletionEstimate.
+        """
+        return estimate(self._collector_query('delete_plan'),
+                        CollectorAction.DELETE)
+
+    def undelete_plan(self):
+        """
+        Estimate what undelete() would do, like delete_plan().
+        """
+        return estimate(self._collector_query('undelete_plan'),
+                        CollectorAction.UNDELETE)
+
+    def with_graveyard(self):
+        """
+        Return the rows of this queryset together with the matching rows
+        of the model's graveyard table, with a UNION ALL. Like any combined
+        queryset, the result can only be ordered and sliced any further.
+        """
+        from .graveyard import graveyard_queryset, has_graveyard
+
+        if not has_graveyard(self.model):
+            return self
+        return self.union(graveyard_queryset(self), all=True)
+
+    def alive_joins(self):
+        """
+        Return a queryset whose joins to soft deletion models only match
+        alive rows, with deleted_at IS NULL in their ON clause: lookups
+        spanning relations and select_related() then skip soft deleted rows
+        without another query.
+        """
+        clone = self._chain()
+        clone.query = alive_joins_query(clone.query)
+        return clone
+
     def alive(self):
-        return self.filter(deleted_at__isnull=True)
+        return self.filter(alive_condition(self.model))
 
     def dead(self):
-        return self.filter(deleted_at__isnull=False)
+        # The complement of alive(): rows hidden by a dead lazy cascade
+        # parent are dead too, even before the sweep soft deletes them.
+        return self.filter(dead_condition(self.model))
 
     def update_or_create(self, defaults=None, **kwargs):
         """
@@ -0,0 +1,94 @@
+from collections import namedtuple
+
+from django.apps import apps
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.db.models.signals import class_prepared
+
+ModelTraits = namedtuple('ModelTraits', [
+    # True if the model has a deleted_at field, local or inherited.
+    'is_soft_delete',
+    # True if deleted_at lives in the model's own table.
+    'has_local_deleted_at',
+    # True if the model has a deletion_batch field.
+    'has_deletion_batch',
+    # Parent link fields of the concrete model (multi-table inheritance).
+    'concrete_parents',
+    # (related object, on_delete handler) pairs of the relations that are
+    # followed when an instance of the model is deleted.
+    'cascade_relations',
+    # Foreign keys to soft deletion models with a LAZY_CASCADE on_delete:
+    # the model's rows are hidden while the row they point to is dead.
+    'lazy_parents',
+])
+
+
+class SoftDeleteRegistry:
+    """
+    Cache of the soft delete traits of every model, so that the deletion hot
+    paths don't have to walk ``_meta`` for each model and queryset.
+
+    The registry is filled when the app registry is ready and is emptied
+    whenever a new model class is prepared, since a new model can add
+    relations to the models that are already known.
+    """
+
+    def __init__(self):
+        self._traits = {}
+
+    def populate(self):
+        for model in apps.get_models(include_auto_created=True):
+            self.get(model)
+
+    def clear(self):
+        self._traits.clear()
+
+    def get(self, model):
+        try:
+            return self._traits[model]
+        except KeyError:
+            traits = self._build(model)
+            # Relations are only complete once every model is loaded.
+            if model._meta.apps.models_ready:
+                self._traits[model] = traits
+            return traits
+
+    @staticmethod
+    def _build(model):
+        from .deletion import LAZY_CASCADE
+
+        opts = model._meta
+        is_soft_delete = _has_deleted_at(model)
+        return ModelTraits(
+            is_soft_delete=is_soft_delete,
+            has_local_deleted_at=any(
+                f.name == 'deleted_at' for f in opts.local_fields),
+            has_deletion_batch=any(
+                f.name == 'deletion_batch' for f in opts.fields),
+            concrete_parents=tuple(
+                ptr for ptr in opts.concrete_model._meta.parents.values()
+                if ptr),
+            cascade_relations=tuple(
+                (related, related.field.remote_field.on_delete)
+                for related in get_candidate_relations_to_delete(opts)),
+            lazy_parents=tuple(
+                field for field in opts.fields
+                if is_soft_delete and getattr(
+                    field.remote_field, 'on_delete', None) is LAZY_CASCADE and
+                # Relations to models which aren't loaded yet are strings.
+                isinstance(field.related_model, type) and
+                _has_deleted_at(field.related_model)),
+        )
+
+
+def _has_deleted_at(model):
+    return any(f.name == 'deleted_at' for f in model._meta.fields)
+
+
+registry = SoftDeleteRegistry()
+
+
+def _clear_registry(sender, **kwargs):
+    registry.clear()
+
+
+class_prepared.connect(_clear_registry)
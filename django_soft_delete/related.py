@@ -0,0 +1,42 @@
+from django.apps import apps
+from django.db.models.fields.related_descriptors import (
+    ReverseOneToOneDescriptor)
+
+from .registry import registry
+
+
+class AliveReverseOneToOneDescriptor(ReverseOneToOneDescriptor):
+    """
+    Reverse one-to-one accessor skipping soft deleted rows, in attribute
+    access and prefetch_related() alike. Django reads reverse one-to-one
+    relations through the base manager, which returns every row.
+
+    Pass a Prefetch with an all_objects queryset to include soft deleted
+    rows in a prefetch.
+    """
+
+    def get_queryset(self, **hints):
+        return super().get_queryset(**hints).filter(deleted_at__isnull=True)
+
+
+def install_related_descriptors():
+    """
+    Replace the reverse one-to-one accessors pointing to soft deletion
+    models. Reverse foreign key and many-to-many managers already go
+    through the default manager, which only returns alive rows.
+    """
+    for model in apps.get_models():
+        if not registry.get(model).is_soft_delete:
+            continue
+        for field in model._meta.local_fields:
+            if not field.one_to_one or field.remote_field.parent_link:
+                continue
+            related = field.remote_field
+            if related.is_hidden():
+                continue
+            remote_model = related.model._meta.concrete_model
+            accessor_name = related.get_accessor_name()
+            if type(remote_model.__dict__.get(accessor_name)) is \
+                    ReverseOneToOneDescriptor:
+                setattr(remote_model, accessor_name,
+                        AliveReverseOneToOneDescriptor(related))
@@ -0,0 +1,62 @@
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.deletion import Collector
+
+from .collector import SoftDeleteCollector
+from .graveyard import (graveyard_queryset, has_graveyard,
+                        restore_from_graveyard)
+from .registry import registry
+from .utils import get_soft_delete_models
+
+
+def restore_order(models, using=DEFAULT_DB_ALIAS):
+    """
+    Return ``models`` in the order they are revived: referenced models
+    before the models pointing to them, which is the reverse of the order
+    Collector.sort() deletes them in.
+    """
+    collector = Collector(using=using)
+    for model in models:
+        collector.data[model] = set()
+    for model in models:
+        for related, _ in registry.get(model).cascade_relations:
+            related_model = related.related_model
+            # Like Collector.add(), nullable relations don't constrain the
+            # order.
+            if related_model in collector.data and not related.field.null:
+                collector.dependencies.setdefault(
+                    model._meta.concrete_model, set()).add(
+                    related_model._meta.concrete_model)
+    collector.sort()
+    return list(reversed(list(collector.data)))
+
+
+def restore_since(since, labels=None, using=DEFAULT_DB_ALIAS, dry_run=False):
+    """
+    Revive every row soft deleted at or after ``since``, optionally limited
+    to ``labels`` ("app_label" or "app_label.ModelName"), with one UPDATE
+    per model. Nothing is collected, so no signals are sent. Archived rows
+    are moved back from the model's graveyard first.
+
+    Return the number of revived rows and a dict of counts per model label.
+    With ``dry_run``, only count the rows.
+    """
+    revive_counter = Counter()
+    models = restore_order(get_soft_delete_models(labels), using)
+    with transaction.atomic(using=using):
+        for model in models:
+            qs = model._base_manager.using(using).filter(
+                deleted_at__gte=since)
+            if dry_run:
+                count = qs.count()
+                if has_graveyard(model):
+                    count += graveyard_queryset(qs).count()
+            else:
+                if has_graveyard(model):
+                    restore_from_graveyard(model, qs, using)
+                count = qs.update(**SoftDeleteCollector._deletion_values(
+                    model, None, None))
+            if count:
+                revive_counter[model._meta.label] += count
+    return sum(revive_counter.values()), dict(revive_counter)
@@ -0,0 +1,9 @@
+from django.dispatch import Signal
+
+# Sent once per model by the collectors, instead of once per instance.
+# Arguments: sender (the model), pk_list, deleted_at, using.
+pre_soft_delete_batch = Signal()
+post_soft_delete_batch = Signal()
+
+# Arguments: sender (the model), pk_list, using.
+post_undelete_batch = Signal()
@@ -1,6 +1,49 @@
+from django.apps import apps
+
+from .registry import registry
+
+
 def check_local_deleted_at(model):
-    return any([f.name == "deleted_at" for f in model._meta.local_fields])
+    return registry.get(model).has_local_deleted_at
 
 
 def is_soft_delete_model(model):
-    return any([f.name == "deleted_at" for f in model._meta.fields])
+    return registry.get(model).is_soft_delete
+
+
+def has_deletion_batch(model):
+    return registry.get(model).has_deletion_batch
+
+
+def get_soft_delete_models(labels=None):
+    """
+    Return the models owning a deleted_at column, optionally limited to
+    ``labels`` given as "app_label" or "app_label.ModelName". Graveyard
+    models are left out, their rows are handled with their model's.
+
+    Raise LookupError for unknown labels.
+    """
+    if labels:
+        models = []
+        for label in labels:
+            if '.' in label:
+                models.append(apps.get_model(label))
+            else:
+                models.extend(apps.get_app_config(label).get_models())
+    else:
+        models = apps.get_models()
+    return [model for model in models
+            if not model._meta.proxy and model._meta.managed and
+            not getattr(model, 'is_graveyard', False) and
+            check_local_deleted_at(model)]
+
+
+def sync_to_async(func):
+    """
+    Wrap ``func`` with asgiref's sync_to_async, thread-sensitive: every call
+    runs in the same thread, hence on the same database connection and
+    transaction. asgiref only made that the default in 3.3.
+    """
+    from asgiref.sync import sync_to_async
+
+    return sync_to_async(func, thread_sensitive=True)
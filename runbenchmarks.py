@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+import argparse
+import json
+import os
+import sys
+
+import django
+
+
+def runbenchmarks():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import (setup_test_environment,
+                                   teardown_test_environment)
+
+    from tests.benchmarks import CASES, DEFAULT_SIZES, GRAPHS, run_benchmarks
+
+    parser = argparse.ArgumentParser(
+        description='Benchmark soft deletion hot paths.')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=list(DEFAULT_SIZES))
+    parser.add_argument('--graphs', nargs='+', choices=list(GRAPHS))
+    parser.add_argument('--cases', nargs='+', choices=list(CASES))
+    parser.add_argument('--no-memory', action='store_false',
+                        dest='trace_memory',
+                        help='Skip the tracemalloc run of every case.')
+    parser.add_argument('--output', default='benchmarks.json',
+                        help='File receiving the results as JSON.')
+    args = parser.parse_args()
+
+    def report(result):
+        sys.stdout.write(json.dumps(result) + '\n')
+        sys.stdout.flush()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        results = run_benchmarks(args.sizes, args.graphs, args.cases,
+                                 args.trace_memory, report)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    with open(args.output, 'w') as fp:
+        json.dump({'django': django.get_version(),
+                   'vendor': connection.vendor,
+                   'results': results}, fp, indent=2)
+
+
+if __name__ == '__main__':
+    runbenchmarks()
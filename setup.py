@@ -1,9 +1,9 @@
-from setuptools import setup
+from setuptools import find_packages, setup
 
 setup(
     name='soft-django-delete',
     version='0.0.1',
-    packages=['django_soft_delete'],
+    packages=find_packages(exclude=['tests', 'tests.*']),
     url='https://github.com/yucealiosman/soft-delete/',
     license='MIT',
     description='Django Soft Deletion Package',
@@ -12,6 +12,7 @@ setup(
                      'delete your objects, without having them deleted'
                      ' from your database.',
     install_requires=['django>=2.0.4'],
+    extras_require={'async': ['asgiref>=3.2']},
     author='Ali Osman Yuce',
     author_email='aliosmanyuce@gmail.com',
     classifiers=(
@@ -151,6 +151,13 @@ class CompanyFactory(factory.django.DjangoModelFactory):
         ProducerFactory, 'company')
 
 
+class SponsorFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Sponsor
+
+    name = factory.Sequence(lambda n: f'sponsor_name__{n}')
+
+
 class CityFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = City
@@ -187,3 +194,87 @@ class AuthorFactory(factory.django.DjangoModelFactory):
     name = factory.Sequence(lambda n: f'author__{n}')
     books = factory.RelatedFactory(BookFactory, 'author')
     poems = factory.RelatedFactory(PoemFactory, 'author')
+
+
+class ShelfFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Shelf
+
+    name = factory.Sequence(lambda n: f'shelf__{n}')
+
+
+class VolumeFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Volume
+
+    name = factory.Sequence(lambda n: f'volume__{n}')
+    shelf = factory.SubFactory(ShelfFactory)
+
+
+class LyricFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Lyric
+
+
+class TrackFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Track
+
+    name = factory.Sequence(lambda n: f'track__{n}')
+    lyrics = factory.RelatedFactory(LyricFactory, 'track')
+
+
+class ReviewFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Review
+
+    name = factory.Sequence(lambda n: f'review__{n}')
+
+
+class AlbumFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Album
+
+    name = factory.Sequence(lambda n: f'album__{n}')
+    tracks = factory.RelatedFactory(TrackFactory, 'album')
+    reviews = factory.RelatedFactory(ReviewFactory, 'album')
+
+
+class InvoiceLineFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = InvoiceLine
+
+
+class InvoiceFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Invoice
+
+    number = factory.Sequence(lambda n: f'invoice__{n}')
+    lines = factory.RelatedFactory(InvoiceLineFactory, 'invoice')
+
+
+class TaskFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Task
+
+
+class MilestoneFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Milestone
+
+
+class ProjectFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Project
+
+    name = factory.Sequence(lambda n: f'project__{n}')
+    tasks = factory.RelatedFactory(TaskFactory, 'project')
+    milestones = factory.RelatedFactory(MilestoneFactory, 'project')
+
+
+class TenantFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Tenant
+
+    name = factory.Sequence(lambda n: f'tenant__{n}')
+    projects = factory.RelatedFactory(ProjectFactory, 'tenant')
@@ -2,7 +2,10 @@ from django.db import models
 from django.utils.translation import gettext as _
 
 from django_soft_delete import deletion
-from django_soft_delete.models import SoftDeletionModel
+from django_soft_delete.indexes import (AliveIndex, DeadIndex,
+                                        soft_delete_indexes)
+from django_soft_delete.models import (SoftDeletionBatchModel,
+                                       SoftDeletionModel)
 
 DEFAULT_EMPLOYEE_PK = 1
 DEFAULT_CITY_PK = 1
@@ -12,6 +15,13 @@ class Nationality(SoftDeletionModel):
     name = models.CharField(max_length=255, null=True, blank=True)
 
 
+class Department(SoftDeletionModel):
+    alive_unique = True
+
+    code = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=255, null=True, blank=True)
+
+
 class User(models.Model):
     username = models.CharField(max_length=255, null=True, blank=True,
                                 unique=True)
@@ -32,6 +42,7 @@ class Employee(SoftDeletionModel):
     class Meta:
         verbose_name = _("Employee")
         verbose_name_plural = _("Employees")
+        indexes = soft_delete_indexes('last_name', 'first_name')
 
 
 class EmployeeNationality(SoftDeletionModel):
@@ -142,9 +153,19 @@ class Company(SoftDeletionModel):
                              related_name="companies")
 
 
+class Sponsor(SoftDeletionModel):
+    name = models.TextField(null=True, blank=True, max_length=100)
+    company = models.ForeignKey(Company, null=True, blank=True,
+                                on_delete=deletion.PROTECT,
+                                related_name="sponsors")
+
+
 class Author(SoftDeletionModel):
     name = models.CharField(max_length=255, null=True, blank=True)
 
+    class Meta:
+        indexes = [AliveIndex(fields=['name']), DeadIndex(fields=['name'])]
+
 
 class Book(SoftDeletionModel):
     name = models.CharField(max_length=255, null=True, blank=True)
@@ -164,3 +185,74 @@ class Chapter(SoftDeletionModel):
     book = models.ForeignKey(Book, null=True, blank=True,
                              on_delete=deletion.CASCADE,
                              related_name="chapters")
+
+
+class Shelf(SoftDeletionModel):
+    name = models.CharField(max_length=255, null=True, blank=True)
+
+
+class Item(SoftDeletionModel):
+    name = models.CharField(max_length=255, null=True, blank=True)
+
+
+class Volume(Item):
+    shelf = models.ForeignKey(Shelf, on_delete=deletion.CASCADE,
+                              related_name='volumes')
+
+
+class Album(SoftDeletionBatchModel):
+    name = models.CharField(max_length=255, null=True, blank=True)
+
+
+class Track(SoftDeletionBatchModel):
+    name = models.CharField(max_length=255, null=True, blank=True)
+    album = models.ForeignKey(Album, null=True, blank=True,
+                              on_delete=deletion.CASCADE,
+                              related_name="tracks")
+
+
+class Review(SoftDeletionBatchModel):
+    name = models.CharField(max_length=255, null=True, blank=True)
+    album = models.ForeignKey(Album, null=True, blank=True,
+                              on_delete=deletion.CASCADE,
+                              related_name="reviews")
+
+
+class Lyric(SoftDeletionBatchModel):
+    track = models.ForeignKey(Track, null=True, blank=True,
+                              on_delete=deletion.CASCADE,
+                              related_name="lyrics")
+
+
+class Invoice(SoftDeletionBatchModel):
+    graveyard = True
+
+    number = models.CharField(max_length=20, unique=True)
+
+
+class InvoiceLine(SoftDeletionBatchModel):
+    graveyard = True
+
+    invoice = models.ForeignKey(Invoice, on_delete=deletion.CASCADE,
+                                related_name='lines')
+    amount = models.IntegerField(default=0)
+
+
+class Tenant(SoftDeletionBatchModel):
+    name = models.CharField(max_length=255, null=True, blank=True)
+
+
+class Project(SoftDeletionBatchModel):
+    tenant = models.ForeignKey(Tenant, on_delete=deletion.LAZY_CASCADE,
+                               related_name='projects')
+    name = models.CharField(max_length=255, null=True, blank=True)
+
+
+class Task(SoftDeletionBatchModel):
+    project = models.ForeignKey(Project, on_delete=deletion.LAZY_CASCADE,
+                                related_name='tasks')
+
+
+class Milestone(SoftDeletionBatchModel):
+    project = models.ForeignKey(Project, on_delete=deletion.CASCADE,
+                                related_name='milestones')
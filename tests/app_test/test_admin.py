@@ -0,0 +1,272 @@
+import json
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth.models import AnonymousUser, User as AuthUser
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import path
+
+from django_soft_delete.admin import SoftDeleteAdmin
+from django_soft_delete.admin_utils import PLAN_SESSION_KEY
+from django_soft_delete.collector import NestedDeleteCollector
+
+from .factories import *
+
+site = admin.AdminSite(name='admin')
+site.register(Producer, SoftDeleteAdmin)
+site.register(Author, SoftDeleteAdmin)
+
+urlpatterns = [path('admin/', site.urls)]
+
+
+class SoftDeleteAdminTest(TestCase):
+
+    def setUp(self):
+        self.model_admin = SoftDeleteAdmin(Author, admin.site)
+        self.session = {}
+        self.authors = AuthorFactory.create_batch(size=2)
+
+    def request(self, method, data=None, user=None):
+        request = getattr(RequestFactory(), method)('/', data or {})
+        request.user = user or AuthUser(username='admin', is_staff=True,
+                                        is_superuser=True, is_active=True)
+        request.session = self.session
+        return request
+
+    def confirm(self, objs):
+        return self.model_admin.get_deleted_objects(objs, self.request('get'))
+
+    def post(self, objs, **kwargs):
+        request = self.request('post', {'post': 'yes'}, **kwargs)
+        return request, self.model_admin.get_deleted_objects(objs, request)
+
+    def test_confirmation_stores_plan(self):
+        author = self.authors[0]
+        to_delete, model_count, _, _ = self.confirm([author])
+        self.assertEqual(len(to_delete), 2)
+        self.assertEqual(model_count['books'], 1)
+        plan = self.session[PLAN_SESSION_KEY]
+        self.assertEqual(plan['model'], 'app_test.Author')
+        self.assertEqual(plan['rows']['app_test.Author'],
+                         {'ranges': [[author.pk, author.pk]]})
+        book = author.books.get()
+        self.assertEqual(plan['rows']['app_test.Book'],
+                         {'ranges': [[book.pk, book.pk]]})
+        self.assertEqual(json.loads(json.dumps(plan)), plan)
+
+        self.confirm([self.authors[1]])
+        self.assertEqual(list(self.session), [PLAN_SESSION_KEY])
+        self.assertEqual(
+            self.session[PLAN_SESSION_KEY]['rows']['app_test.Author'],
+            {'ranges': [[self.authors[1].pk, self.authors[1].pk]]})
+
+    def test_delete_model_reuses_plan(self):
+        author = self.authors[0]
+        self.confirm([author])
+
+        with mock.patch.object(NestedDeleteCollector, 'nested',
+                               side_effect=AssertionError):
+            request, deleted_objects = self.post([author])
+        to_delete, _, perms_needed, protected = deleted_objects
+        self.assertEqual((to_delete, perms_needed, protected),
+                         ([], set(), []))
+        self.assertIsNotNone(request.soft_delete_collector)
+        self.assertEqual(self.session, {})
+
+        self.model_admin.delete_model(request, author)
+        self.assertFalse(Author.objects.filter(pk=author.pk).exists())
+        self.assertFalse(Chapter.objects.filter(
+            book__author=author).exists())
+        self.assertTrue(Author.objects.filter(
+            pk=self.authors[1].pk).exists())
+
+    def test_delete_queryset_reuses_plan(self):
+        self.confirm(Author.objects.all())
+
+        with mock.patch.object(NestedDeleteCollector, 'nested',
+                               side_effect=AssertionError):
+            request, _ = self.post(Author.objects.all())
+        self.assertIsNotNone(request.soft_delete_collector)
+
+        self.model_admin.delete_queryset(request, Author.objects.all())
+        self.assertFalse(Author.objects.exists())
+        self.assertFalse(Book.objects.exists())
+
+    def test_changed_rows_collect_again(self):
+        author = self.authors[0]
+        self.confirm([author])
+        BookFactory(author=author)
+
+        request, (to_delete, model_count, _, _) = self.post([author])
+        self.assertEqual(model_count['books'], 2)
+        self.assertFalse(hasattr(request, 'soft_delete_collector'))
+
+        self.model_admin.delete_model(request, author)
+        self.assertFalse(Book.objects.filter(author=author).exists())
+
+    def test_deleted_rows_collect_again(self):
+        author = self.authors[0]
+        self.confirm([author])
+        Chapter.objects.filter(book__author=author).first().delete()
+
+        request, _ = self.post([author])
+        self.assertFalse(hasattr(request, 'soft_delete_collector'))
+
+    def test_reassigned_rows_collect_again(self):
+        # Same counts, other rows.
+        first, second = self.authors
+        self.confirm([first])
+        first_book, second_book = first.books.get(), second.books.get()
+        Book.objects.filter(pk=first_book.pk).update(author=second)
+        Book.objects.filter(pk=second_book.pk).update(author=first)
+
+        request, (_, model_count, _, _) = self.post([first])
+        self.assertEqual(model_count['books'], 1)
+        self.assertFalse(hasattr(request, 'soft_delete_collector'))
+
+    def test_plan_of_other_objects(self):
+        self.confirm([self.authors[0]])
+
+        request, _ = self.post([self.authors[1]])
+        self.assertFalse(hasattr(request, 'soft_delete_collector'))
+        self.assertEqual(self.session, {})
+
+    @override_settings(ROOT_URLCONF='tests.app_test.test_admin')
+    def test_permissions_are_checked_on_post(self):
+        self.model_admin.admin_site = site
+        self.confirm([self.authors[0]])
+
+        request, (_, _, perms_needed, _) = self.post(
+            [self.authors[0]], user=AnonymousUser())
+        self.assertEqual(perms_needed, {'author'})
+        self.assertFalse(hasattr(request, 'soft_delete_collector'))
+
+    def test_delete_selected_runs_in_a_transaction(self):
+        request = self.request('get')
+        func, name, _ = self.model_admin.get_actions(
+            request)['delete_selected']
+        with mock.patch('django_soft_delete.admin.transaction.atomic') as \
+                atomic:
+            atomic.return_value.__enter__.side_effect = RuntimeError
+            with self.assertRaises(RuntimeError):
+                func(self.model_admin, request, Author.objects.all())
+        atomic.assert_called_once_with(using='default')
+
+
+class TruncatedConfirmationTest(TestCase):
+
+    def setUp(self):
+        self.model_admin = SoftDeleteAdmin(Company, admin.site)
+        self.model_admin.delete_confirmation_max_objects = 2
+        self.request = RequestFactory().get('/')
+        self.request.user = AuthUser(username='admin', is_staff=True,
+                                     is_superuser=True, is_active=True)
+        self.request.session = {}
+        self.company = CompanyFactory(producers=None)
+        ProducerFactory.create_batch(size=5, company=self.company,
+                                     products=None)
+
+    def test_counts_and_truncates(self):
+        to_delete, model_count, perms_needed, protected = \
+            self.model_admin.get_deleted_objects([self.company],
+                                                 self.request)
+        self.assertEqual(model_count, {'companys': 1, 'producers': 5})
+        self.assertEqual(to_delete[0], 'Companys: 1')
+        self.assertEqual(to_delete[1], ['Company: Company object (%d)'
+                                        % self.company.pk])
+        self.assertEqual(to_delete[2], 'Producers: 5')
+        self.assertEqual(len(to_delete[3]), 3)
+        self.assertEqual(to_delete[3][-1], 'and 3 more')
+        self.assertEqual((perms_needed, protected), (set(), []))
+
+    def test_delete_reuses_plan(self):
+        self.model_admin.get_deleted_objects([self.company], self.request)
+
+        request = RequestFactory().post('/', {'post': 'yes'})
+        request.user = self.request.user
+        request.session = self.request.session
+        with mock.patch('django_soft_delete.admin_utils.'
+                        'truncated_deleted_objects',
+                        side_effect=AssertionError):
+            self.model_admin.get_deleted_objects([self.company], request)
+        self.model_admin.delete_model(request, self.company)
+        self.assertFalse(Company.objects.exists())
+        self.assertFalse(Producer.objects.exists())
+
+    def test_new_related_rows_collect_again(self):
+        self.model_admin.get_deleted_objects([self.company], self.request)
+        ProducerFactory(company=self.company, products=None)
+
+        request = RequestFactory().post('/', {'post': 'yes'})
+        request.user = self.request.user
+        request.session = self.request.session
+        _, model_count, _, _ = self.model_admin.get_deleted_objects(
+            [self.company], request)
+        self.assertEqual(model_count['producers'], 6)
+        self.assertFalse(hasattr(request, 'soft_delete_collector'))
+
+    def test_fast_deletes_reuse_plan(self):
+        self.model_admin = SoftDeleteAdmin(Album, admin.site)
+        self.model_admin.delete_confirmation_max_objects = 2
+        albums = AlbumFactory.create_batch(size=2)
+        self.model_admin.get_deleted_objects(Album.objects.all(),
+                                             self.request)
+        plan = self.request.session[PLAN_SESSION_KEY]
+        TrackFactory(album=albums[0])
+
+        request = RequestFactory().post('/', {'post': 'yes'})
+        request.user = self.request.user
+        request.session = self.request.session
+        self.model_admin.get_deleted_objects(Album.objects.all(), request)
+        self.assertFalse(hasattr(request, 'soft_delete_collector'))
+
+        request.session[PLAN_SESSION_KEY] = plan
+        Track.objects.order_by('-pk').first().delete()
+        with mock.patch('django_soft_delete.admin_utils.'
+                        'truncated_deleted_objects',
+                        side_effect=AssertionError):
+            self.model_admin.get_deleted_objects(Album.objects.all(),
+                                                 request)
+        self.model_admin.delete_queryset(request, Album.objects.all())
+        self.assertFalse(Album.objects.exists())
+        self.assertFalse(Lyric.objects.exists())
+
+    def test_protected(self):
+        ProductFactory(producer=self.company.producers.first())
+        _, _, _, protected = self.model_admin.get_deleted_objects(
+            [self.company], self.request)
+        self.assertEqual(len(protected), 1)
+
+    def test_protected_by_every_relation(self):
+        for producer in self.company.producers.all():
+            ProductFactory(producer=producer)
+        SponsorFactory(company=self.company)
+        _, model_count, _, protected = self.model_admin.get_deleted_objects(
+            [self.company], self.request)
+        self.assertEqual(model_count, {})
+        self.assertEqual(len(protected), 3)
+        self.assertEqual(protected[:2], [
+            'Product: Product object (%d)' % product.pk
+            for product in Product.objects.order_by('pk')[:2]])
+        self.assertEqual(protected[2], 'and 4 more')
+
+    def test_max_objects_below_one(self):
+        self.model_admin.delete_confirmation_max_objects = 0
+        with self.assertRaises(ValueError):
+            self.model_admin.get_deleted_objects([self.company],
+                                                 self.request)
+
+    @override_settings(ROOT_URLCONF='tests.app_test.test_admin')
+    def test_links_registered_models(self):
+        self.model_admin.admin_site = site
+        to_delete, _, _, _ = self.model_admin.get_deleted_objects(
+            [self.company], self.request)
+        producer = Producer.objects.order_by('pk').first()
+        self.assertIn('/admin/app_test/producer/%d/change/' % producer.pk,
+                      to_delete[3][0])
+
+        self.model_admin.delete_confirmation_max_objects = None
+        to_delete, _, _, _ = self.model_admin.get_deleted_objects(
+            [self.company], self.request)
+        self.assertEqual(len(to_delete[1]), 5)
+        self.assertIn('/admin/app_test/producer/', str(to_delete[1]))
@@ -0,0 +1,84 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.utils import CursorWrapper
+from django.test import TestCase
+
+from .factories import *
+from .models import DEFAULT_EMPLOYEE_PK
+
+
+class AsyncDeletionTest(TestCase):
+
+    def setUp(self):
+        self.default_employee = EmployeeFactory(pk=DEFAULT_EMPLOYEE_PK)
+        self.employee = EmployeeFactory()
+        self.emp_pk = self.employee.pk
+
+    def test_adelete_instance(self):
+        count, _ = async_to_sync(self.employee.adelete)()
+        self.assertEqual(count, 6)
+        self.assertIsNotNone(self.employee.deleted_at)
+        self.assertFalse(Employee.objects.filter(pk=self.emp_pk).exists())
+        self.assertFalse(
+            HealthStatus.objects.filter(employee=self.emp_pk).exists())
+        self.assertEqual(FamilyMember.objects.filter(
+            employee=DEFAULT_EMPLOYEE_PK).count(), 2)
+
+    def test_aundelete_instance(self):
+        self.employee.delete()
+        count, _ = async_to_sync(self.employee.aundelete)()
+        self.assertEqual(count, 3)
+        self.assertTrue(Employee.objects.filter(pk=self.emp_pk).exists())
+        self.assertTrue(
+            Checkup.objects.filter(health_status__employee=self.emp_pk)
+            .exists())
+
+    def test_adelete_and_aundelete_queryset(self):
+        qs = Employee.objects.exclude(pk=DEFAULT_EMPLOYEE_PK)
+        self.assertEqual(async_to_sync(qs.adelete)(),
+                         (6, {'app_test.Employee': 1,
+                              'app_test.HealthStatus': 1,
+                              'app_test.Checkup': 1,
+                              'app_test.EmployeeProfile': 1,
+                              'app_test.EmployeeHobby': 1,
+                              'app_test.HobbyLocation': 1}))
+        qs = Employee.all_objects.filter(pk=self.emp_pk)
+        count, _ = async_to_sync(qs.aundelete)()
+        self.assertEqual(count, 3)
+        self.assertTrue(Employee.objects.filter(pk=self.emp_pk).exists())
+
+    def test_ahard_delete(self):
+        # DO_NOTHING relation
+        JobExperience.all_objects.hard_delete()
+        async_to_sync(self.employee.ahard_delete)()
+        self.assertFalse(Employee.all_objects.filter(pk=self.emp_pk).exists())
+        AuthorFactory.create_batch(size=2)
+        async_to_sync(Author.all_objects.ahard_delete)()
+        self.assertFalse(Author.all_objects.exists())
+        self.assertFalse(Chapter.all_objects.exists())
+
+    def test_adelete_rolls_back_on_error(self):
+        city = CityFactory()
+        company = city.companies.first()
+        with self.assertRaises(Exception):
+            async_to_sync(Company.objects.filter(pk=company.pk).adelete)()
+        self.assertTrue(Company.objects.filter(pk=company.pk).exists())
+
+    def test_steps_share_one_connection(self):
+        used = []
+        execute = CursorWrapper.execute
+
+        def record(cursor, sql, params=None):
+            used.append(cursor.db)
+            return execute(cursor, sql, params)
+
+        qs = Employee.objects.exclude(pk=DEFAULT_EMPLOYEE_PK)
+        with mock.patch.object(CursorWrapper, 'execute', record):
+            async_to_sync(qs.adelete)()
+            async_to_sync(Employee.all_objects.filter(
+                pk=self.emp_pk).aundelete)()
+        self.assertTrue(used)
+        self.assertEqual({id(db) for db in used},
+                         {id(connections[DEFAULT_DB_ALIAS])})
@@ -0,0 +1,21 @@
+from django.test import TestCase
+
+from tests.benchmarks import CASES, GRAPHS, run_benchmarks
+
+from .models import Author
+
+
+class BenchmarkSmokeTest(TestCase):
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(sizes=(20,))
+        self.assertEqual(len(results), len(GRAPHS) * len(CASES))
+        for result in results:
+            self.assertGreater(result['queries'], 0)
+            self.assertGreaterEqual(result['seconds'], 0)
+            self.assertGreater(result['peak_memory'], 0)
+
+    def test_runs_are_rolled_back(self):
+        run_benchmarks(sizes=(20,), graphs=['deep'],
+                       cases=['delete_queryset'], trace_memory=False)
+        self.assertFalse(Author.all_objects.exists())
@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from django_soft_delete.querysets import ChunkedProgress
+
+from .factories import *
+
+
+class ChunkedDeleteTest(TestCase):
+
+    def setUp(self):
+        self.authors = AuthorFactory.create_batch(size=5)
+        self.pk_list = sorted(author.pk for author in self.authors)
+
+    def test_delete_in_chunks(self):
+        # Per chunk: the primary keys of the chunk, a savepoint, the primary
+        # keys of its rows and one UPDATE per model.
+        with self.assertNumQueries(3 * 8):
+            progress = Author.objects.all().delete(chunk_size=2)
+        self.assertEqual(progress, ChunkedProgress(
+            20, {'app_test.Author': 5, 'app_test.Book': 5,
+                 'app_test.Poem': 5, 'app_test.Chapter': 5},
+            self.pk_list[-1], True))
+        self.assertFalse(Author.objects.exists())
+        self.assertFalse(Chapter.objects.exists())
+
+    def test_chunks_get_their_own_batch(self):
+        AlbumFactory.create_batch(size=5)
+        Album.objects.all().delete(chunk_size=2)
+        batches = Album.all_objects.order_by('pk').values_list(
+            'deletion_batch', flat=True)
+        self.assertEqual(len(set(batches)), 3)
+
+    def test_time_budget_and_resume(self):
+        earlier = AuthorFactory()
+        earlier.delete()
+        earlier = Author.all_objects.get(pk=earlier.pk)
+        with mock.patch('django_soft_delete.querysets.time.monotonic',
+                        side_effect=[0, 0, 10, 20]):
+            progress = Author.objects.all().delete(chunk_size=2,
+                                                   time_budget=5)
+        self.assertFalse(progress.done)
+        self.assertEqual(progress.last_pk, self.pk_list[3])
+        self.assertEqual(progress.rows_count['app_test.Author'], 4)
+        self.assertEqual(Author.objects.count(), 1)
+        stamps = dict(Author.all_objects.values_list('pk', 'deleted_at'))
+
+        progress = Author.objects.all().delete(
+            chunk_size=2, after_pk=progress.last_pk)
+        self.assertTrue(progress.done)
+        self.assertEqual(progress.count, 4)
+        self.assertFalse(Author.objects.exists())
+        # Rows before after_pk were left alone, and so were the rows soft
+        # deleted earlier.
+        for pk in self.pk_list[:4] + [earlier.pk]:
+            self.assertEqual(Author.all_objects.get(pk=pk).deleted_at,
+                             stamps[pk])
+
+    def test_undelete_in_chunks(self):
+        for author in self.authors:
+            author.delete()
+        progress = Author.all_objects.all().undelete(chunk_size=3)
+        self.assertEqual(progress.count, 20)
+        self.assertTrue(progress.done)
+        self.assertEqual(Chapter.objects.count(), 5)
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            Author.objects.all().delete(chunk_size=0)
@@ -0,0 +1,120 @@
+from array import array
+
+from django.db import connection
+from django.db.models import signals
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from django_soft_delete.collector import DeleteCollector, UndeleteCollector
+from django_soft_delete.signals import post_soft_delete_batch
+
+from .factories import *
+
+
+class PkOnlyCollectorTest(TestCase):
+
+    def setUp(self):
+        self.author = AuthorFactory()
+        BookFactory.create_batch(size=3, author=self.author)
+        # Chapters have to be collected, so books can't be fast deleted.
+        post_soft_delete_batch.connect(self.receiver, sender=Chapter)
+        self.addCleanup(post_soft_delete_batch.disconnect, self.receiver,
+                        sender=Chapter)
+
+    def receiver(self, **kwargs):
+        pass
+
+    def book_selects(self, queries):
+        return [q['sql'] for q in queries
+                if q['sql'].startswith('SELECT') and
+                'FROM "app_test_book"' in q['sql']]
+
+    def test_cascade_keeps_primary_keys(self):
+        collector = DeleteCollector(using='default')
+        with CaptureQueriesContext(connection) as queries:
+            collector.collect([self.author])
+        select, = self.book_selects(queries)
+        self.assertNotIn('"app_test_book"."name"', select)
+
+        self.assertIn(Book, collector.pk_models)
+        self.assertNotIn(Author, collector.pk_models)
+        self.assertEqual(collector.data[Book],
+                         set(Book.objects.values_list('pk', flat=True)))
+
+        count, counter = collector.delete()
+        self.assertIsInstance(collector.data[Book], array)
+        self.assertEqual(counter['app_test.Book'], 4)
+        self.assertIsNotNone(self.author.deleted_at)
+        self.assertFalse(Book.objects.exists())
+
+    def test_undelete_fetches_matching_columns(self):
+        self.author.delete()
+        collector = UndeleteCollector(using='default')
+        with CaptureQueriesContext(connection) as queries:
+            collector.collect([self.author])
+        select, = self.book_selects(queries)
+        self.assertIn('"app_test_book"."deleted_at"', select)
+        self.assertNotIn('"app_test_book"."name"', select)
+        collector.undelete()
+        self.assertEqual(Book.objects.count(), 4)
+        self.assertEqual(Chapter.objects.count(), 4)
+
+    def test_instance_listeners_get_instances(self):
+        names = []
+
+        def receiver(sender, instance, **kwargs):
+            names.append(instance.name)
+
+        signals.pre_delete.connect(receiver, sender=Book)
+        self.addCleanup(signals.pre_delete.disconnect, receiver, sender=Book)
+        collector = DeleteCollector(using='default')
+        with CaptureQueriesContext(connection) as queries:
+            collector.collect([self.author])
+            collector.delete()
+        self.assertNotIn(Book, collector.pk_models)
+        self.assertEqual(len(self.book_selects(queries)), 1)
+        self.assertEqual(sorted(names),
+                         sorted(Book.all_objects.values_list('name',
+                                                             flat=True)))
+
+    def test_pk_only_disabled(self):
+        collector = DeleteCollector(using='default', pk_only=False)
+        collector.collect([self.author])
+        self.assertEqual(collector.pk_models, set())
+        self.assertTrue(all(isinstance(book, Book)
+                            for book in collector.data[Book]))
+
+
+class InheritedCascadeTest(TestCase):
+
+    def setUp(self):
+        self.shelf = ShelfFactory()
+        VolumeFactory.create_batch(size=20, shelf=self.shelf)
+
+    def test_parents_are_not_fetched_row_by_row(self):
+        # The volumes, one UPDATE of the items they inherit deleted_at from
+        # and one of the shelf.
+        with self.assertNumQueries(3):
+            self.shelf.delete()
+        self.assertFalse(Volume.objects.exists())
+        self.assertFalse(Item.objects.exists())
+
+        # The same for undelete, in a savepoint.
+        with self.assertNumQueries(5):
+            self.shelf.undelete()
+        self.assertEqual(Volume.objects.count(), 20)
+
+    def test_parent_instance_listeners(self):
+        names = []
+
+        def receiver(sender, instance, **kwargs):
+            names.append(instance.name)
+
+        signals.pre_delete.connect(receiver, sender=Item)
+        self.addCleanup(signals.pre_delete.disconnect, receiver, sender=Item)
+        with CaptureQueriesContext(connection) as queries:
+            self.shelf.delete()
+        self.assertEqual(len([q for q in queries
+                              if 'FROM "app_test_item"' in q['sql']]), 1)
+        self.assertEqual(sorted(names), sorted(
+            Item.all_objects.values_list('name', flat=True)))
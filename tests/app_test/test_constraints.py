@@ -0,0 +1,131 @@
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, models, transaction
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.operations import AddConstraint
+from django.db.migrations.state import ModelState, ProjectState
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, isolate_apps
+
+from django_soft_delete.constraints import AliveUniqueConstraint
+from django_soft_delete.models import SoftDeletionModel
+
+from .models import Department, Employee
+
+
+class AliveUniqueConstraintTest(TestCase):
+
+    def setUp(self):
+        self.department = Department.objects.create(code='rnd')
+        self.department.delete()
+
+    def test_unique_fields_are_converted(self):
+        field = Department._meta.get_field('code')
+        self.assertFalse(field.unique)
+        constraint, = Department._meta.constraints
+        self.assertIsInstance(constraint, AliveUniqueConstraint)
+        self.assertEqual(constraint.fields, ('code',))
+        self.assertFalse(Department.has_unique_fields())
+        self.assertFalse(Employee.has_unique_fields())
+
+    def test_deconstruct(self):
+        constraint = AliveUniqueConstraint(fields=['code'], name='dep_code')
+        path, args, kwargs = constraint.deconstruct()
+        self.assertEqual(
+            path, 'django_soft_delete.constraints.AliveUniqueConstraint')
+        self.assertEqual(kwargs, {'fields': ('code',), 'name': 'dep_code'})
+
+    def test_migrations_add_the_constraints(self):
+        state = ModelState.from_model(Department)
+        self.assertEqual([c.name for c in state.options['constraints']],
+                         [c.name for c in Department._meta.constraints])
+        _, _, _, kwargs = state.get_field_by_name('code').deconstruct()
+        self.assertNotIn('unique', kwargs)
+
+        after = ProjectState()
+        after.add_model(state)
+        changes = MigrationAutodetector(
+            ProjectState(), after)._detect_changes()
+        operations = changes['app_test'][0].operations
+        self.assertEqual(
+            [op.constraint for op in operations
+             if isinstance(op, AddConstraint)],
+            Department._meta.constraints)
+
+    def test_create_next_to_tombstone(self):
+        with CaptureQueriesContext(connection) as queries:
+            Department.objects.create(code='rnd')
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(Department.all_objects.filter(code='rnd').count(), 2)
+
+    def test_get_or_create_next_to_tombstone(self):
+        department, created = Department.objects.get_or_create(code='rnd')
+        self.assertTrue(created)
+        self.assertNotEqual(department.pk, self.department.pk)
+        self.assertEqual(Department.objects.get_or_create(code='rnd'),
+                         (department, False))
+
+    def test_update_or_create_next_to_tombstone(self):
+        department, created = Department.objects.update_or_create(
+            code='rnd', defaults={'name': 'Research'})
+        self.assertTrue(created)
+        self.assertEqual(department.name, 'Research')
+
+    def test_bulk_create_next_to_tombstone(self):
+        Department.objects.bulk_create([Department(code='rnd'),
+                                        Department(code='ops')])
+        self.assertEqual(Department.objects.count(), 2)
+
+    def test_alive_rows_stay_unique(self):
+        Department.objects.create(code='rnd')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Department.objects.create(code='rnd')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.department.undelete()
+
+    def test_validate_unique(self):
+        Department(code='rnd').validate_unique()
+        Department.objects.create(code='rnd')
+        with self.assertRaises(ValidationError) as cm:
+            Department(code='rnd').validate_unique()
+        self.assertEqual(list(cm.exception.message_dict), ['code'])
+        Department(code='rnd').validate_unique(exclude=['code'])
+
+    def test_model_form_reports_duplicates(self):
+        class DepartmentForm(forms.ModelForm):
+            class Meta:
+                model = Department
+                fields = ('code',)
+
+        self.assertTrue(DepartmentForm({'code': 'rnd'}).is_valid())
+        Department.objects.create(code='rnd')
+        form = DepartmentForm({'code': 'rnd'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('code', form.errors)
+
+    @isolate_apps('tests.app_test')
+    def test_constraints_are_not_shared(self):
+        class Base(SoftDeletionModel):
+            alive_unique = True
+
+            class Meta(SoftDeletionModel.Meta):
+                abstract = True
+                constraints = []
+
+        class First(Base):
+            code = models.CharField(max_length=20, unique=True)
+
+            class Meta(Base.Meta):
+                pass
+
+        class Second(Base):
+            slug = models.CharField(max_length=20, unique=True)
+
+            class Meta(Base.Meta):
+                pass
+
+        self.assertEqual([c.fields for c in First._meta.constraints],
+                         [('code',)])
+        self.assertEqual([c.fields for c in Second._meta.constraints],
+                         [('slug',)])
+        self.assertEqual(Base._meta.constraints, [])
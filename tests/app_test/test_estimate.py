@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .factories import (AuthorFactory, CompanyFactory, EmployeeFactory,
+                        TenantFactory)
+from .models import (DEFAULT_EMPLOYEE_PK, Author, Company, Employee,
+                     Tenant)
+
+
+class DeletionEstimateTest(TestCase):
+
+    def setUp(self):
+        EmployeeFactory(pk=DEFAULT_EMPLOYEE_PK)
+        self.employees = EmployeeFactory.create_batch(2)
+        self.queryset = Employee.objects.filter(
+            pk__in=[e.pk for e in self.employees])
+
+    def test_delete_plan_only_counts(self):
+        with CaptureQueriesContext(connection) as queries:
+            plan = self.queryset.delete_plan()
+        self.assertTrue(all(query['sql'].startswith('SELECT COUNT(')
+                            for query in queries))
+        self.assertEqual(plan.action, 'delete')
+
+        _, rows_count = self.queryset.delete()
+        self.assertEqual(plan.rows, rows_count)
+        self.assertEqual(plan.locked_rows['app_test_employee'], 2)
+
+    def test_field_updates(self):
+        plan = self.queryset.delete_plan()
+        self.assertEqual(plan.field_updates, {
+            'app_test.EmployeeNationality': 2,
+            'app_test.FamilyMember': 2,
+            'app_test.EmployeeInterview': 2,
+        })
+        self.assertEqual(plan.protected, {})
+
+    def test_protected(self):
+        company = CompanyFactory()
+        plan = Company.objects.filter(pk=company.pk).delete_plan()
+        self.assertEqual(plan.rows, {'app_test.Company': 1,
+                                     'app_test.Producer': 1})
+        self.assertEqual(plan.protected, {'app_test.Product': 1})
+
+    def test_deferred(self):
+        tenant = TenantFactory()
+        plan = Tenant.objects.filter(pk=tenant.pk).delete_plan()
+        self.assertEqual(plan.rows, {'app_test.Tenant': 1})
+        self.assertEqual(plan.deferred, {'app_test.Project': 1})
+
+    def test_fast_delete_statements(self):
+        AuthorFactory.create_batch(2)
+        plan = Author.objects.all().delete_plan()
+        self.assertEqual(plan.rows, {'app_test.Author': 2,
+                                     'app_test.Book': 2,
+                                     'app_test.Poem': 2,
+                                     'app_test.Chapter': 2})
+        with self.assertNumQueries(plan.statements):
+            Author.objects.all().delete()
+
+    def test_undelete_plan(self):
+        self.queryset.delete()
+        queryset = Employee.all_objects.filter(
+            pk__in=[e.pk for e in self.employees])
+        plan = queryset.undelete_plan()
+        self.assertEqual(plan.action, 'undelete')
+        self.assertEqual(plan.field_updates, {})
+        revived, _ = queryset.undelete()
+        self.assertEqual(sum(plan.rows.values()), revived)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('estimate_deletion', 'app_test.Tenant', stdout=out)
+        self.assertEqual(out.getvalue(), 'Statements: 1\n'
+                                         'Locked rows: 0 in 0 tables\n')
+        TenantFactory()
+        out = StringIO()
+        call_command('estimate_deletion', 'app_test.Tenant',
+                     '--filter', 'name__startswith=tenant', stdout=out)
+        self.assertIn('app_test.Tenant: 1 rows deleted\n', out.getvalue())
+        self.assertIn('app_test.Project: 1 rows left to the lazy cascade '
+                      'sweep\n', out.getvalue())
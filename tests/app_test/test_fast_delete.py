@@ -0,0 +1,101 @@
+from django.db import connection
+from django.db.models import signals
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .factories import *
+
+
+class FastDeleteTest(TestCase):
+
+    def setUp(self):
+        self.author = AuthorFactory()
+        PoemFactory.create_batch(size=3, author=self.author)
+
+    def selects_from(self, queries, model):
+        table = model._meta.db_table
+        return [q['sql'] for q in queries
+                if q['sql'].startswith('SELECT') and
+                'FROM "%s"' % table in q['sql']]
+
+    def test_leaf_queryset_is_a_single_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            count, counter = Poem.objects.all().delete()
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]['sql'].startswith('UPDATE'))
+        self.assertEqual(count, 4)
+        self.assertEqual(counter, {'app_test.Poem': 4})
+        self.assertFalse(Poem.objects.exists())
+
+    def test_cascade_to_leaf_is_not_fetched(self):
+        with CaptureQueriesContext(connection) as queries:
+            count, counter = self.author.delete()
+        self.assertEqual(self.selects_from(queries, Poem), [])
+        self.assertEqual(self.selects_from(queries, Book), [])
+        self.assertEqual(self.selects_from(queries, Chapter), [])
+        self.assertEqual(counter['app_test.Poem'], 4)
+        self.assertEqual(counter['app_test.Chapter'], 1)
+        self.assertFalse(Poem.objects.filter(author=self.author).exists())
+
+    def test_cascade_subtree_is_not_fetched(self):
+        AuthorFactory.create_batch(size=3)
+        with CaptureQueriesContext(connection) as queries:
+            count, counter = Author.objects.all().delete()
+        # The primary keys of the authors, then one statement per model,
+        # children first.
+        self.assertEqual([q['sql'] for q in queries
+                          if q['sql'].startswith('SELECT')],
+                         [queries[0]['sql']])
+        self.assertIn('FROM "app_test_author"', queries[0]['sql'])
+        self.assertEqual(len(queries), 5)
+        self.assertIn('"app_test_chapter"', queries[1]['sql'])
+        self.assertIn('"app_test_author"', queries[-1]['sql'])
+        self.assertEqual(counter, {'app_test.Author': 4,
+                                   'app_test.Book': 4,
+                                   'app_test.Chapter': 4,
+                                   'app_test.Poem': 7})
+        self.assertFalse(Chapter.objects.exists())
+        self.assertEqual(
+            len(set(Chapter.all_objects.values_list('deleted_at',
+                                                    flat=True))), 1)
+
+    def test_root_filtered_through_its_cascade(self):
+        AuthorFactory()
+        count, counter = Author.objects.filter(
+            books__in=Book.objects.filter(author=self.author)).delete()
+        self.assertEqual(counter, {'app_test.Author': 1,
+                                   'app_test.Book': 1,
+                                   'app_test.Chapter': 1,
+                                   'app_test.Poem': 4})
+        self.assertFalse(Author.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Poem.objects.filter(author=self.author).exists())
+        self.assertEqual(Author.objects.count(), 1)
+
+    def test_cascade_subtree_skips_dead_rows(self):
+        old_book = self.author.books.first()
+        old_book.delete()
+        Author.objects.all().delete()
+        self.assertNotEqual(
+            Chapter.all_objects.get(book=old_book).deleted_at,
+            Author.all_objects.get(pk=self.author.pk).deleted_at)
+
+    def test_undelete_cascade_to_leaf_is_not_fetched(self):
+        self.author.delete()
+        with CaptureQueriesContext(connection) as queries:
+            count, counter = self.author.undelete()
+        self.assertEqual(self.selects_from(queries, Poem), [])
+        self.assertEqual(counter['poem'], 4)
+        self.assertEqual(Poem.objects.filter(author=self.author).count(), 4)
+
+    def test_signal_listener_disables_fast_path(self):
+        deleted = []
+
+        def receiver(sender, instance, **kwargs):
+            deleted.append(instance.pk)
+
+        signals.post_delete.connect(receiver, sender=Poem)
+        try:
+            Poem.objects.all().delete()
+        finally:
+            signals.post_delete.disconnect(receiver, sender=Poem)
+        self.assertEqual(len(deleted), 4)
@@ -0,0 +1,151 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from django_soft_delete.graveyard import archive_model, restore_from_graveyard
+from django_soft_delete.restore import restore_since
+from django_soft_delete.signals import post_undelete_batch
+from django_soft_delete.utils import get_soft_delete_models
+
+from .factories import *
+
+
+class GraveyardTest(TestCase):
+
+    def setUp(self):
+        self.invoices = InvoiceFactory.create_batch(size=3)
+        self.old_invoices = self.invoices[:2]
+        for invoice in self.old_invoices:
+            invoice.delete()
+        Invoice.all_objects.filter(
+            pk__in=[invoice.pk for invoice in self.old_invoices]).update(
+            deleted_at=timezone.now() - timedelta(days=40))
+        InvoiceLine.all_objects.filter(invoice__in=self.old_invoices).update(
+            deleted_at=timezone.now() - timedelta(days=40))
+        self.cutoff = timezone.now() - timedelta(days=30)
+
+    def archive(self):
+        out = StringIO()
+        call_command('archive_soft_deleted', 'app_test', stdout=out)
+        return out.getvalue()
+
+    def test_graveyard_model(self):
+        graveyard_model = Invoice.graveyard_model
+        self.assertEqual(graveyard_model._meta.db_table,
+                         'app_test_invoice_graveyard')
+        self.assertEqual(
+            [f.column for f in graveyard_model._meta.concrete_fields],
+            [f.column for f in Invoice._meta.concrete_fields])
+        self.assertFalse(graveyard_model._meta.get_field('number').unique)
+        invoice = InvoiceLine.graveyard_model._meta.get_field('invoice')
+        self.assertFalse(invoice.db_constraint)
+        self.assertIn('app_test_invoice_graveyard',
+                      connection.introspection.table_names())
+
+    def test_graveyards_are_not_soft_delete_models(self):
+        models = get_soft_delete_models(['app_test'])
+        self.assertIn(Invoice, models)
+        self.assertNotIn(Invoice.graveyard_model, models)
+        self.assertEqual(get_soft_delete_models(
+            ['app_test.InvoiceGraveyard']), [])
+
+    def test_restore_since_moves_rows_back(self):
+        self.archive()
+        since = timezone.now() - timedelta(days=50)
+        self.assertEqual(
+            restore_since(since, ['app_test'], dry_run=True),
+            (4, {'app_test.Invoice': 2, 'app_test.InvoiceLine': 2}))
+        self.assertEqual(Invoice.graveyard_model.objects.count(), 2)
+
+        self.assertEqual(
+            restore_since(since, ['app_test']),
+            (4, {'app_test.Invoice': 2, 'app_test.InvoiceLine': 2}))
+        self.assertEqual(Invoice.objects.count(), 3)
+        self.assertEqual(InvoiceLine.objects.count(), 3)
+        self.assertFalse(Invoice.graveyard_model.objects.exists())
+        self.assertFalse(InvoiceLine.graveyard_model.objects.exists())
+
+    def test_archive(self):
+        out = self.archive()
+        self.assertIn('app_test.InvoiceLine: archived 2 rows', out)
+        self.assertIn('app_test.Invoice: archived 2 rows', out)
+        self.assertEqual(Invoice.all_objects.count(), 1)
+        self.assertEqual(InvoiceLine.all_objects.count(), 1)
+        self.assertEqual(Invoice.graveyard_model.objects.count(), 2)
+        self.assertEqual(InvoiceLine.graveyard_model.objects.count(), 2)
+
+    def test_referenced_rows_stay(self):
+        # Lines which are alive keep their invoice in the hot table.
+        InvoiceLine.all_objects.all().undelete()
+        self.assertEqual(archive_model(Invoice, self.cutoff), 0)
+        self.assertEqual(archive_model(InvoiceLine, self.cutoff), 0)
+
+    def test_archive_in_chunks(self):
+        archive_model(InvoiceLine, self.cutoff, chunk_size=1)
+        self.assertEqual(archive_model(Invoice, self.cutoff, chunk_size=1),
+                         2)
+        self.assertEqual(Invoice.graveyard_model.objects.count(), 2)
+
+    def test_with_graveyard(self):
+        self.archive()
+        self.assertEqual(Invoice.all_objects.with_graveyard().count(), 3)
+        dead = Invoice.all_objects.all().dead().with_graveyard().order_by('pk')
+        self.assertEqual([invoice.pk for invoice in dead],
+                         [invoice.pk for invoice in self.old_invoices])
+        self.assertIsInstance(dead[0], Invoice)
+        self.assertEqual(dead[0].number, self.old_invoices[0].number)
+        self.assertEqual(
+            Invoice.all_objects.filter(number=self.old_invoices[1].number)
+            .with_graveyard().count(), 1)
+        self.assertEqual(Invoice.objects.with_graveyard().count(), 1)
+
+    def test_undelete_instance(self):
+        self.archive()
+        invoice = Invoice.all_objects.all().dead().with_graveyard() \
+            .order_by('pk')[0]
+        invoice.undelete()
+        self.assertTrue(Invoice.objects.filter(pk=invoice.pk).exists())
+        self.assertEqual(InvoiceLine.objects.filter(invoice=invoice).count(),
+                         1)
+        self.assertEqual(Invoice.graveyard_model.objects.count(), 1)
+        self.assertEqual(InvoiceLine.graveyard_model.objects.count(), 1)
+
+    def test_undelete_queryset(self):
+        self.archive()
+        Invoice.all_objects.filter(
+            pk__in=[invoice.pk for invoice in self.old_invoices]).undelete()
+        self.assertEqual(Invoice.objects.count(), 3)
+        self.assertEqual(InvoiceLine.objects.count(), 3)
+        self.assertFalse(Invoice.graveyard_model.objects.exists())
+        self.assertFalse(InvoiceLine.graveyard_model.objects.exists())
+
+    def test_failed_undelete_keeps_rows_archived(self):
+        self.archive()
+
+        def receiver(**kwargs):
+            raise RuntimeError('boom')
+
+        post_undelete_batch.connect(receiver, sender=Invoice)
+        self.addCleanup(post_undelete_batch.disconnect, receiver,
+                        sender=Invoice)
+        invoice = Invoice.graveyard_model.objects.order_by('pk')[0]
+        with self.assertRaises(RuntimeError):
+            Invoice(pk=invoice.pk, deleted_at=invoice.deleted_at).undelete()
+        self.assertEqual(Invoice.graveyard_model.objects.count(), 2)
+        self.assertEqual(InvoiceLine.graveyard_model.objects.count(), 2)
+        self.assertEqual(Invoice.all_objects.count(), 1)
+
+    def test_batches_fit_the_parameters_limit(self):
+        self.archive()
+        with mock.patch.object(connection.ops, 'bulk_batch_size',
+                               return_value=1), \
+                self.assertNumQueries(6):
+            # Per row: its primary key, INSERT ... SELECT and DELETE.
+            count = restore_from_graveyard(Invoice, [
+                Invoice(pk=invoice.pk) for invoice in self.old_invoices])
+        self.assertEqual(count, 2)
@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.apps import apps
+from django.db import connection
+from django.test import SimpleTestCase
+
+from django_soft_delete.checks import check_soft_delete_indexes
+from django_soft_delete.indexes import AliveIndex, DeadIndex
+
+from .models import Author, Employee, Nationality
+
+
+class SoftDeleteIndexTest(SimpleTestCase):
+
+    def create_sql(self, index, model):
+        return str(index.create_sql(model, connection.schema_editor()))
+
+    def test_alive_index_is_partial(self):
+        index = AliveIndex(fields=['name'], name='author_name_alv')
+        sql = self.create_sql(index, Author)
+        self.assertIn('WHERE "deleted_at" IS NULL', sql)
+
+    def test_dead_index_leads_with_deleted_at(self):
+        index = DeadIndex(fields=['name'], name='author_name_ded')
+        self.assertEqual(index.fields, ['deleted_at', 'name'])
+        sql = self.create_sql(index, Author)
+        self.assertIn('("deleted_at", "name")', sql)
+        self.assertIn('WHERE "deleted_at" IS NOT NULL', sql)
+
+    def test_without_partial_index_support(self):
+        index = AliveIndex(fields=['name'], name='author_name_alv')
+        with mock.patch.object(connection.features,
+                               'supports_partial_indexes', False):
+            sql = self.create_sql(index, Author)
+        self.assertNotIn('WHERE', sql)
+        self.assertIn('("name", "deleted_at")', sql)
+
+    def test_name_generated_from_model(self):
+        names = [index.name for index in Author._meta.indexes]
+        self.assertEqual(len(names), 2)
+        self.assertTrue(names[0].endswith('_alv'))
+        self.assertTrue(names[1].endswith('_ded'))
+
+    def test_deconstruct(self):
+        index = DeadIndex(fields=['name'], name='author_name_ded')
+        path, args, kwargs = index.deconstruct()
+        self.assertEqual(path, 'django_soft_delete.indexes.DeadIndex')
+        self.assertEqual(kwargs, {'fields': ['deleted_at', 'name'],
+                                  'name': 'author_name_ded'})
+        self.assertEqual(DeadIndex(**kwargs), index)
+
+    def test_check(self):
+        app_config = apps.get_app_config('app_test')
+        warned = {error.obj for error in
+                  check_soft_delete_indexes([app_config])}
+        self.assertIn(Nationality, warned)
+        self.assertNotIn(Employee, warned)
+        self.assertNotIn(Author, warned)
@@ -0,0 +1,107 @@
+import threading
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from django_soft_delete import instrumentation
+from django_soft_delete.collector import DeleteCollector
+
+from .factories import *
+from .models import DEFAULT_EMPLOYEE_PK
+
+reports = []
+
+
+def record(report):
+    reports.append(report)
+
+
+class InstrumentationTest(TestCase):
+
+    def setUp(self):
+        self.reports = []
+        del reports[:]
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(DeleteCollector(using='default').run)
+
+    def test_thread_local_callbacks(self):
+        # The fallback for Python 3.6, which has no contextvars.
+        callbacks = instrumentation._ThreadLocalVar('callbacks', default=())
+        other_thread = []
+        with mock.patch.object(instrumentation, '_callbacks', callbacks):
+            with instrumentation.instrument(self.reports.append):
+                AuthorFactory().delete()
+                thread = threading.Thread(
+                    target=lambda: other_thread.append(callbacks.get()))
+                thread.start()
+                thread.join()
+            AuthorFactory().delete()
+        self.assertEqual(len(self.reports), 1)
+        self.assertEqual(other_thread, [()])
+        self.assertEqual(callbacks.get(), ())
+
+    def test_delete_report(self):
+        EmployeeFactory(pk=DEFAULT_EMPLOYEE_PK)
+        employee = EmployeeFactory()
+        with instrumentation.instrument(self.reports.append):
+            employee.delete()
+
+        report, = self.reports
+        self.assertEqual(report.action, 'delete')
+        self.assertEqual(report.using, 'default')
+        self.assertEqual(
+            list(report.phases),
+            ['collect', 'sort', 'pre_signals', 'fast_deletes',
+             'field_updates', 'updates', 'post_signals'])
+        self.assertGreater(report.phases['collect'].queries, 0)
+        self.assertGreater(report.phases['updates'].queries, 0)
+        self.assertEqual(report.rows['app_test.Employee'], 1)
+        self.assertEqual(report.rows['app_test.Checkup'], 1)
+        # Employee -> HealthStatus -> Checkup
+        self.assertEqual(report.depth, 3)
+
+    def test_fast_delete_depth(self):
+        AuthorFactory.create_batch(size=2)
+        with instrumentation.instrument(self.reports.append):
+            Author.objects.all().delete()
+
+        report, = self.reports
+        self.assertEqual(list(report.phases),
+                         ['collect', 'sort', 'pre_signals', 'fast_deletes'])
+        self.assertEqual(report.phases['fast_deletes'].queries, 4)
+        self.assertEqual(report.rows['app_test.Chapter'], 2)
+        # Author -> Book -> Chapter
+        self.assertEqual(report.depth, 3)
+
+    def test_undelete_report(self):
+        author = AuthorFactory()
+        author.delete()
+        with instrumentation.instrument(self.reports.append):
+            author.undelete()
+
+        report, = self.reports
+        self.assertEqual(report.action, 'undelete')
+        self.assertEqual(report.rows, {'author': 1, 'book': 1, 'poem': 1,
+                                       'chapter': 1})
+        self.assertEqual(report.depth, 3)
+
+    def test_only_inside_block(self):
+        with instrumentation.instrument(self.reports.append):
+            pass
+        AuthorFactory().delete()
+        self.assertEqual(self.reports, [])
+
+    @override_settings(
+        SOFT_DELETE_INSTRUMENTATION=
+        'tests.app_test.test_instrumentation.record')
+    def test_settings_callback(self):
+        AuthorFactory().delete()
+        self.assertEqual(len(reports), 1)
+
+    @override_settings(
+        SOFT_DELETE_INSTRUMENTATION=record,
+        SOFT_DELETE_INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_sample_rate(self):
+        AuthorFactory().delete()
+        self.assertEqual(reports, [])
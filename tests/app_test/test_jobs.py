@@ -0,0 +1,180 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from django_soft_delete.models import DeletionJob
+
+from .factories import *
+
+
+class DeletionJobTest(TestCase):
+
+    def setUp(self):
+        self.authors = AuthorFactory.create_batch(size=5)
+        self.pk_list = sorted(author.pk for author in self.authors)
+
+    def test_enqueue(self):
+        job = Author.objects.filter(pk__in=self.pk_list[:3]) \
+            .delete_async_job(chunk_size=2)
+        self.assertEqual((job.model, job.action, job.status, job.using),
+                         ('app_test.Author', 'delete', 'pending', 'default'))
+        self.assertEqual(Author.objects.count(), 5)
+        self.assertEqual(json.loads(job.pk_list), self.pk_list[:3])
+        self.assertEqual(list(job.get_queryset().order_by('pk')),
+                         self.authors[:3])
+
+    def test_rows_deleted_since_enqueue_keep_their_deletion(self):
+        job = Author.objects.all().delete_async_job()
+        self.authors[0].delete()
+        deleted_at = Author.all_objects.get(pk=self.authors[0].pk).deleted_at
+        DeletionJob.objects.claim('worker').run()
+        self.assertEqual(
+            Author.all_objects.get(pk=self.authors[0].pk).deleted_at,
+            deleted_at)
+        job.refresh_from_db()
+        self.assertEqual(json.loads(job.rows_count)['app_test.Author'], 4)
+
+    def test_claim_and_run(self):
+        Author.objects.filter(
+            pk__in=self.pk_list[:3]).delete_async_job(chunk_size=2)
+        job = DeletionJob.objects.claim('worker')
+        self.assertEqual((job.status, job.worker), ('running', 'worker'))
+        self.assertIsNone(DeletionJob.objects.claim('other'))
+
+        job.run()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.count, 12)
+        self.assertEqual(json.loads(job.rows_count)['app_test.Chapter'], 3)
+        self.assertEqual(json.loads(job.last_pk), self.pk_list[2])
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(Author.objects.count(), 2)
+
+    def test_stop_and_resume(self):
+        Author.objects.all().delete_async_job(chunk_size=2)
+        job = DeletionJob.objects.claim('worker')
+        job.run(should_stop=lambda: True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.count), ('pending', 8))
+        self.assertEqual(Author.objects.count(), 3)
+
+        job = DeletionJob.objects.claim('worker')
+        job.run()
+        self.assertEqual((job.status, job.count), ('done', 20))
+        self.assertFalse(Author.objects.exists())
+
+    def test_undelete_job(self):
+        Author.objects.all().delete()
+        Author.all_objects.all().undelete_async_job()
+        DeletionJob.objects.claim('worker').run()
+        self.assertEqual(Chapter.objects.count(), 5)
+
+    def test_cancel_pending(self):
+        job = Author.objects.all().delete_async_job()
+        job.cancel()
+        self.assertEqual(job.status, 'cancelled')
+        self.assertIsNone(DeletionJob.objects.claim('worker'))
+
+    def test_cancel_running(self):
+        Author.objects.all().delete_async_job(chunk_size=2)
+        job = DeletionJob.objects.claim('worker')
+        DeletionJob.objects.get(pk=job.pk).cancel()
+        job.run()
+        self.assertEqual((job.status, job.count), ('cancelled', 8))
+        self.assertEqual(Author.objects.count(), 3)
+
+    def test_retries(self):
+        Author.objects.all().delete_async_job(max_attempts=2)
+        with mock.patch('django_soft_delete.querysets.SoftDeletionQuerySet'
+                        '.delete', side_effect=RuntimeError('boom')):
+            job = DeletionJob.objects.claim('worker')
+            job.run()
+            self.assertEqual((job.status, job.attempts), ('pending', 1))
+            self.assertIn('boom', job.error)
+
+            job = DeletionJob.objects.claim('worker')
+            job.run()
+            self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertEqual(Author.objects.count(), 5)
+
+    def test_claim_stale_job(self):
+        Author.objects.all().delete_async_job()
+        job = DeletionJob.objects.claim('dead worker')
+        self.assertIsNone(DeletionJob.objects.claim(
+            'worker', stale_after=timedelta(hours=1)))
+        job = DeletionJob.objects.claim('worker',
+                                        stale_after=timedelta(seconds=-1))
+        self.assertEqual(job.worker, 'worker')
+
+    def test_taken_over_job(self):
+        Author.objects.all().delete_async_job(chunk_size=2)
+        job = DeletionJob.objects.claim('dead worker')
+        DeletionJob.objects.claim('worker', stale_after=timedelta(seconds=-1))
+        job.run()
+        # The chunk was rolled back and the job left to its new worker.
+        self.assertEqual(Author.objects.count(), 5)
+        self.assertEqual((job.status, job.worker, job.count),
+                         ('running', 'worker', 0))
+
+
+class MultiDatabaseDeletionJobTest(TestCase):
+    databases = {'default', 'other'}
+
+    def setUp(self):
+        self.authors = [Author.objects.using('other').create()
+                        for i in range(3)]
+        for author in self.authors:
+            Book.objects.using('other').create(author=author)
+
+    def test_job_and_rows_in_other_databases(self):
+        Author.objects.using('other').all().delete_async_job(chunk_size=2)
+        job = DeletionJob.objects.claim('worker')
+        self.assertEqual((job._state.db, job.using), ('default', 'other'))
+        job.run()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.count), ('done', 6))
+        self.assertFalse(Author.objects.using('other').exists())
+
+    def test_job_in_the_rows_database(self):
+        jobs = DeletionJob.objects.db_manager('other')
+        jobs.enqueue(Author.objects.using('other').all(), DeletionJob.DELETE)
+        job = jobs.claim('worker')
+        job.run()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.count), ('done', 6))
+        self.assertFalse(Author.objects.using('other').exists())
+        self.assertFalse(DeletionJob.objects.exists())
+
+    def test_taken_over_job(self):
+        Author.objects.using('other').all().delete_async_job(chunk_size=2)
+        job = DeletionJob.objects.claim('dead worker')
+        DeletionJob.objects.claim('worker', stale_after=timedelta(seconds=-1))
+        job.run()
+        self.assertEqual(Author.objects.using('other').count(), 3)
+        self.assertEqual((job.status, job.worker, job.count),
+                         ('running', 'worker', 0))
+
+
+class RunDeletionJobsTest(TransactionTestCase):
+
+    def test_run_once(self):
+        AuthorFactory.create_batch(size=3)
+        Author.objects.all().delete_async_job(chunk_size=2)
+        EmployeeFactory(pk=1)
+        employee = EmployeeFactory()
+        Employee.objects.filter(pk=employee.pk).delete_async_job()
+
+        out = StringIO()
+        # A single worker thread: SQLite's in-memory test database locks
+        # whole tables between connections.
+        call_command('run_deletion_jobs', threads=1, once=True, stdout=out)
+        self.assertEqual(out.getvalue().count(' done, '), 2)
+        self.assertFalse(Author.objects.exists())
+        self.assertFalse(Employee.objects.filter(pk=employee.pk).exists())
+        self.assertEqual(
+            set(DeletionJob.objects.values_list('status', flat=True)),
+            {'done'})
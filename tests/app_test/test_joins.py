@@ -0,0 +1,66 @@
+from django.test import TestCase
+from django.utils.timezone import now
+
+from django_soft_delete.joins import AliveJoin
+
+from .factories import EmployeeFactory
+from .models import Checkup, Employee, FamilyMember, HealthStatus
+
+
+class AliveJoinsTest(TestCase):
+
+    def setUp(self):
+        self.employees = EmployeeFactory.create_batch(3)
+        self.employee = self.employees[0]
+        self.checkup = Checkup.objects.get(
+            health_status__employee=self.employee)
+        # Soft deleted without cascading, like rows left behind by
+        # DO_NOTHING relations.
+        HealthStatus.objects.filter(employee=self.employee).update(
+            deleted_at=now())
+        Employee.objects.filter(pk=self.employees[1].pk).update(
+            deleted_at=now())
+
+    def test_lookup_across_relations(self):
+        lookup = {'health_status__checkups__checkup_result':
+                  self.checkup.checkup_result}
+        self.assertTrue(Employee.objects.filter(**lookup).exists())
+        self.assertFalse(Employee.objects.alive_joins().filter(
+            **lookup).exists())
+        # Joins made before switching to alive joins are converted too.
+        self.assertFalse(Employee.objects.filter(
+            **lookup).alive_joins().exists())
+
+    def test_lookup_sql(self):
+        qs = Employee.objects.alive_joins().filter(
+            health_status__checkups__checkup_result='x')
+        joins = [join for join in qs.query.alias_map.values()
+                 if isinstance(join, AliveJoin)]
+        self.assertEqual(len(joins), 2)
+        self.assertEqual(str(qs.query).count('"deleted_at" IS NULL)'), 2)
+
+    def test_select_related_reverse_one_to_one(self):
+        with self.assertNumQueries(1):
+            employees = list(Employee.objects.alive_joins().order_by(
+                'pk').select_related('health_status'))
+            self.assertEqual(
+                [hasattr(employee, 'health_status')
+                 for employee in employees],
+                [False, True])
+
+    def test_select_related_forward(self):
+        with self.assertNumQueries(1):
+            family_members = list(
+                FamilyMember.objects.alive_joins().filter(
+                    employee_id__in=[e.pk for e in self.employees]
+                ).order_by('employee_id').select_related('employee'))
+            self.assertEqual(
+                [member.employee and member.employee.pk
+                 for member in family_members],
+                [self.employee.pk, None, self.employees[2].pk])
+
+    def test_count(self):
+        qs = Checkup.objects.filter(
+            health_status__employee__in=self.employees)
+        self.assertEqual(qs.count(), 3)
+        self.assertEqual(qs.alive_joins().count(), 2)
@@ -0,0 +1,106 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import TestCase
+
+from django_soft_delete.lazy import sweep
+
+from .factories import ProjectFactory, TenantFactory
+from .models import Milestone, Project, Task, Tenant
+
+
+class LazyCascadeTest(TestCase):
+
+    def setUp(self):
+        self.tenant = TenantFactory()
+        ProjectFactory.create_batch(2, tenant=self.tenant)
+        self.other_tenant = TenantFactory()
+
+    def test_delete_only_stamps_the_root(self):
+        with self.assertNumQueries(1):
+            count, rows_count = Tenant.objects.filter(
+                pk=self.tenant.pk).delete()
+        self.assertEqual(rows_count, {'app_test.Tenant': 1})
+        self.assertEqual(
+            Project.all_objects.filter(deleted_at__isnull=False).count(), 0)
+
+    def test_alive_hides_descendants(self):
+        self.tenant.delete()
+        self.assertEqual(Project.objects.count(), 1)
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(
+            list(Project.objects.values_list('tenant', flat=True)),
+            [self.other_tenant.pk])
+        # The rows themselves are untouched until the sweep.
+        self.assertEqual(Project.all_objects.all().alive().count(), 1)
+        self.assertEqual(
+            Project.all_objects.filter(deleted_at__isnull=True).count(), 4)
+        # dead() is the complement of alive().
+        self.assertEqual(Project.all_objects.all().dead().count(), 3)
+        self.assertEqual(Task.all_objects.all().dead().count(), 3)
+        self.assertEqual(Tenant.all_objects.all().dead().count(), 1)
+
+    def test_sweep(self):
+        self.tenant.delete()
+        tenant = Tenant.all_objects.get(pk=self.tenant.pk)
+        count, rows_count = sweep(['app_test'])
+        self.assertEqual(rows_count, {'app_test.Project': 3,
+                                      'app_test.Task': 3})
+        self.assertEqual(count, 6)
+        projects = Project.all_objects.filter(tenant=tenant)
+        self.assertEqual(
+            set(projects.values_list('deleted_at', 'deletion_batch')),
+            {(tenant.deleted_at, tenant.deletion_batch)})
+        # Eager cascades of the swept rows run with them.
+        self.assertEqual(Milestone.all_objects.all().dead().count(), 3)
+        self.assertEqual(sweep(), (0, {}))
+
+    def test_sweep_skips_parents_revived_meanwhile(self):
+        self.tenant.delete()
+        select_for_update = QuerySet.select_for_update
+        revived = []
+
+        def revive_then_lock(qs, *args, **kwargs):
+            # The tenant is undeleted between the read of its projects and
+            # the lock of the dead parents.
+            if not revived:
+                revived.append(Tenant.all_objects.filter(
+                    pk=self.tenant.pk).update(deleted_at=None,
+                                              deletion_batch=None))
+            return select_for_update(qs, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'select_for_update',
+                               revive_then_lock):
+            self.assertEqual(sweep(), (0, {}))
+        self.assertEqual(revived, [1])
+        self.assertEqual(Project.objects.count(), 4)
+        self.assertEqual(Task.objects.count(), 4)
+
+    def test_undelete_before_sweep(self):
+        self.tenant.delete()
+        Tenant.all_objects.get(pk=self.tenant.pk).undelete()
+        self.assertEqual(Project.objects.count(), 4)
+        self.assertEqual(Task.objects.count(), 4)
+
+    def test_undelete_after_sweep(self):
+        self.tenant.delete()
+        sweep()
+        Tenant.all_objects.get(pk=self.tenant.pk).undelete()
+        self.assertEqual(Project.objects.count(), 4)
+        self.assertEqual(Task.objects.count(), 4)
+        self.assertEqual(Milestone.objects.count(), 4)
+
+    def test_hard_delete_cascades(self):
+        self.tenant.hard_delete()
+        self.assertEqual(Project.all_objects.count(), 1)
+
+    def test_command(self):
+        self.tenant.delete()
+        out = StringIO()
+        call_command('sweep_lazy_cascades', 'app_test.Project', stdout=out)
+        self.assertEqual(out.getvalue(), 'app_test.Project: swept 3 rows\n')
+        self.assertEqual(
+            Task.all_objects.filter(deleted_at__isnull=False).count(), 0)
+        self.assertEqual(Task.objects.count(), 1)
@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS, models
+from django.test import TestCase
+from django.test.utils import isolate_apps
+
+from django_soft_delete import deletion, plans
+from django_soft_delete.collector import CollectorAction
+from django_soft_delete.models import SoftDeletionModel
+from django_soft_delete.plans import plan_cache
+
+from .factories import EmployeeFactory
+from .models import (Employee, EmployeeInterview, EmployeeProfile,
+                     FamilyMember, HealthStatus, JobExperience, Project,
+                     Tenant)
+
+
+def _plan(model, action):
+    return plan_cache.get(model, action, DEFAULT_DB_ALIAS)
+
+
+def _step_models(model, action):
+    return {related.related_model for related, _ in
+            _plan(model, action).steps}
+
+
+class CascadePlanTest(TestCase):
+
+    def test_plans_are_cached(self):
+        self.assertIs(_plan(Employee, CollectorAction.DELETE),
+                      _plan(Employee, CollectorAction.DELETE))
+        self.assertIsNot(_plan(Employee, CollectorAction.DELETE),
+                         _plan(Employee, CollectorAction.UNDELETE))
+
+    def test_delete_steps(self):
+        step_models = _step_models(Employee, CollectorAction.DELETE)
+        self.assertIn(HealthStatus, step_models)
+        self.assertIn(EmployeeProfile, step_models)
+        self.assertNotIn(JobExperience, step_models)
+        self.assertNotIn(Project, _step_models(Tenant,
+                                               CollectorAction.DELETE))
+
+    def test_undelete_steps(self):
+        step_models = _step_models(Employee, CollectorAction.UNDELETE)
+        self.assertIn(HealthStatus, step_models)
+        # CASCADE_NO_REVIVE, SET_DEFAULT and SET_NULL revive nothing.
+        self.assertNotIn(EmployeeProfile, step_models)
+        self.assertNotIn(FamilyMember, step_models)
+        self.assertNotIn(EmployeeInterview, step_models)
+        self.assertIn(Project, _step_models(Tenant, CollectorAction.UNDELETE))
+
+    def test_lean_fields(self):
+        plan = _plan(Employee, CollectorAction.UNDELETE)
+        self.assertEqual(plan.lean_fields, {'id', 'deleted_at'})
+
+    def test_repeated_deletes_skip_graph_discovery(self):
+        first, second = EmployeeFactory.create_batch(2)
+        first.delete()
+        Employee.all_objects.filter(pk=first.pk).undelete()
+        with mock.patch.object(plans, 'compile_plan',
+                               wraps=plans.compile_plan) as compile_plan, \
+                mock.patch('django.db.models.deletion.'
+                           'get_candidate_relations_to_delete') as discover:
+            second.delete()
+            Employee.all_objects.filter(pk=second.pk).undelete()
+        compile_plan.assert_not_called()
+        discover.assert_not_called()
+        self.assertIsNone(Employee.objects.get(pk=second.pk).deleted_at)
+
+    @isolate_apps('tests.app_test')
+    def test_invalidated_by_new_models(self):
+        class Parent(SoftDeletionModel):
+            pass
+
+        self.assertEqual(_plan(Parent, CollectorAction.DELETE).steps, ())
+
+        class Child(SoftDeletionModel):
+            parent = models.ForeignKey(Parent, on_delete=deletion.CASCADE)
+
+        self.assertEqual(
+            _step_models(Parent, CollectorAction.DELETE), {Child})
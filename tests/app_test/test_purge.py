@@ -0,0 +1,116 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from .factories import *
+
+
+class PurgeSoftDeletedTest(TestCase):
+
+    def setUp(self):
+        self.old_authors = AuthorFactory.create_batch(size=3)
+        Author.objects.filter(
+            pk__in=[a.pk for a in self.old_authors]).delete()
+        Author.all_objects.update(
+            deleted_at=timezone.now() - timedelta(days=40))
+        self.recent_author = AuthorFactory()
+        self.recent_author.delete()
+        self.alive_author = AuthorFactory()
+
+    def call(self, *args, **kwargs):
+        out = StringIO()
+        call_command('purge_soft_deleted', *args, stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_purge_old_rows(self):
+        self.call('app_test.Author', days=30)
+        self.assertEqual(
+            set(Author.all_objects.values_list('pk', flat=True)),
+            {self.recent_author.pk, self.alive_author.pk})
+        self.assertFalse(Book.all_objects.filter(
+            author__in=[a.pk for a in self.old_authors]).exists())
+        self.assertTrue(Book.all_objects.filter(
+            author=self.recent_author).exists())
+
+    def test_purge_in_chunks(self):
+        out = self.call('app_test.Author', days=30, chunk_size=2,
+                        verbosity=2)
+        self.assertEqual(out.count('app_test.Author: deleted'), 2)
+        self.assertFalse(Author.all_objects.filter(
+            pk__in=[a.pk for a in self.old_authors]).exists())
+
+    def test_resume_from_checkpoint(self):
+        first, second, third = sorted(a.pk for a in self.old_authors)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'checkpoint.json')
+            with open(path, 'w') as f:
+                cutoff = timezone.now() - timedelta(days=30)
+                json.dump({'cutoff': cutoff.isoformat(), 'days': 30,
+                           'models': {'app_test.Author': second}}, f)
+            self.call('app_test.Author', checkpoint=path)
+            self.assertFalse(os.path.exists(path))
+        self.assertEqual(
+            set(Author.all_objects.values_list('pk', flat=True)),
+            {first, second, self.recent_author.pk, self.alive_author.pk})
+
+    def test_resume_with_other_days(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'checkpoint.json')
+            with open(path, 'w') as f:
+                cutoff = timezone.now() - timedelta(days=30)
+                json.dump({'cutoff': cutoff.isoformat(), 'days': 30,
+                           'models': {}}, f)
+            with self.assertRaisesMessage(CommandError, '--days 30'):
+                self.call('app_test.Author', days=60, checkpoint=path)
+            self.assertTrue(os.path.exists(path))
+        self.assertEqual(Author.all_objects.count(), 5)
+
+    def test_keep_rows_with_alive_dependents(self):
+        first, second, third = self.old_authors
+        Book.all_objects.filter(author=first).update(deleted_at=None)
+        Chapter.all_objects.filter(book__author=second).update(
+            deleted_at=None)
+        err = StringIO()
+        call_command('purge_soft_deleted', 'app_test.Author', days=30,
+                     stdout=StringIO(), stderr=err)
+        self.assertIn('app_test.Author: kept 2 rows which still have alive '
+                      'dependents', err.getvalue())
+        self.assertEqual(
+            set(Author.all_objects.values_list('pk', flat=True)),
+            {first.pk, second.pk, self.recent_author.pk,
+             self.alive_author.pk})
+        self.assertTrue(Book.objects.filter(author=first).exists())
+        self.assertTrue(Chapter.objects.filter(book__author=second).exists())
+        self.assertFalse(Book.all_objects.filter(author=third).exists())
+
+    def test_skip_protected_chunks(self):
+        first, second, third = ProducerFactory.create_batch(size=3)
+        Product.all_objects.filter(producer__in=[first, third]).hard_delete()
+        Producer.all_objects.update(
+            deleted_at=timezone.now() - timedelta(days=40))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'checkpoint.json')
+            err = StringIO()
+            with self.assertRaisesMessage(CommandError, '1 chunks were'):
+                call_command('purge_soft_deleted', 'app_test.Producer',
+                             chunk_size=1, checkpoint=path, stdout=StringIO(),
+                             stderr=err)
+            self.assertIn('app_test.Producer: skipped pk %s to %s' % (
+                second.pk, second.pk), err.getvalue())
+            # Kept to retry the skipped chunk.
+            with open(path) as f:
+                self.assertEqual(json.load(f)['models'],
+                                 {'app_test.Producer': first.pk})
+        self.assertEqual(list(Producer.all_objects.values_list('pk',
+                                                               flat=True)),
+                         [second.pk])
+
+    def test_unknown_label(self):
+        with self.assertRaises(CommandError):
+            self.call('app_test.Unknown')
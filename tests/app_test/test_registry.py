@@ -0,0 +1,53 @@
+from django.db import models
+from django.test import SimpleTestCase
+from django.test.utils import isolate_apps
+
+from django_soft_delete import deletion
+from django_soft_delete.models import SoftDeletionModel
+from django_soft_delete.registry import registry
+
+from .models import Employee, HealthStatus, HobbyType, JobExperience
+
+
+class RegistryTest(SimpleTestCase):
+
+    def test_soft_delete_traits(self):
+        traits = registry.get(Employee)
+        self.assertTrue(traits.is_soft_delete)
+        self.assertTrue(traits.has_local_deleted_at)
+        self.assertEqual(traits.concrete_parents, ())
+
+    def test_not_soft_delete_traits(self):
+        traits = registry.get(HobbyType)
+        self.assertFalse(traits.is_soft_delete)
+        self.assertFalse(traits.has_local_deleted_at)
+
+    def test_cascade_relations(self):
+        handlers = {related.related_model: on_delete for related, on_delete
+                    in registry.get(Employee).cascade_relations}
+        self.assertIs(handlers[HealthStatus], deletion.CASCADE)
+        self.assertIs(handlers[JobExperience], deletion.DO_NOTHING)
+
+    def test_lookups_are_cached(self):
+        self.assertIs(registry.get(Employee), registry.get(Employee))
+
+    @isolate_apps('tests.app_test')
+    def test_invalidated_by_new_models(self):
+        class Parent(SoftDeletionModel):
+            pass
+
+        class InheritedParent(Parent):
+            pass
+
+        self.assertEqual(registry.get(Parent).cascade_relations[0][0]
+                         .related_model, InheritedParent)
+        inherited = registry.get(InheritedParent)
+        self.assertTrue(inherited.is_soft_delete)
+        self.assertFalse(inherited.has_local_deleted_at)
+        self.assertEqual(len(inherited.concrete_parents), 1)
+
+        class Child(SoftDeletionModel):
+            parent = models.ForeignKey(Parent, on_delete=deletion.CASCADE)
+
+        self.assertIn(Child, [related.related_model for related, _ in
+                              registry.get(Parent).cascade_relations])
@@ -0,0 +1,59 @@
+from django.db.models import Prefetch
+from django.test import TestCase
+from django.utils.timezone import now
+
+from .factories import EmployeeFactory
+from .models import Employee, FamilyMember, HealthStatus
+
+
+class RelatedManagersTest(TestCase):
+
+    def setUp(self):
+        self.employees = EmployeeFactory.create_batch(3)
+        for employee in self.employees:
+            # A second family member, soft deleted without cascading.
+            FamilyMember.objects.create(employee=employee,
+                                        deleted_at=now())
+        HealthStatus.objects.filter(employee=self.employees[0]).update(
+            deleted_at=now())
+
+    def test_reverse_foreign_key(self):
+        employee = self.employees[0]
+        self.assertEqual(employee.family_members.count(), 1)
+        self.assertEqual(
+            employee.family_members(manager='all_objects').count(), 2)
+
+    def test_prefetch_reverse_foreign_key(self):
+        with self.assertNumQueries(2):
+            employees = list(Employee.objects.order_by('pk').prefetch_related(
+                'family_members'))
+            self.assertEqual(
+                [len(e.family_members.all()) for e in employees], [1, 1, 1])
+
+    def test_prefetch_reverse_foreign_key_opt_out(self):
+        employees = Employee.objects.order_by('pk').prefetch_related(
+            Prefetch('family_members',
+                     queryset=FamilyMember.all_objects.all()))
+        self.assertEqual([len(e.family_members.all()) for e in employees],
+                         [2, 2, 2])
+
+    def test_reverse_one_to_one(self):
+        employee = Employee.objects.get(pk=self.employees[0].pk)
+        with self.assertRaises(HealthStatus.DoesNotExist):
+            employee.health_status
+        employee = Employee.objects.get(pk=self.employees[1].pk)
+        self.assertIsNone(employee.health_status.deleted_at)
+
+    def test_prefetch_reverse_one_to_one(self):
+        with self.assertNumQueries(2):
+            employees = list(Employee.objects.order_by('pk').prefetch_related(
+                'health_status'))
+            self.assertEqual(
+                [hasattr(e, 'health_status') for e in employees],
+                [False, True, True])
+
+    def test_prefetch_reverse_one_to_one_opt_out(self):
+        employees = Employee.objects.order_by('pk').prefetch_related(
+            Prefetch('health_status', queryset=HealthStatus.all_objects.all()))
+        self.assertEqual([hasattr(e, 'health_status') for e in employees],
+                         [True, True, True])
@@ -0,0 +1,75 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from django_soft_delete.restore import restore_order, restore_since
+
+from .factories import *
+
+
+class RestoreSinceTest(TestCase):
+
+    def setUp(self):
+        self.old_author = AuthorFactory()
+        self.old_author.delete()
+        Author.all_objects.update(
+            deleted_at=timezone.now() - timedelta(days=2))
+        Book.all_objects.update(deleted_at=timezone.now() - timedelta(days=2))
+        self.since = timezone.now() - timedelta(days=1)
+        self.authors = AuthorFactory.create_batch(size=3)
+        Author.objects.all().delete()
+        self.company = CompanyFactory(producers=None)
+        self.company.delete()
+
+    def test_restore_order(self):
+        order = restore_order([Chapter, Book, Author])
+        self.assertEqual(order, [Author, Book, Chapter])
+
+    def test_restore_since(self):
+        with self.assertNumQueries(len(restore_order(
+                [Author, Book, Poem, Chapter])) + 2):
+            total, rows_count = restore_since(self.since, ['app_test.Author',
+                                                           'app_test.Book',
+                                                           'app_test.Poem',
+                                                           'app_test.Chapter'])
+        self.assertEqual(rows_count, {
+            'app_test.Author': 3, 'app_test.Book': 3,
+            # The old author's poem and chapter kept a recent deleted_at.
+            'app_test.Poem': 4, 'app_test.Chapter': 4})
+        self.assertEqual(total, 14)
+        self.assertEqual(Author.objects.count(), 3)
+        self.assertFalse(Author.objects.filter(
+            pk=self.old_author.pk).exists())
+        self.assertFalse(Company.objects.exists())
+
+    def test_restore_clears_deletion_batch(self):
+        AlbumFactory().delete()
+        restore_since(self.since, ['app_test.Album', 'app_test.Track'])
+        self.assertEqual(Album.objects.count(), 1)
+        self.assertFalse(Album.objects.exclude(deletion_batch=None).exists())
+        self.assertFalse(Track.objects.exclude(deletion_batch=None).exists())
+
+    def test_restore_all_models(self):
+        restore_since(self.since)
+        self.assertEqual(Author.objects.count(), 3)
+        self.assertTrue(Company.objects.filter(pk=self.company.pk).exists())
+
+    def test_dry_run(self):
+        total, _ = restore_since(self.since, ['app_test.Author'],
+                                 dry_run=True)
+        self.assertEqual(total, 3)
+        self.assertFalse(Author.objects.exists())
+
+    def test_command(self):
+        out = StringIO()
+        call_command('restore_since', self.since.isoformat(),
+                     'app_test.Author', stdout=out)
+        self.assertIn('app_test.Author: revived 3 rows', out.getvalue())
+        self.assertEqual(Author.objects.count(), 3)
+
+    def test_command_invalid_date(self):
+        with self.assertRaises(CommandError):
+            call_command('restore_since', 'yesterday')
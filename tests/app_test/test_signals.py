@@ -0,0 +1,54 @@
+from django.test import TestCase
+
+from django_soft_delete.signals import (post_soft_delete_batch,
+                                        post_undelete_batch,
+                                        pre_soft_delete_batch)
+
+from .factories import *
+
+
+class BatchSignalTest(TestCase):
+
+    def setUp(self):
+        self.authors = AuthorFactory.create_batch(size=3)
+        self.calls = []
+
+    def receiver(self, signal_name):
+        def receive(sender, **kwargs):
+            self.calls.append((signal_name, sender, sorted(kwargs['pk_list']),
+                               kwargs.get('deleted_at')))
+
+        return receive
+
+    def connect(self, signal, name, sender):
+        receiver = self.receiver(name)
+        signal.connect(receiver, sender=sender)
+        self.addCleanup(signal.disconnect, receiver, sender=sender)
+
+    def test_delete_batches(self):
+        self.connect(pre_soft_delete_batch, 'pre', Author)
+        self.connect(post_soft_delete_batch, 'post', Author)
+        Author.objects.all().delete()
+
+        pk_list = sorted(author.pk for author in self.authors)
+        deleted_at = Author.all_objects.first().deleted_at
+        self.assertEqual(self.calls, [
+            ('pre', Author, pk_list, deleted_at),
+            ('post', Author, pk_list, deleted_at),
+        ])
+
+    def test_listener_disables_fast_path(self):
+        self.connect(post_soft_delete_batch, 'post', Poem)
+        Author.objects.all().delete()
+
+        pk_list = sorted(Poem.all_objects.values_list('pk', flat=True))
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.calls[0][:3], ('post', Poem, pk_list))
+
+    def test_undelete_batch(self):
+        Author.objects.all().delete()
+        self.connect(post_undelete_batch, 'undelete', Book)
+        Author.all_objects.all().undelete()
+
+        pk_list = sorted(Book.objects.values_list('pk', flat=True))
+        self.assertEqual(self.calls, [('undelete', Book, pk_list, None)])
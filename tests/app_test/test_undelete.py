@@ -1,4 +1,7 @@
+from django.db import connection
+from django.db.models import signals
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from .factories import *
 from .models import DEFAULT_EMPLOYEE_PK
@@ -156,6 +159,63 @@ class UndeleteTest(TestCase):
         self.assertFalse(Poem.objects.filter(pk=old_poem.pk).exists())
         self.assertTrue(Poem.objects.filter(pk=new_poem.pk).exists())
 
+    def test_undelete_with_shared_timestamp_uses_deletion_batch(self):
+        album = AlbumFactory()
+        old_track = album.tracks.first()
+        old_track.delete()
+        album.delete()
+        self.assertNotEqual(old_track.deletion_batch, album.deletion_batch)
+        # A delete which happened at the very same moment must not be revived
+        Track.all_objects.filter(pk=old_track.pk).update(
+            deleted_at=album.deleted_at)
+
+        album.undelete()
+
+        self.assertIsNone(album.deletion_batch)
+        self.assertFalse(Track.objects.filter(pk=old_track.pk).exists())
+        self.assertEqual(Track.objects.filter(album=album).count(), 0)
+        self.assertTrue(Review.objects.filter(album=album).exists())
+
+    def test_cascade_shares_deletion_batch(self):
+        album = AlbumFactory()
+        album.delete()
+        lyric = Lyric.all_objects.get(track__album=album)
+        self.assertIsNotNone(album.deletion_batch)
+        self.assertEqual(lyric.deletion_batch, album.deletion_batch)
+
+    def test_undelete_does_not_touch_updated_at(self):
+        self.employee.delete()
+        emp = Employee.all_objects.get(pk=self.emp_pk)
+        updated_at = emp.updated_at
+        emp.undelete()
+        self.assertIsNone(emp.deleted_at)
+        self.assertEqual(Employee.objects.get(pk=self.emp_pk).updated_at,
+                         updated_at)
+
+    def test_undelete_does_not_send_save_signals(self):
+        saved = []
+
+        def receiver(sender, instance, **kwargs):
+            saved.append(instance)
+
+        self.employee.delete()
+        signals.post_save.connect(receiver)
+        try:
+            Employee.all_objects.get(pk=self.emp_pk).undelete()
+        finally:
+            signals.post_save.disconnect(receiver)
+        self.assertEqual(saved, [])
+
+    def test_undelete_query_count_does_not_grow_with_rows(self):
+        Employee.objects.filter(pk=self.emp_pk).delete()
+        with CaptureQueriesContext(connection) as single:
+            Employee.all_objects.filter(pk=self.emp_pk).undelete()
+        EmployeeFactory.create_batch(size=5)
+        Employee.objects.exclude(id=DEFAULT_EMPLOYEE_PK).delete()
+        with CaptureQueriesContext(connection) as many:
+            Employee.all_objects.exclude(id=DEFAULT_EMPLOYEE_PK).undelete()
+        self.assertEqual(len(single), len(many))
+
     def check_cascade_relation(self):
         # test cascade with soft deletion model
         h = HealthStatus.objects.filter(employee=self.emp_pk)
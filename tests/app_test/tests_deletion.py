@@ -1,5 +1,7 @@
+from django.db import connection
 from django.db.models.deletion import ProtectedError
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from .factories import *
@@ -99,6 +101,32 @@ class DeletionTest(TestCase):
         counter = Employee.objects.exclude(id=DEFAULT_EMPLOYEE_PK).delete()[0]
         self.assertEqual(counter, 12)
 
+    def test_counter_dict_for_qs(self):
+        _, counter = Employee.objects.exclude(id=DEFAULT_EMPLOYEE_PK).delete()
+        self.assertEqual(counter['app_test.Employee'], 2)
+        self.assertEqual(counter['app_test.HealthStatus'], 2)
+        self.assertEqual(counter['app_test.HobbyLocation'], 2)
+
+    def test_qs_delete_shares_one_timestamp(self):
+        Employee.objects.exclude(id=DEFAULT_EMPLOYEE_PK).delete()
+        deleted_at = set(Employee.all_objects.exclude(
+            id=DEFAULT_EMPLOYEE_PK).values_list('deleted_at', flat=True))
+        self.assertEqual(len(deleted_at), 1)
+        self.assertEqual(
+            set(Checkup.all_objects.all().dead().values_list('deleted_at',
+                                                       flat=True)),
+            deleted_at)
+
+    def test_qs_delete_query_count_does_not_grow_with_rows(self):
+        qs = Employee.objects.filter(pk=self.emp_pk)
+        with CaptureQueriesContext(connection) as single:
+            qs.delete()
+        EmployeeFactory.create_batch(size=5)
+        qs = Employee.objects.exclude(id=DEFAULT_EMPLOYEE_PK)
+        with CaptureQueriesContext(connection) as many:
+            qs.delete()
+        self.assertEqual(len(single), len(many))
+
     def test_update_or_create_with_multiple_parameter(self):
         Employee.objects.filter(id=self.emp_pk).update_or_create(
             defaults={'deleted_at': timezone.now(),
@@ -0,0 +1,240 @@
+"""
+Benchmarks for the delete, undelete and alive read hot paths.
+
+Every case runs against a freshly generated graph inside a transaction which
+is rolled back afterwards, and records wall time, query count and the peak
+memory traced while it runs. Run it through runbenchmarks.py.
+"""
+import itertools
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from django.contrib import admin
+from django.contrib.auth.models import User as AuthUser
+from django.db import connection, transaction
+from django.test import RequestFactory
+
+from django_soft_delete.admin_utils import custom_get_deleted_objects
+
+from .app_test.factories import *
+from .app_test.models import DEFAULT_EMPLOYEE_PK
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+def _bulk_build(factory_class, size, **kwargs):
+    """
+    Build ``size`` unsaved instances with ``factory_class`` and insert them
+    with bulk_create.
+    """
+    model = factory_class._meta.model
+    model.objects.bulk_create(factory_class.build_batch(size, **kwargs))
+
+
+def build_wide(size):
+    """
+    One employee with ``size`` children spread over its CASCADE, SET,
+    SET_DEFAULT and SET_NULL relations.
+    """
+    EmployeeFactory(pk=DEFAULT_EMPLOYEE_PK)
+    employee = EmployeeFactory()
+    factories = (EmployeeProfileFactory, EmployeeNationalityFactory,
+                 FamilyMemberFactory, EmployeeInterviewFactory)
+    for index, factory_class in enumerate(factories):
+        count = size // len(factories) + (index < size % len(factories))
+        kwargs = {'employee': employee}
+        if factory_class is EmployeeNationalityFactory:
+            kwargs['nationality'] = None
+        _bulk_build(factory_class, count, **kwargs)
+    return Employee.objects.filter(pk=employee.pk)
+
+
+def build_deep(size):
+    """
+    Author -> Book -> Chapter trees holding ``size`` chapters, ten books
+    per author and ten chapters per book.
+    """
+    # bulk_create does not set primary keys on every backend, so the
+    # parents are read back before creating their children.
+    _bulk_build(AuthorFactory, max(size // 100, 1), books=None, poems=None)
+    books = []
+    for author in Author.objects.all():
+        books.extend(BookFactory.build_batch(10, author=author,
+                                             chapters=None))
+    Book.objects.bulk_create(books)
+    book_ids = Book.objects.values_list('pk', flat=True)
+    Chapter.objects.bulk_create(
+        itertools.islice((Chapter(book_id=book_id)
+                          for book_id in itertools.cycle(book_ids)), size))
+    return Author.objects.all()
+
+
+def build_mixed(size):
+    """
+    Soft deletion employees cascading to ``size`` hard deleted rows, half
+    EmployeeHobby and half HobbyLocation.
+    """
+    EmployeeFactory(pk=DEFAULT_EMPLOYEE_PK)
+    employees = [EmployeeFactory() for _ in range(max(size // 1000, 1))]
+    hobby_type = HobbyTypeFactory()
+    hobbies = []
+    for employee in employees:
+        hobbies.extend(EmployeeHobbyFactory.build_batch(
+            size // 2 // len(employees), employee=employee, type=hobby_type,
+            hobby_locations=None))
+    EmployeeHobby.objects.bulk_create(hobbies)
+    HobbyLocation.objects.bulk_create(
+        (HobbyLocation(employee_hobby_id=pk) for pk in
+         EmployeeHobby.objects.filter(
+             employee__in=employees).values_list('pk', flat=True)))
+    return Employee.objects.filter(pk__in=[e.pk for e in employees])
+
+
+GRAPHS = OrderedDict([
+    ('wide', build_wide),
+    ('deep', build_deep),
+    ('mixed', build_mixed),
+])
+
+
+def _admin_request():
+    request = RequestFactory().post('/')
+    request.user = AuthUser(username='benchmark', is_staff=True,
+                            is_superuser=True, is_active=True)
+    return request
+
+
+def case_delete_instance(roots):
+    instance = roots.first()
+    return lambda: instance.delete()
+
+
+def case_delete_queryset(roots):
+    return lambda: roots.all().delete()
+
+
+def case_undelete(roots):
+    pk_list = list(roots.values_list('pk', flat=True))
+    roots.all().delete()
+    model = roots.model
+    return lambda: model.all_objects.filter(pk__in=pk_list).undelete()
+
+
+def case_hard_delete(roots):
+    return lambda: roots.all().hard_delete()
+
+
+def case_admin_deleted_objects(roots):
+    request = _admin_request()
+    return lambda: custom_get_deleted_objects(roots.all(), request,
+                                              admin.site)
+
+
+def case_admin_truncated(roots):
+    request = _admin_request()
+    return lambda: custom_get_deleted_objects(roots.all(), request,
+                                              admin.site, max_objects=100)
+
+
+def case_alive_read(roots):
+    # Soft delete every other root so alive() has dead rows to skip.
+    model = roots.model
+    pk_list = list(roots.values_list('pk', flat=True))
+    model.objects.filter(pk__in=pk_list[::2]).delete()
+    # The default manager of soft deletion models only returns alive rows.
+    return lambda: [len(related_model._default_manager.all())
+                    for related_model in _related_models(model)]
+
+
+def _related_models(model):
+    models = [model]
+    for related in model._meta.related_objects:
+        related_model = related.related_model
+        if hasattr(related_model, 'all_objects') and \
+                related_model not in models:
+            models.append(related_model)
+    return models
+
+
+CASES = OrderedDict([
+    ('delete_instance', case_delete_instance),
+    ('delete_queryset', case_delete_queryset),
+    ('undelete', case_undelete),
+    ('hard_delete', case_hard_delete),
+    ('admin_deleted_objects', case_admin_deleted_objects),
+    ('admin_truncated', case_admin_truncated),
+    ('alive_read', case_alive_read),
+])
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _QueryCounter:
+    """
+    Execute wrapper counting queries, which unlike connection.queries isn't
+    capped.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _run_once(build, size, case, trace_memory):
+    """
+    Build a graph, prepare ``case`` on it and measure its run. Everything is
+    rolled back afterwards.
+    """
+    result = {}
+    try:
+        with transaction.atomic():
+            run = case(build(size))
+            if trace_memory:
+                tracemalloc.start()
+                try:
+                    run()
+                    result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+            else:
+                counter = _QueryCounter()
+                with connection.execute_wrapper(counter):
+                    started = time.perf_counter()
+                    run()
+                    result['seconds'] = time.perf_counter() - started
+                result['queries'] = counter.count
+            raise _Rollback
+    except _Rollback:
+        pass
+    return result
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, graphs=None, cases=None,
+                   trace_memory=True, report=None):
+    """
+    Run every case against every graph and size and return a list of result
+    dicts.
+
+    Wall time and query count come from one run, peak memory from a second
+    one on a fresh graph, because tracing allocations slows the code down.
+    """
+    results = []
+    for graph_name in graphs or GRAPHS:
+        for size in sizes:
+            for case_name in cases or CASES:
+                build, case = GRAPHS[graph_name], CASES[case_name]
+                result = OrderedDict([('graph', graph_name), ('size', size),
+                                      ('case', case_name)])
+                result.update(_run_once(build, size, case, False))
+                if trace_memory:
+                    result.update(_run_once(build, size, case, True))
+                results.append(result)
+                if report is not None:
+                    report(result)
+    return results
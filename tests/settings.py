@@ -9,6 +9,10 @@ DATABASES = {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': 'soft_delete_test'
     },
+    'other': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': 'soft_delete_test_other'
+    },
 }
 
 INSTALLED_APPS = (
@@ -22,6 +26,9 @@ INSTALLED_APPS = (
     'tests.app_test',
 )
 
+# Most test models deliberately have no deleted_at index.
+SILENCED_SYSTEM_CHECKS = ['django_soft_delete.W001']
+
 STATIC_URL = '/static/'
 SECRET_KEY = 'abc123'
 